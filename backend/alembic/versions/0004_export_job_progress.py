@@ -0,0 +1,40 @@
+"""Add export job progress counters and resume checkpoint.
+
+Revision ID: 0004_export_job_progress
+Revises: 0003_user_admin_and_optional_email
+Create Date: 2026-10-19
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0004_export_job_progress"
+down_revision = "0003_user_admin_and_optional_email"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("export_jobs") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "rows_written",
+                sa.Integer(),
+                nullable=False,
+                server_default=sa.text("0"),
+            )
+        )
+        batch_op.add_column(sa.Column("total_rows", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("checkpoint", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("export_jobs") as batch_op:
+        batch_op.drop_column("checkpoint")
+        batch_op.drop_column("total_rows")
+        batch_op.drop_column("rows_written")
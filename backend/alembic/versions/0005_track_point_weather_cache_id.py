@@ -0,0 +1,142 @@
+"""Reference weather_cache rows from track_points instead of copying JSON.
+
+Revision ID: 0005_track_point_weather_cache_id
+Revises: 0004_export_job_progress
+Create Date: 2026-10-19
+
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import json
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0005_track_point_weather_cache_id"
+down_revision = "0004_export_job_progress"
+branch_labels = None
+depends_on = None
+
+
+_BATCH_ROWS = 1_000
+
+track_points = sa.table(
+    "track_points",
+    sa.column("id", sa.BigInteger()),
+    sa.column("weather_snapshot", sa.JSON()),
+    sa.column("weather_cache_id", sa.Integer()),
+)
+weather_cache = sa.table(
+    "weather_cache",
+    sa.column("id", sa.Integer()),
+    sa.column("hour_time", sa.DateTime(timezone=True)),
+    sa.column("payload", sa.JSON()),
+)
+
+
+def _canonical(payload: object) -> str:
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"))
+
+
+def _snapshot_hour(payload: object) -> dt.datetime | None:
+    if not isinstance(payload, dict):
+        return None
+    raw = payload.get("hour_time")
+    if not isinstance(raw, str):
+        return None
+    try:
+        out = dt.datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if out.tzinfo is None:
+        out = out.replace(tzinfo=dt.timezone.utc)
+    return out
+
+
+def _link_existing_snapshots(conn: sa.Connection) -> None:
+    # Snapshots were always copies of a weather_cache payload, so the matching
+    # row is the one with the same hour and an identical payload. Snapshots
+    # without such a row keep their JSON.
+    by_hour: dict[dt.datetime, dict[str, int]] = {}
+    after_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(track_points.c.id, track_points.c.weather_snapshot)
+            .where(
+                track_points.c.weather_snapshot.is_not(None),
+                track_points.c.id > after_id,
+            )
+            .order_by(track_points.c.id.asc())
+            .limit(_BATCH_ROWS)
+        ).all()
+        if not rows:
+            return
+        after_id = int(rows[-1][0])
+
+        updates: list[dict[str, object]] = []
+        for point_id, snapshot in rows:
+            hour = _snapshot_hour(snapshot)
+            if hour is None:
+                continue
+            if hour not in by_hour:
+                by_hour[hour] = {
+                    _canonical(payload): int(cache_id)
+                    for cache_id, payload in conn.execute(
+                        sa.select(weather_cache.c.id, weather_cache.c.payload).where(
+                            weather_cache.c.hour_time == hour
+                        )
+                    ).all()
+                }
+            cache_id = by_hour[hour].get(_canonical(snapshot))
+            if cache_id is not None:
+                updates.append({"b_id": point_id, "b_cache_id": cache_id})
+
+        if updates:
+            conn.execute(
+                sa.update(track_points)
+                .where(track_points.c.id == sa.bindparam("b_id"))
+                .values(
+                    weather_cache_id=sa.bindparam("b_cache_id"),
+                    weather_snapshot=sa.null(),
+                ),
+                updates,
+            )
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("track_points") as batch_op:
+        batch_op.add_column(sa.Column("weather_cache_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            "fk_track_points_weather_cache_id",
+            "weather_cache",
+            ["weather_cache_id"],
+            ["id"],
+            ondelete="SET NULL",
+        )
+        batch_op.create_index(
+            "ix_track_points_weather_cache_id", ["weather_cache_id"], unique=False
+        )
+
+    _link_existing_snapshots(op.get_bind())
+
+
+def downgrade() -> None:
+    # Copy payloads back onto points before dropping the reference.
+    op.execute(
+        sa.update(track_points)
+        .where(track_points.c.weather_cache_id.is_not(None))
+        .values(
+            weather_snapshot=sa.select(weather_cache.c.payload)
+            .where(weather_cache.c.id == track_points.c.weather_cache_id)
+            .scalar_subquery()
+        )
+    )
+
+    with op.batch_alter_table("track_points") as batch_op:
+        batch_op.drop_index("ix_track_points_weather_cache_id")
+        batch_op.drop_constraint("fk_track_points_weather_cache_id", type_="foreignkey")
+        batch_op.drop_column("weather_cache_id")
@@ -0,0 +1,46 @@
+"""Add per-user anti-cheat audit watermarks.
+
+Revision ID: 0006_anti_cheat_watermarks
+Revises: 0005_track_point_weather_cache_id
+Create Date: 2026-10-19
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "0006_anti_cheat_watermarks"
+down_revision = "0005_track_point_weather_cache_id"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    uuid_t = sa.String(36).with_variant(postgresql.UUID(as_uuid=True), "postgresql")
+
+    # Starts empty: each user's first audit after upgrade sets its watermark.
+    op.create_table(
+        "anti_cheat_watermarks",
+        sa.Column("user_id", uuid_t, primary_key=True, nullable=False),
+        sa.Column(
+            "last_point_id",
+            sa.BigInteger().with_variant(sa.Integer(), "sqlite"),
+            nullable=False,
+        ),
+        sa.Column("last_recorded_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_latitude", sa.Float(), nullable=False),
+        sa.Column("last_longitude", sa.Float(), nullable=False),
+        sa.Column("last_accuracy", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("anti_cheat_watermarks")
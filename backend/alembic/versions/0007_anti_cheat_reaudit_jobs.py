@@ -0,0 +1,73 @@
+"""Add sharded anti-cheat re-audit jobs.
+
+Revision ID: 0007_anti_cheat_reaudit_jobs
+Revises: 0006_anti_cheat_watermarks
+Create Date: 2026-10-19
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "0007_anti_cheat_reaudit_jobs"
+down_revision = "0006_anti_cheat_watermarks"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    uuid_t = sa.String(36).with_variant(postgresql.UUID(as_uuid=True), "postgresql")
+    zero = sa.text("0")
+
+    op.create_table(
+        "anti_cheat_reaudit_jobs",
+        sa.Column("id", uuid_t, primary_key=True, nullable=False),
+        sa.Column("requested_by", uuid_t, nullable=True),
+        sa.Column("state", sa.Text(), nullable=False),
+        sa.Column("shards_total", sa.Integer(), nullable=False, server_default=zero),
+        sa.Column("shards_done", sa.Integer(), nullable=False, server_default=zero),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["requested_by"], ["users.id"], ondelete="SET NULL"),
+    )
+
+    op.create_table(
+        "anti_cheat_reaudit_shards",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("job_id", uuid_t, nullable=False),
+        sa.Column("user_id", uuid_t, nullable=False),
+        sa.Column("start_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("end_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("state", sa.Text(), nullable=False),
+        sa.Column("points_audited", sa.Integer(), nullable=False, server_default=zero),
+        sa.Column("points_dirty", sa.Integer(), nullable=False, server_default=zero),
+        sa.Column("points_updated", sa.Integer(), nullable=False, server_default=zero),
+        sa.Column("checkpoint", sa.JSON(), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["job_id"], ["anti_cheat_reaudit_jobs.id"], ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+    )
+    op.create_index(
+        "ix_anti_cheat_reaudit_shards_job_id", "anti_cheat_reaudit_shards", ["job_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_anti_cheat_reaudit_shards_job_id", table_name="anti_cheat_reaudit_shards"
+    )
+    op.drop_table("anti_cheat_reaudit_shards")
+    op.drop_table("anti_cheat_reaudit_jobs")
@@ -0,0 +1,29 @@
+"""Keep the predecessor altitude on anti-cheat watermarks.
+
+Revision ID: 0008_anti_cheat_watermark_altitude
+Revises: 0007_anti_cheat_reaudit_jobs
+Create Date: 2026-10-19
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0008_anti_cheat_watermark_altitude"
+down_revision = "0007_anti_cheat_reaudit_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("anti_cheat_watermarks") as batch_op:
+        batch_op.add_column(sa.Column("last_altitude", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("anti_cheat_watermarks") as batch_op:
+        batch_op.drop_column("last_altitude")
@@ -0,0 +1,53 @@
+"""Record which anti-cheat rules flagged each track point.
+
+Revision ID: 0009_track_point_dirty_reasons
+Revises: 0008_anti_cheat_watermark_altitude
+Create Date: 2026-10-19
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0009_track_point_dirty_reasons"
+down_revision = "0008_anti_cheat_watermark_altitude"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing dirty points keep reasons = 0 until re-audited (admin re-audit job).
+    with op.batch_alter_table("track_points") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "dirty_reasons",
+                sa.Integer(),
+                nullable=False,
+                server_default=sa.text("0"),
+            )
+        )
+    op.create_index(
+        "ix_track_points_user_dirty_recorded_at",
+        "track_points",
+        ["user_id", "recorded_at"],
+        postgresql_where=sa.text("dirty_reasons <> 0"),
+        sqlite_where=sa.text("dirty_reasons <> 0"),
+    )
+    op.create_index(
+        "ix_track_points_dirty_recorded_at",
+        "track_points",
+        ["recorded_at"],
+        postgresql_where=sa.text("dirty_reasons <> 0"),
+        sqlite_where=sa.text("dirty_reasons <> 0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_track_points_dirty_recorded_at", table_name="track_points")
+    op.drop_index("ix_track_points_user_dirty_recorded_at", table_name="track_points")
+    with op.batch_alter_table("track_points") as batch_op:
+        batch_op.drop_column("dirty_reasons")
@@ -0,0 +1,50 @@
+"""Add per-user stay detector state for incremental life-event recompute.
+
+Revision ID: 0010_stay_detector_states
+Revises: 0009_track_point_dirty_reasons
+Create Date: 2026-10-19
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "0010_stay_detector_states"
+down_revision = "0009_track_point_dirty_reasons"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    uuid_t = sa.String(36).with_variant(postgresql.UUID(as_uuid=True), "postgresql")
+
+    # Starts empty: each user's next recompute rescans from their latest stay.
+    op.create_table(
+        "stay_detector_states",
+        sa.Column("user_id", uuid_t, primary_key=True, nullable=False),
+        sa.Column("distance_threshold_m", sa.Float(), nullable=False),
+        sa.Column("time_threshold_s", sa.Float(), nullable=False),
+        sa.Column("anchor_recorded_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("anchor_latitude", sa.Float(), nullable=False),
+        sa.Column("anchor_longitude", sa.Float(), nullable=False),
+        sa.Column("last_recorded_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("point_count", sa.Integer(), nullable=False),
+        sa.Column("latitude_sum", sa.Float(), nullable=False),
+        sa.Column("longitude_sum", sa.Float(), nullable=False),
+        sa.Column("gcj02_latitude_sum", sa.Float(), nullable=False),
+        sa.Column("gcj02_longitude_sum", sa.Float(), nullable=False),
+        sa.Column("gcj02_point_count", sa.Integer(), nullable=False),
+        sa.Column("open_event_id", uuid_t, nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("stay_detector_states")
@@ -0,0 +1,54 @@
+"""Carry the open trip (movement between stays) in the stay detector state.
+
+Revision ID: 0011_stay_detector_trips
+Revises: 0010_stay_detector_states
+Create Date: 2026-10-19
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0011_stay_detector_trips"
+down_revision = "0010_stay_detector_states"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # States are derived data: drop them rather than backfill the new NOT NULL
+    # columns. Each user's next recompute rescans from their latest stay.
+    op.execute("DELETE FROM stay_detector_states")
+    with op.batch_alter_table("stay_detector_states") as batch_op:
+        batch_op.add_column(sa.Column("last_latitude", sa.Float(), nullable=False))
+        batch_op.add_column(sa.Column("last_longitude", sa.Float(), nullable=False))
+        batch_op.add_column(
+            sa.Column("trip_started_at", sa.DateTime(timezone=True), nullable=True)
+        )
+        batch_op.add_column(
+            sa.Column(
+                "trip_last_recorded_at", sa.DateTime(timezone=True), nullable=True
+            )
+        )
+        batch_op.add_column(sa.Column("trip_last_latitude", sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column("trip_last_longitude", sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column("trip_point_count", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("trip_distance_m", sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column("trip_vertices", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("stay_detector_states") as batch_op:
+        batch_op.drop_column("trip_vertices")
+        batch_op.drop_column("trip_distance_m")
+        batch_op.drop_column("trip_point_count")
+        batch_op.drop_column("trip_last_longitude")
+        batch_op.drop_column("trip_last_latitude")
+        batch_op.drop_column("trip_last_recorded_at")
+        batch_op.drop_column("trip_started_at")
+        batch_op.drop_column("last_longitude")
+        batch_op.drop_column("last_latitude")
@@ -0,0 +1,26 @@
+"""Index track points by ingestion time for weather cache warming.
+
+Revision ID: 0012_track_point_created_at_index
+Revises: 0011_stay_detector_trips
+Create Date: 2026-10-19
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0012_track_point_created_at_index"
+down_revision = "0011_stay_detector_trips"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_track_points_created_at", "track_points", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_track_points_created_at", table_name="track_points")
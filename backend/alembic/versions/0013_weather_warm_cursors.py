@@ -0,0 +1,34 @@
+"""Add the ingestion-time cursor for scheduled weather cache warming.
+
+Revision ID: 0013_weather_warm_cursors
+Revises: 0012_track_point_created_at_index
+Create Date: 2026-10-19
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0013_weather_warm_cursors"
+down_revision = "0012_track_point_created_at_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Starts empty: the first scheduled run looks back the configured window.
+    op.create_table(
+        "weather_warm_cursors",
+        sa.Column("name", sa.String(64), primary_key=True, nullable=False),
+        sa.Column("warmed_until", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("weather_warm_cursors")
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import datetime as dt
 import uuid
+from typing import Any, cast
 
-from fastapi import APIRouter, Depends
+import sqlalchemy as sa
+from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -10,7 +13,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.deps import get_current_user
 from app.core.errors import APIError
 from app.db.session import get_db
+from app.models.anti_cheat_reaudit import AntiCheatReauditJob, AntiCheatReauditShard
+from app.models.track_point import TrackPoint
 from app.models.user import User
+from app.services.anti_cheat_rules import RULES
+from app.services.weather import get_memory_cache
+from app.tasks.anti_cheat import reaudit_shard_task, start_reaudit_job_task
 
 
 router = APIRouter(prefix="/v1/admin", tags=["admin"])
@@ -38,6 +46,48 @@ class SetAdminRequest(BaseModel):
     is_admin: bool
 
 
+class WeatherMemoryCacheStats(BaseModel):
+    size: int
+    max_entries: int
+    hits: int
+    negative_hits: int
+    misses: int
+    evictions: int
+
+
+class ReauditCreateResponse(BaseModel):
+    job_id: str
+
+
+class ReauditRetryResponse(BaseModel):
+    job_id: str
+    shards_requeued: int
+
+
+class ReauditStatusResponse(BaseModel):
+    job_id: str
+    state: str
+    shards_total: int
+    shards_done: int
+    shards_failed: int
+    points_audited: int
+    points_updated: int
+    points_dirty: int
+    elapsed_s: float | None
+    points_per_s: float | None
+    error_message: str | None
+
+
+class AntiCheatRuleCount(BaseModel):
+    rule: str
+    points: int
+
+
+class AntiCheatFlagStats(BaseModel):
+    dirty_points: int
+    rules: list[AntiCheatRuleCount]
+
+
 @router.get("/users", response_model=list[AdminUserRow])
 async def list_users(
     _admin: User = Depends(require_admin),
@@ -100,3 +150,201 @@ async def set_admin(
         is_admin=bool(user.is_admin),
         created_at=created_at,
     )
+
+
+@router.get("/weather-cache", response_model=WeatherMemoryCacheStats)
+async def weather_cache_stats(
+    _admin: User = Depends(require_admin),
+) -> WeatherMemoryCacheStats:
+    # Counters are per process (API worker); Celery workers keep their own.
+    return WeatherMemoryCacheStats(**get_memory_cache().stats())
+
+
+def _parse_uuid(value: str, *, field: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(value)
+    except Exception:
+        raise APIError(
+            code="VALIDATION_ERROR",
+            message=f"Invalid {field}",
+            status_code=400,
+        )
+
+
+@router.post(
+    "/anti-cheat/reaudits", response_model=ReauditCreateResponse, status_code=202
+)
+async def create_reaudit(
+    admin: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+) -> ReauditCreateResponse:
+    job = AntiCheatReauditJob(requested_by=admin.id, state="CREATED")
+    db.add(job)
+    await db.commit()
+
+    # Plans shards and fans them out; inline in dev/test (celery eager).
+    cast(Any, start_reaudit_job_task).delay(str(job.id))
+
+    return ReauditCreateResponse(job_id=str(job.id))
+
+
+@router.post(
+    "/anti-cheat/reaudits/{job_id}/retry",
+    response_model=ReauditRetryResponse,
+    status_code=202,
+)
+async def retry_reaudit(
+    job_id: str,
+    _admin: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+) -> ReauditRetryResponse:
+    """Re-enqueue every shard that is not DONE; each resumes from its checkpoint.
+
+    For shards that failed or whose worker was lost. A job that was never
+    planned is planned again.
+    """
+
+    jid = _parse_uuid(job_id, field="job_id")
+    job = (
+        await db.execute(
+            select(AntiCheatReauditJob).where(AntiCheatReauditJob.id == jid)
+        )
+    ).scalar_one_or_none()
+    if job is None:
+        raise APIError(
+            code="NOT_FOUND",
+            message="Re-audit job not found",
+            status_code=404,
+        )
+    if job.state == "SUCCEEDED":
+        raise APIError(
+            code="REAUDIT_JOB_FINISHED",
+            message="Re-audit job already succeeded",
+            status_code=409,
+        )
+
+    if job.state == "CREATED":
+        cast(Any, start_reaudit_job_task).delay(str(job.id))
+        return ReauditRetryResponse(job_id=str(job.id), shards_requeued=0)
+
+    shard_ids = (
+        (
+            await db.execute(
+                select(AntiCheatReauditShard.id)
+                .where(AntiCheatReauditShard.job_id == jid)
+                .where(AntiCheatReauditShard.state != "DONE")
+                .order_by(AntiCheatReauditShard.id)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    for shard_id in shard_ids:
+        cast(Any, reaudit_shard_task).delay(shard_id)
+    return ReauditRetryResponse(job_id=str(job.id), shards_requeued=len(shard_ids))
+
+
+@router.get("/anti-cheat/reaudits/{job_id}", response_model=ReauditStatusResponse)
+async def get_reaudit(
+    job_id: str,
+    _admin: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+) -> ReauditStatusResponse:
+    jid = _parse_uuid(job_id, field="job_id")
+    job = (
+        await db.execute(
+            select(AntiCheatReauditJob)
+            .where(AntiCheatReauditJob.id == jid)
+            .execution_options(populate_existing=True)
+        )
+    ).scalar_one_or_none()
+    if job is None:
+        raise APIError(
+            code="NOT_FOUND",
+            message="Re-audit job not found",
+            status_code=404,
+        )
+
+    audited, updated, dirty, failed = (
+        await db.execute(
+            select(
+                sa.func.coalesce(sa.func.sum(AntiCheatReauditShard.points_audited), 0),
+                sa.func.coalesce(sa.func.sum(AntiCheatReauditShard.points_updated), 0),
+                sa.func.coalesce(sa.func.sum(AntiCheatReauditShard.points_dirty), 0),
+                sa.func.count().filter(AntiCheatReauditShard.state == "FAILED"),
+            ).where(AntiCheatReauditShard.job_id == jid)
+        )
+    ).one()
+
+    elapsed_s: float | None = None
+    points_per_s: float | None = None
+    if job.started_at is not None:
+        started = job.started_at
+        finished = job.finished_at or dt.datetime.now(dt.timezone.utc)
+        # SQLite hands back naive datetimes for timezone-aware columns.
+        if started.tzinfo is None:
+            started = started.replace(tzinfo=dt.timezone.utc)
+        if finished.tzinfo is None:
+            finished = finished.replace(tzinfo=dt.timezone.utc)
+        elapsed_s = max(0.0, (finished - started).total_seconds())
+        if elapsed_s > 0:
+            points_per_s = int(audited) / elapsed_s
+
+    return ReauditStatusResponse(
+        job_id=str(job.id),
+        state=job.state,
+        shards_total=job.shards_total,
+        shards_done=job.shards_done,
+        shards_failed=int(failed),
+        points_audited=int(audited),
+        points_updated=int(updated),
+        points_dirty=int(dirty),
+        elapsed_s=elapsed_s,
+        points_per_s=points_per_s,
+        error_message=job.error_message,
+    )
+
+
+@router.get("/anti-cheat/flags", response_model=AntiCheatFlagStats)
+async def anti_cheat_flag_stats(
+    *,
+    start: dt.datetime = Query(..., description="UTC ISO8601 start time"),
+    end: dt.datetime = Query(..., description="UTC ISO8601 end time"),
+    user_id: str | None = Query(None, description="Limit to one user"),
+    _admin: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+) -> AntiCheatFlagStats:
+    start_utc = start if start.tzinfo else start.replace(tzinfo=dt.timezone.utc)
+    end_utc = end if end.tzinfo else end.replace(tzinfo=dt.timezone.utc)
+    if start_utc >= end_utc:
+        raise APIError(
+            code="VALIDATION_ERROR",
+            message="start must be before end",
+            status_code=400,
+        )
+
+    # Counts come from the stored reasons bitmask; only flagged points are read
+    # (partial indexes on dirty_reasons <> 0, with or without user_id first).
+    reasons = TrackPoint.dirty_reasons
+    stmt = select(
+        sa.func.count(),
+        *(
+            sa.func.count().filter(reasons.bitwise_and(rule.bit) != 0)
+            for rule in RULES.values()
+        ),
+    ).where(
+        reasons != 0,
+        TrackPoint.recorded_at >= start_utc,
+        TrackPoint.recorded_at <= end_utc,
+    )
+    if user_id is not None:
+        stmt = stmt.where(TrackPoint.user_id == _parse_uuid(user_id, field="user_id"))
+    total, *per_rule = (await db.execute(stmt)).one()
+
+    return AntiCheatFlagStats(
+        dirty_points=int(total),
+        rules=[
+            AntiCheatRuleCount(rule=name, points=int(count))
+            for name, count in zip(RULES, per_rule)
+        ],
+    )
@@ -22,7 +22,16 @@ from app.models.export_job import ExportJob
 from app.models.track_edit import TrackEdit
 from app.models.track_point import TrackPoint
 from app.models.user import User
-from app.tasks.export import run_export_job_task
+from app.tasks.export import (
+    COLUMNAR_FORMATS,
+    artifact_rel_path,
+    attach_weather_snapshots,
+    columnar_available,
+    format_bytes,
+    partial_artifact_paths,
+    run_export_job_task,
+    tzinfo_from_name,
+)
 
 
 router = APIRouter(prefix="/v1/export", tags=["export"])
@@ -33,6 +42,8 @@ _FORMAT_CANONICAL: dict[str, str] = {
     "gpx": "GPX",
     "geojson": "GeoJSON",
     "kml": "KML",
+    "parquet": "Parquet",
+    "arrow": "Arrow",
 }
 
 
@@ -53,6 +64,13 @@ def _normalize_format(value: str) -> str:
             status_code=400,
             details={"format": value},
         )
+    if canonical in COLUMNAR_FORMATS and not columnar_available():
+        raise APIError(
+            code="EXPORT_FORMAT_UNSUPPORTED",
+            message="Columnar export formats are not enabled on this server",
+            status_code=400,
+            details={"format": value, "requires": "pyarrow"},
+        )
     return canonical
 
 
@@ -88,6 +106,9 @@ class ExportJobStatusResponse(BaseModel):
     timezone: str
     artifact_path: str | None
     error: ExportJobError | None
+    # Progress; total_rows is known once the worker has counted the range.
+    rows_written: int = 0
+    total_rows: int | None = None
 
 
 def _artifact_abs_path(*, artifact_path: str) -> Path:
@@ -170,7 +191,9 @@ async def _load_export_points(
         )
         .order_by(TrackPoint.recorded_at.asc())
     )
-    return list((await db.execute(stmt)).scalars().all())
+    points = list((await db.execute(stmt)).scalars().all())
+    await attach_weather_snapshots(db, points)
+    return points
 
 
 @router.post("", status_code=202, response_model=ExportCreateResponse)
@@ -290,10 +313,8 @@ async def export_compat_get(
             user=user, start_utc=start_utc, end_utc=end_utc, db=db
         )
 
-        # Reuse the worker's stdlib-only format implementation.
-        from app.tasks.export import _format_bytes, _tzinfo_from_name
-
-        payload = _format_bytes(fmt, points, _tzinfo_from_name(tz))
+        # Same writers as the export job, so sync and async files match.
+        payload = format_bytes(fmt, points, tzinfo_from_name(tz))
         media_type = "application/octet-stream"
         filename = f"wayfarer-export.{fmt.lower()}"
         return StreamingResponse(
@@ -364,6 +385,8 @@ async def get_export_job_status(
         timezone=job.timezone,
         artifact_path=job.artifact_path,
         error=err,
+        rows_written=int(job.rows_written or 0),
+        total_rows=job.total_rows,
     )
 
 
@@ -460,10 +483,13 @@ async def cancel_export_job(
             details={"state": job.state},
         )
 
-    # Best-effort artifact cleanup.
-    if job.artifact_path:
+    # Best-effort artifact cleanup (a running worker removes its partial files
+    # itself once it notices the cancel; these cover a worker that is gone).
+    artifact_path = job.artifact_path or artifact_rel_path(job)
+    abs_path = _artifact_abs_path(artifact_path=artifact_path)
+    for path in (abs_path, *partial_artifact_paths(abs_path)):
         try:
-            _artifact_abs_path(artifact_path=job.artifact_path).unlink(missing_ok=True)
+            path.unlink(missing_ok=True)
         except Exception:
             pass
 
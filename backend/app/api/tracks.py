@@ -18,6 +18,7 @@ from app.api.deps import get_current_user
 from app.core.errors import APIError
 from app.db.base import utcnow
 from app.db.session import get_db
+from app.models.stay_detector_state import StayDetectorState
 from app.models.track_edit import TrackEdit
 from app.models.track_point import TrackPoint
 from app.models.user import User
@@ -416,6 +417,10 @@ async def create_edit(
         note=None,
     )
     db.add(edit)
+    # The carried-over stay window may hold points this edit hides.
+    await db.execute(
+        sa.delete(StayDetectorState).where(StayDetectorState.user_id == user.id)
+    )
     await db.commit()
 
     return TrackEditCreateResponse(edit_id=str(edit.id), applied_count=applied_count)
@@ -467,5 +472,8 @@ async def cancel_edit(
 
     if edit.canceled_at is None:
         edit.canceled_at = utcnow()
+        await db.execute(
+            sa.delete(StayDetectorState).where(StayDetectorState.user_id == user.id)
+        )
         await db.commit()
     return Response(status_code=204)
@@ -20,12 +20,28 @@ class Settings(BaseSettings):
     # Default dev behavior: run tasks inline unless explicitly disabled.
     celery_eager: bool = True
     redis_url: str | None = None
+    # Late-acked tasks (exports, re-audit shards) are redelivered by Redis if
+    # still unacked after this long, so it must exceed the longest task.
+    celery_visibility_timeout_s: int = 6 * 3600
+
+    # Anti-cheat
+    # "python" evaluates the rules in the worker; "sql" runs them inside
+    # PostgreSQL as one UPDATE over LAG(). Other databases always use "python".
+    anti_cheat_engine: str = "python"
+    # Bulk re-audit: each shard covers one user over at most this many days,
+    # read in keyset pages of this many points.
+    anti_cheat_reaudit_shard_days: int = 30
+    anti_cheat_reaudit_chunk_rows: int = 5_000
 
     # Export
     export_dir: str = "./data/exports"
     max_concurrent_exports: int = 2
     max_export_points: int = 5_000_000
     sync_threshold_points: int = 50_000
+    # Rows fetched per keyset page while streaming an export artifact.
+    export_chunk_rows: int = 5_000
+    # Max seconds between cancellation checks inside a running export.
+    export_cancel_check_interval_s: float = 1.0
 
     # Weather (Open-Meteo archive)
     # Fixed token for acceptance: geohash_precision: 5
@@ -34,6 +50,34 @@ class Settings(BaseSettings):
     open_meteo_timeout_s: float = 10.0
     open_meteo_max_retries: int = 5
     open_meteo_backoff_base_s: float = 0.5
+    # Shared token bucket in front of Open-Meteo (free tier: 600/min); 0 disables.
+    open_meteo_rate_limit_per_min: int = 600
+    open_meteo_rate_limit_burst: int = 10
+    # Pooled keep-alive client; HTTP/2 is used when the optional `h2` is installed.
+    open_meteo_http2: bool = True
+    open_meteo_max_connections: int = 20
+    open_meteo_max_keepalive_connections: int = 10
+    open_meteo_keepalive_expiry_s: float = 30.0
+    # Max concurrent provider requests while enriching one batch of points.
+    weather_fetch_concurrency: int = 8
+    # Max consecutive days covered by a single Open-Meteo archive request.
+    weather_fetch_max_days: int = 7
+    # In-process LRU in front of weather_cache; 0 entries disables it.
+    weather_memory_cache_max_entries: int = 50_000
+    weather_memory_cache_ttl_s: float = 3600.0
+    # Provider failures are remembered briefly to avoid retry storms.
+    weather_negative_cache_ttl_s: float = 60.0
+    # Optional Redis lock so only one worker fetches a geohash-day at a time.
+    weather_fetch_lock_enabled: bool = False
+    weather_fetch_lock_ttl_s: float = 30.0
+    # Cache warming: the archive lags real time by a few days, so scheduled
+    # runs warm the points ingested (`created_at`) up to lag hours ago, from
+    # where the previous run stopped; the first run looks back `lookback`.
+    weather_archive_lag_hours: int = 120
+    weather_warm_lookback_hours: int = 24
+    weather_warm_batch_keys: int = 500
+    # One request at a time keeps warming from starving export enrichment.
+    weather_warm_concurrency: int = 1
 
     # Auth (JWT)
     jwt_signing_keys_json: str | None = None
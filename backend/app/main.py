@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import logging
 import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
@@ -12,15 +14,23 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 from app.api.router import api_router
 from app.core.errors import APIError, make_error_payload
 from app.core.settings import get_settings
+from app.services.weather import close_open_meteo_clients
 
 
 logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:  # noqa: ARG001
+    yield
+    # Drain pooled provider and Redis connections opened on the server's loop.
+    await close_open_meteo_clients()
+
+
 def create_app() -> FastAPI:
     settings = get_settings()
 
-    app = FastAPI(title="Wayfarer API")
+    app = FastAPI(title="Wayfarer API", lifespan=_lifespan)
 
     def _with_trace_id_header(
         headers: dict[str, str] | None, trace_id: str | None
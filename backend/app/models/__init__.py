@@ -5,20 +5,29 @@ Importing this module should register all tables on Base.metadata.
 
 from __future__ import annotations
 
+from app.models.anti_cheat_reaudit import AntiCheatReauditJob, AntiCheatReauditShard
+from app.models.anti_cheat_watermark import AntiCheatWatermark
 from app.models.export_job import ExportJob
 from app.models.life_event import LifeEvent
 from app.models.refresh_token import RefreshToken
+from app.models.stay_detector_state import StayDetectorState
 from app.models.track_edit import TrackEdit
 from app.models.track_point import TrackPoint
 from app.models.user import User
 from app.models.weather_cache import WeatherCache
+from app.models.weather_warm_cursor import WeatherWarmCursor
 
 __all__ = [
+    "AntiCheatReauditJob",
+    "AntiCheatReauditShard",
+    "AntiCheatWatermark",
     "ExportJob",
     "LifeEvent",
     "RefreshToken",
+    "StayDetectorState",
     "TrackEdit",
     "TrackPoint",
     "User",
     "WeatherCache",
+    "WeatherWarmCursor",
 ]
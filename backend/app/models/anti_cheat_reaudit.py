@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import datetime as dt
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base, GUID, utcnow
+
+
+class AntiCheatReauditJob(Base):
+    """Admin-triggered re-audit of every user's stored track.
+
+    The work is split into `AntiCheatReauditShard` rows (one user and time
+    range each) that Celery workers process independently.
+    """
+
+    __tablename__ = "anti_cheat_reaudit_jobs"
+
+    id: Mapped[uuid.UUID] = mapped_column(GUID(), primary_key=True, default=uuid.uuid4)
+    requested_by: Mapped[uuid.UUID | None] = mapped_column(
+        GUID(),
+        sa.ForeignKey("users.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+
+    state: Mapped[str] = mapped_column(sa.Text, nullable=False)
+    shards_total: Mapped[int] = mapped_column(
+        sa.Integer, nullable=False, default=0, server_default=sa.text("0")
+    )
+    shards_done: Mapped[int] = mapped_column(
+        sa.Integer, nullable=False, default=0, server_default=sa.text("0")
+    )
+    error_message: Mapped[str | None] = mapped_column(sa.Text, nullable=True)
+
+    created_at: Mapped[dt.datetime] = mapped_column(
+        sa.DateTime(timezone=True), nullable=False, default=utcnow
+    )
+    updated_at: Mapped[dt.datetime] = mapped_column(
+        sa.DateTime(timezone=True), nullable=False, default=utcnow, onupdate=utcnow
+    )
+    started_at: Mapped[dt.datetime | None] = mapped_column(
+        sa.DateTime(timezone=True), nullable=True
+    )
+    finished_at: Mapped[dt.datetime | None] = mapped_column(
+        sa.DateTime(timezone=True), nullable=True
+    )
+
+
+class AntiCheatReauditShard(Base):
+    """One user's points in [start_at, end_at] (inclusive) within a re-audit."""
+
+    __tablename__ = "anti_cheat_reaudit_shards"
+
+    id: Mapped[int] = mapped_column(sa.Integer, primary_key=True, autoincrement=True)
+    job_id: Mapped[uuid.UUID] = mapped_column(
+        GUID(),
+        sa.ForeignKey("anti_cheat_reaudit_jobs.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        GUID(),
+        sa.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    start_at: Mapped[dt.datetime] = mapped_column(
+        sa.DateTime(timezone=True), nullable=False
+    )
+    end_at: Mapped[dt.datetime] = mapped_column(
+        sa.DateTime(timezone=True), nullable=False
+    )
+
+    state: Mapped[str] = mapped_column(sa.Text, nullable=False)
+    points_audited: Mapped[int] = mapped_column(
+        sa.Integer, nullable=False, default=0, server_default=sa.text("0")
+    )
+    points_dirty: Mapped[int] = mapped_column(
+        sa.Integer, nullable=False, default=0, server_default=sa.text("0")
+    )
+    points_updated: Mapped[int] = mapped_column(
+        sa.Integer, nullable=False, default=0, server_default=sa.text("0")
+    )
+    # Resume point after the last committed chunk: its (recorded_at, id) plus
+    # the fields the rules need from that point (see app.tasks.anti_cheat).
+    checkpoint: Mapped[dict[str, object] | None] = mapped_column(sa.JSON, nullable=True)
+    error_message: Mapped[str | None] = mapped_column(sa.Text, nullable=True)
+
+    updated_at: Mapped[dt.datetime] = mapped_column(
+        sa.DateTime(timezone=True), nullable=False, default=utcnow, onupdate=utcnow
+    )
+    started_at: Mapped[dt.datetime | None] = mapped_column(
+        sa.DateTime(timezone=True), nullable=True
+    )
+    finished_at: Mapped[dt.datetime | None] = mapped_column(
+        sa.DateTime(timezone=True), nullable=True
+    )
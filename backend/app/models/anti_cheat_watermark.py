@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import datetime as dt
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base, GUID, utcnow
+
+
+class AntiCheatWatermark(Base):
+    """Last point of a user's track whose `is_dirty` flag has been audited.
+
+    Holds the fields the anti-cheat rules read from a point's predecessor, so
+    points appended after it can be audited without re-reading older ones.
+    """
+
+    __tablename__ = "anti_cheat_watermarks"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        GUID(),
+        sa.ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    last_point_id: Mapped[int] = mapped_column(
+        sa.BigInteger().with_variant(sa.Integer, "sqlite"), nullable=False
+    )
+    last_recorded_at: Mapped[dt.datetime] = mapped_column(
+        sa.DateTime(timezone=True), nullable=False
+    )
+    last_latitude: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    last_longitude: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    last_accuracy: Mapped[float | None] = mapped_column(sa.Float, nullable=True)
+    last_altitude: Mapped[float | None] = mapped_column(sa.Float, nullable=True)
+
+    created_at: Mapped[dt.datetime] = mapped_column(
+        sa.DateTime(timezone=True), nullable=False, default=utcnow
+    )
+    updated_at: Mapped[dt.datetime] = mapped_column(
+        sa.DateTime(timezone=True), nullable=False, default=utcnow, onupdate=utcnow
+    )
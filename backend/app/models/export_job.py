@@ -41,6 +41,15 @@ class ExportJob(Base):
     error_code: Mapped[str | None] = mapped_column(sa.Text, nullable=True)
     error_message: Mapped[str | None] = mapped_column(sa.Text, nullable=True)
 
+    # Progress: updated after every streamed chunk.
+    rows_written: Mapped[int] = mapped_column(
+        sa.Integer, nullable=False, default=0, server_default=sa.text("0")
+    )
+    total_rows: Mapped[int | None] = mapped_column(sa.Integer, nullable=True)
+    # Resume point for a re-delivered task: last exported (recorded_at, id) plus
+    # byte offsets of the partial artifact (see app.tasks.export).
+    checkpoint: Mapped[dict[str, object] | None] = mapped_column(sa.JSON, nullable=True)
+
     created_at: Mapped[dt.datetime] = mapped_column(
         sa.DateTime(timezone=True), nullable=False, default=utcnow
     )
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import datetime as dt
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base, GUID, utcnow
+
+
+class StayDetectorState(Base):
+    """Open windows of a user's stay and trip detection, kept between recomputes.
+
+    The stay window starts at the anchor point and holds every later point
+    within the distance threshold of it, up to `last_recorded_at`. Its running
+    sums give the stay center, so appended points only extend or close the
+    window. The trip columns hold the movement since the last stay ended, up
+    to the anchor; they are null before the first stay and while the open
+    window is already a stay.
+    """
+
+    __tablename__ = "stay_detector_states"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        GUID(),
+        sa.ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    # The state is only resumed with the thresholds it was built with.
+    distance_threshold_m: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    time_threshold_s: Mapped[float] = mapped_column(sa.Float, nullable=False)
+
+    anchor_recorded_at: Mapped[dt.datetime] = mapped_column(
+        sa.DateTime(timezone=True), nullable=False
+    )
+    anchor_latitude: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    anchor_longitude: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    last_recorded_at: Mapped[dt.datetime] = mapped_column(
+        sa.DateTime(timezone=True), nullable=False
+    )
+    last_latitude: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    last_longitude: Mapped[float] = mapped_column(sa.Float, nullable=False)
+
+    point_count: Mapped[int] = mapped_column(sa.Integer, nullable=False)
+    latitude_sum: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    longitude_sum: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    gcj02_latitude_sum: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    gcj02_longitude_sum: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    gcj02_point_count: Mapped[int] = mapped_column(sa.Integer, nullable=False)
+
+    # AUTO_STAY row already inserted for the window while it is a stay but
+    # still open; replaced when the window grows, unless the user edited it.
+    open_event_id: Mapped[uuid.UUID | None] = mapped_column(GUID(), nullable=True)
+
+    trip_started_at: Mapped[dt.datetime | None] = mapped_column(
+        sa.DateTime(timezone=True), nullable=True
+    )
+    trip_last_recorded_at: Mapped[dt.datetime | None] = mapped_column(
+        sa.DateTime(timezone=True), nullable=True
+    )
+    trip_last_latitude: Mapped[float | None] = mapped_column(sa.Float, nullable=True)
+    trip_last_longitude: Mapped[float | None] = mapped_column(sa.Float, nullable=True)
+    trip_point_count: Mapped[int | None] = mapped_column(sa.Integer, nullable=True)
+    trip_distance_m: Mapped[float | None] = mapped_column(sa.Float, nullable=True)
+    # [[latitude, longitude], ...] kept so far, before simplification.
+    trip_vertices: Mapped[list[list[float]] | None] = mapped_column(
+        sa.JSON, nullable=True
+    )
+
+    created_at: Mapped[dt.datetime] = mapped_column(
+        sa.DateTime(timezone=True), nullable=False, default=utcnow
+    )
+    updated_at: Mapped[dt.datetime] = mapped_column(
+        sa.DateTime(timezone=True), nullable=False, default=utcnow, onupdate=utcnow
+    )
@@ -52,6 +52,19 @@ class TrackPoint(Base):
     is_dirty: Mapped[bool] = mapped_column(
         sa.Boolean, nullable=False, server_default=sa.false()
     )
+    # Bits of the anti-cheat rules that flagged the point (see
+    # app.services.anti_cheat_rules); 0 when clean.
+    dirty_reasons: Mapped[int] = mapped_column(
+        sa.Integer, nullable=False, default=0, server_default=sa.text("0")
+    )
+    # Hourly weather shared through `weather_cache`; many points reference one row.
+    weather_cache_id: Mapped[int | None] = mapped_column(
+        sa.Integer,
+        sa.ForeignKey("weather_cache.id", ondelete="SET NULL"),
+        nullable=True,
+        index=True,
+    )
+    # Legacy per-point copy; only kept for snapshots without a cache row.
     weather_snapshot: Mapped[dict[str, object] | None] = mapped_column(
         sa.JSON, nullable=True
     )
@@ -83,4 +96,21 @@ class TrackPoint(Base):
             name="uq_track_points_user_client_point_id",
         ),
         sa.Index("ix_track_points_user_recorded_at", "user_id", "recorded_at"),
+        # Weather cache warming scans recently ingested points.
+        sa.Index("ix_track_points_created_at", "created_at"),
+        # Flagged points only: per-rule triage reads a small slice of the table.
+        sa.Index(
+            "ix_track_points_user_dirty_recorded_at",
+            "user_id",
+            "recorded_at",
+            postgresql_where=sa.text("dirty_reasons <> 0"),
+            sqlite_where=sa.text("dirty_reasons <> 0"),
+        ),
+        # Same slice across all users, for triage without a user filter.
+        sa.Index(
+            "ix_track_points_dirty_recorded_at",
+            "recorded_at",
+            postgresql_where=sa.text("dirty_reasons <> 0"),
+            sqlite_where=sa.text("dirty_reasons <> 0"),
+        ),
     )
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import datetime as dt
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base, utcnow
+
+
+class WeatherWarmCursor(Base):
+    """Ingestion time (`TrackPoint.created_at`) weather warming has reached.
+
+    Scheduled warm runs start here and move it to their window end, so each
+    upload is scanned once and runs missed by the schedule are caught up.
+    """
+
+    __tablename__ = "weather_warm_cursors"
+
+    name: Mapped[str] = mapped_column(sa.String(64), primary_key=True)
+
+    warmed_until: Mapped[dt.datetime] = mapped_column(
+        sa.DateTime(timezone=True), nullable=False
+    )
+
+    created_at: Mapped[dt.datetime] = mapped_column(
+        sa.DateTime(timezone=True), nullable=False, default=utcnow
+    )
+    updated_at: Mapped[dt.datetime] = mapped_column(
+        sa.DateTime(timezone=True), nullable=False, default=utcnow, onupdate=utcnow
+    )
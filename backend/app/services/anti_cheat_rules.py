@@ -0,0 +1,370 @@
+"""Anti-cheat rules evaluated column-wise over a track segment.
+
+A `Segment` holds the per-pair quantities every rule needs (time delta,
+haversine distance, accuracy sum, steps, altitude delta, activity) computed in
+one pass over the points. Each rule is then a function of the segment and its
+thresholds that returns one flag per pair, so adding a rule costs one cheap
+comprehension over shared columns rather than another pass re-deriving them.
+
+A point is dirty when any enabled rule flags the pair ending at it; which
+rules did is kept as a bitmask of `Rule.bit` (`TrackPoint.dirty_reasons`). The
+default rule set reproduces the original hard rules exactly; `altitude_jump`
+and `activity_speed` are opt-in.
+
+Per-user overrides live in `User.settings["anti_cheat"]`::
+
+    {"teleport": {"max_speed_mps": 200}, "altitude_jump": {"enabled": true}}
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import math
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass, field
+from itertools import compress
+from typing import Any
+
+
+# Hard-rule thresholds (see plan-supplement Anti-Cheat section).
+MAX_STEP_RATE_STEPS_PER_SEC = 4.0
+MIN_STEP_LENGTH_M = 0.3
+MAX_STEP_LENGTH_M = 2.5
+
+# Conservative "teleportation" detection: only flag clearly impossible jumps.
+# We offset distance by reported GPS accuracy so we don't punish noisy points.
+TELEPORT_SPEED_MPS = 120.0  # ~432 km/h
+ACCURACY_FUDGE_M = 5.0
+
+EARTH_RADIUS_M = 6_371_000.0
+_DEG_TO_RAD = math.pi / 180.0  # what math.radians multiplies by
+
+# TrackPoint.activity_type codes (plan.md): 0=Unknown, 1=Still, 2=Walk,
+# 3=Run, 4=Vehicle.
+ACTIVITY_STILL = 1
+ACTIVITY_WALK = 2
+ACTIVITY_RUN = 3
+
+# (recorded_at, latitude, longitude, accuracy[, altitude]) of the point just
+# before a segment.
+Prev = tuple[Any, ...]
+
+
+@dataclass(frozen=True)
+class Segment:
+    """Per-pair columns for points[offset:], each paired with its predecessor."""
+
+    offset: int
+    dt_s: list[float]
+    dist_m: list[float]
+    accuracy_sum_m: list[float]
+    steps: list[int]
+    altitude_delta_m: list[float | None]
+    activity_type: list[int | None]
+
+    @property
+    def size(self) -> int:
+        return self.offset + len(self.dt_s)
+
+
+def build_segment(
+    recorded_at: Sequence[dt.datetime],
+    latitudes: Sequence[float],
+    longitudes: Sequence[float],
+    accuracies: Sequence[float | None],
+    step_deltas: Sequence[int | None],
+    *,
+    altitudes: Sequence[float | None] | None = None,
+    activity_types: Sequence[int | None] | None = None,
+    prev: Prev | None = None,
+) -> Segment:
+    """Derive the shared pair columns for consecutive points.
+
+    Distances use the same operands in the same order as the scalar haversine,
+    so rules compare bit-identical values; one latitude cosine is computed per
+    point rather than two per pair.
+    """
+
+    n = len(recorded_at)
+    if not (
+        len(latitudes) == len(longitudes) == len(accuracies) == len(step_deltas) == n
+    ):
+        raise ValueError("column lengths differ")
+    if altitudes is None:
+        altitudes = [None] * n
+    if activity_types is None:
+        activity_types = [None] * n
+    if len(altitudes) != n or len(activity_types) != n:
+        raise ValueError("column lengths differ")
+
+    if n == 0:
+        return Segment(0, [], [], [], [], [], [])
+
+    if prev is None:
+        # The first point has no pair to evaluate; it is the first predecessor.
+        offset = 1
+        prev = (
+            recorded_at[0],
+            latitudes[0],
+            longitudes[0],
+            accuracies[0],
+            altitudes[0],
+        )
+    else:
+        offset = 0
+        prev = (*prev[:4], prev[4] if len(prev) > 4 else None)
+
+    # Point columns of the pairs, and their predecessors: `prev` followed by
+    # every point but the last.
+    ts, p_ts = recorded_at[offset:], [prev[0], *recorded_at[offset : n - 1]]
+    lat, p_lat = latitudes[offset:], [prev[1], *latitudes[offset : n - 1]]
+    lon, p_lon = longitudes[offset:], [prev[2], *longitudes[offset : n - 1]]
+    acc = [float(a or 0.0) for a in accuracies[offset:]]
+    p_acc = [float(prev[3] or 0.0), *acc[:-1]]
+    alt, p_alt = altitudes[offset:], [prev[4], *altitudes[offset : n - 1]]
+
+    sin, cos, asin, sqrt = math.sin, math.cos, math.asin, math.sqrt
+    rad = _DEG_TO_RAD
+    two_r = 2.0 * EARTH_RADIUS_M
+    # One latitude cosine per point; the predecessor's is the previous one.
+    cos_lat = [cos(x * rad) for x in lat]
+    p_cos = [cos(prev[1] * rad), *cos_lat[:-1]]
+
+    return Segment(
+        offset=offset,
+        dt_s=[(b - a).total_seconds() for a, b in zip(p_ts, ts)],
+        dist_m=[
+            two_r
+            * asin(
+                sqrt(
+                    sin((b - a) * rad / 2.0) ** 2
+                    + pc * c * sin((d - e) * rad / 2.0) ** 2
+                )
+            )
+            for a, b, e, d, pc, c in zip(p_lat, lat, p_lon, lon, p_cos, cos_lat)
+        ],
+        accuracy_sum_m=[a + b for a, b in zip(p_acc, acc)],
+        steps=[int(s or 0) for s in step_deltas[offset:]],
+        altitude_delta_m=[
+            None if a is None or b is None else b - a for a, b in zip(p_alt, alt)
+        ],
+        activity_type=list(activity_types[offset:]),
+    )
+
+
+# Rules. Each returns one flag per pair of the segment.
+
+RuleFunc = Callable[[Segment, Mapping[str, float]], list[bool]]
+
+
+def _time_order(seg: Segment, p: Mapping[str, float]) -> list[bool]:
+    # Same timestamp (or out-of-order): any positive steps or real movement
+    # is impossible.
+    fudge = p["accuracy_fudge_m"]
+    return [
+        t <= 0 and (s > 0 or d - (a + fudge) > 0.0)
+        for t, s, d, a in zip(seg.dt_s, seg.steps, seg.dist_m, seg.accuracy_sum_m)
+    ]
+
+
+def _step_rate(seg: Segment, p: Mapping[str, float]) -> list[bool]:
+    max_rate = p["max_steps_per_s"]
+    return [t > 0 and s > 0 and s / t > max_rate for t, s in zip(seg.dt_s, seg.steps)]
+
+
+def _step_length(seg: Segment, p: Mapping[str, float]) -> list[bool]:
+    lo, hi = p["min_m"], p["max_m"]
+    return [
+        t > 0 and s > 0 and (d / s < lo or d / s > hi)
+        for t, s, d in zip(seg.dt_s, seg.steps, seg.dist_m)
+    ]
+
+
+def _teleport(seg: Segment, p: Mapping[str, float]) -> list[bool]:
+    max_speed, fudge = p["max_speed_mps"], p["accuracy_fudge_m"]
+    return [
+        t > 0 and max(0.0, d - (a + fudge)) / t > max_speed
+        for t, d, a in zip(seg.dt_s, seg.dist_m, seg.accuracy_sum_m)
+    ]
+
+
+def _altitude_jump(seg: Segment, p: Mapping[str, float]) -> list[bool]:
+    max_rate = p["max_vertical_mps"]
+    return [
+        t > 0 and h is not None and abs(h) / t > max_rate
+        for t, h in zip(seg.dt_s, seg.altitude_delta_m)
+    ]
+
+
+def _activity_speed(seg: Segment, p: Mapping[str, float]) -> list[bool]:
+    # Speed implausible for the activity the device reported at the point.
+    limits = {
+        ACTIVITY_STILL: p["still_max_mps"],
+        ACTIVITY_WALK: p["walk_max_mps"],
+        ACTIVITY_RUN: p["run_max_mps"],
+    }
+    fudge = p["accuracy_fudge_m"]
+    out = [False] * len(seg.dt_s)
+    for i, (t, d, a, act) in enumerate(
+        zip(seg.dt_s, seg.dist_m, seg.accuracy_sum_m, seg.activity_type)
+    ):
+        limit = limits.get(act) if act is not None else None
+        if limit is not None and t > 0:
+            out[i] = max(0.0, d - (a + fudge)) / t > limit
+    return out
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    # Bit in `TrackPoint.dirty_reasons`; stored in the database, so never reused.
+    bit: int
+    func: RuleFunc
+    defaults: Mapping[str, float]
+    enabled: bool = True
+    # Whether the PostgreSQL engine (app.tasks.anti_cheat) implements it.
+    sql: bool = False
+
+
+RULES: dict[str, Rule] = {
+    rule.name: rule
+    for rule in (
+        Rule(
+            "time_order",
+            1 << 0,
+            _time_order,
+            {"accuracy_fudge_m": ACCURACY_FUDGE_M},
+            sql=True,
+        ),
+        Rule(
+            "step_rate",
+            1 << 1,
+            _step_rate,
+            {"max_steps_per_s": MAX_STEP_RATE_STEPS_PER_SEC},
+            sql=True,
+        ),
+        Rule(
+            "step_length",
+            1 << 2,
+            _step_length,
+            {"min_m": MIN_STEP_LENGTH_M, "max_m": MAX_STEP_LENGTH_M},
+            sql=True,
+        ),
+        Rule(
+            "teleport",
+            1 << 3,
+            _teleport,
+            {"max_speed_mps": TELEPORT_SPEED_MPS, "accuracy_fudge_m": ACCURACY_FUDGE_M},
+            sql=True,
+        ),
+        Rule(
+            "altitude_jump",
+            1 << 4,
+            _altitude_jump,
+            {"max_vertical_mps": 20.0},
+            enabled=False,
+        ),
+        Rule(
+            "activity_speed",
+            1 << 5,
+            _activity_speed,
+            {
+                "still_max_mps": 3.0,
+                "walk_max_mps": 4.0,
+                "run_max_mps": 12.0,
+                "accuracy_fudge_m": ACCURACY_FUDGE_M,
+            },
+            enabled=False,
+        ),
+    )
+}
+
+
+@dataclass(frozen=True)
+class RuleResult:
+    flags: list[bool]
+    # Per point: OR of the bits of the rules that flagged it (0 when clean).
+    reasons: list[int] = field(default_factory=list)
+    # Points flagged by each evaluated rule; a point may count for several.
+    counts: dict[str, int] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """Enabled rules with their effective thresholds, in registry order."""
+
+    rules: tuple[tuple[str, Mapping[str, float]], ...]
+
+    @classmethod
+    def default(cls) -> RuleSet:
+        return _DEFAULT
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any] | None) -> RuleSet:
+        """Apply overrides of the form {rule: {"enabled": bool, param: number}}.
+
+        Unknown rules, unknown parameters and non-numeric values are ignored,
+        so a stale setting never blocks ingestion.
+        """
+
+        if not config:
+            return _DEFAULT
+        rules: list[tuple[str, Mapping[str, float]]] = []
+        for rule in RULES.values():
+            override = config.get(rule.name)
+            if not isinstance(override, Mapping):
+                override = {}
+            enabled = override.get("enabled", rule.enabled)
+            if not (enabled if isinstance(enabled, bool) else rule.enabled):
+                continue
+            params = dict(rule.defaults)
+            for key, value in override.items():
+                numeric = isinstance(value, (int, float)) and not isinstance(
+                    value, bool
+                )
+                if key in params and numeric:
+                    params[key] = float(value)
+            rules.append((rule.name, params))
+        return cls(tuple(rules))
+
+    @classmethod
+    def for_user_settings(cls, settings: Mapping[str, Any] | None) -> RuleSet:
+        raw = settings.get("anti_cheat") if isinstance(settings, Mapping) else None
+        return cls.from_config(raw if isinstance(raw, Mapping) else None)
+
+    @property
+    def names(self) -> tuple[str, ...]:
+        return tuple(name for name, _ in self.rules)
+
+    @property
+    def sql_compatible(self) -> bool:
+        return all(RULES[name].sql for name in self.names)
+
+    def params(self, name: str) -> Mapping[str, float] | None:
+        """Thresholds of `name`, or None when the rule is disabled."""
+
+        for rule_name, params in self.rules:
+            if rule_name == name:
+                return params
+        return None
+
+    def evaluate(self, seg: Segment) -> RuleResult:
+        reasons = [0] * seg.size
+        counts: dict[str, int] = {}
+        offsets = range(seg.offset, seg.size)
+        for name, params in self.rules:
+            bit = RULES[name].bit
+            flagged = 0
+            # Only flagged points are touched; most tracks are mostly clean.
+            for i in compress(offsets, RULES[name].func(seg, params)):
+                reasons[i] |= bit
+                flagged += 1
+            counts[name] = flagged
+        return RuleResult(
+            flags=[m != 0 for m in reasons], reasons=reasons, counts=counts
+        )
+
+
+_DEFAULT = RuleSet(
+    tuple((r.name, dict(r.defaults)) for r in RULES.values() if r.enabled)
+)
@@ -3,13 +3,15 @@ from __future__ import annotations
 import datetime as dt
 import math
 import uuid
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.base import utcnow
 from app.models.life_event import LifeEvent
+from app.models.stay_detector_state import StayDetectorState
 from app.models.track_edit import TrackEdit
 from app.models.track_point import TrackPoint
 
@@ -17,6 +19,9 @@ from app.models.track_point import TrackPoint
 DEFAULT_DISTANCE_THRESHOLD_M = 200.0
 DEFAULT_TIME_THRESHOLD_S = 5.0 * 60.0
 
+_EARTH_RADIUS_M = 6_371_000.0
+_M_PER_DEG_LAT = _EARTH_RADIUS_M * math.pi / 180.0
+
 
 def _normalize_to_utc(value: dt.datetime) -> dt.datetime:
     # Store tz-aware UTC timestamps everywhere.
@@ -27,7 +32,7 @@ def _normalize_to_utc(value: dt.datetime) -> dt.datetime:
 
 def _haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     # Simple spherical distance; deterministic and sufficient for stay detection.
-    r = 6_371_000.0
+    r = _EARTH_RADIUS_M
     phi1 = math.radians(lat1)
     phi2 = math.radians(lat2)
     dphi = math.radians(lat2 - lat1)
@@ -51,18 +56,408 @@ class StayCandidate:
     point_count: int
 
 
-def _make_auto_stay_id(
-    *, user_id: uuid.UUID, start_at: dt.datetime, end_at: dt.datetime
+@dataclass
+class StayWindow:
+    """An anchor point plus the later points within the distance threshold.
+
+    Keeps running sums instead of the points, so a window can be persisted
+    and extended by appended points without re-reading the ones it holds.
+    """
+
+    anchor_at: dt.datetime
+    anchor_latitude: float
+    anchor_longitude: float
+    last_at: dt.datetime
+    last_latitude: float
+    last_longitude: float
+    point_count: int = 0
+    latitude_sum: float = 0.0
+    longitude_sum: float = 0.0
+    gcj02_latitude_sum: float = 0.0
+    gcj02_longitude_sum: float = 0.0
+    gcj02_point_count: int = 0
+
+    @classmethod
+    def over(cls, points: list[TrackPoint]) -> StayWindow:
+        """Window of points[0] holding all of `points` (assumed within range)."""
+
+        anchor = points[0]
+        lat_sum = lon_sum = gcj_lat_sum = gcj_lon_sum = 0.0
+        gcj_count = 0
+        for p in points:
+            lat_sum += float(p.latitude)
+            lon_sum += float(p.longitude)
+            if p.gcj02_latitude is not None and p.gcj02_longitude is not None:
+                gcj_lat_sum += float(p.gcj02_latitude)
+                gcj_lon_sum += float(p.gcj02_longitude)
+                gcj_count += 1
+        return cls(
+            anchor_at=anchor.recorded_at,
+            anchor_latitude=anchor.latitude,
+            anchor_longitude=anchor.longitude,
+            last_at=points[-1].recorded_at,
+            last_latitude=points[-1].latitude,
+            last_longitude=points[-1].longitude,
+            point_count=len(points),
+            latitude_sum=lat_sum,
+            longitude_sum=lon_sum,
+            gcj02_latitude_sum=gcj_lat_sum,
+            gcj02_longitude_sum=gcj_lon_sum,
+            gcj02_point_count=gcj_count,
+        )
+
+    def add(self, p: TrackPoint) -> None:
+        self.point_count += 1
+        self.latitude_sum += float(p.latitude)
+        self.longitude_sum += float(p.longitude)
+        if p.gcj02_latitude is not None and p.gcj02_longitude is not None:
+            self.gcj02_latitude_sum += float(p.gcj02_latitude)
+            self.gcj02_longitude_sum += float(p.gcj02_longitude)
+            self.gcj02_point_count += 1
+        self.last_at = p.recorded_at
+        self.last_latitude = p.latitude
+        self.last_longitude = p.longitude
+
+    def extend(self, points: list[TrackPoint], *, distance_threshold_m: float) -> int:
+        """Add points while they stay within the threshold of the anchor.
+
+        Returns the index of the first point that does not (len(points) if none).
+        """
+
+        for k, p in enumerate(points):
+            d = _haversine_m(
+                self.anchor_latitude, self.anchor_longitude, p.latitude, p.longitude
+            )
+            if d > distance_threshold_m:
+                return k
+            self.add(p)
+        return len(points)
+
+    def is_stay(self, *, time_threshold_s: float) -> bool:
+        duration_s = (self.last_at - self.anchor_at).total_seconds()
+        return duration_s >= time_threshold_s and self.point_count >= 2
+
+    def candidate(self) -> StayCandidate:
+        n = float(self.point_count)
+        gcj_n = float(self.gcj02_point_count)
+        return StayCandidate(
+            start_at=self.anchor_at,
+            end_at=self.last_at,
+            latitude=self.latitude_sum / n,
+            longitude=self.longitude_sum / n,
+            gcj02_latitude=(self.gcj02_latitude_sum / gcj_n) if gcj_n else None,
+            gcj02_longitude=(self.gcj02_longitude_sum / gcj_n) if gcj_n else None,
+            point_count=self.point_count,
+        )
+
+
+# Trips: the movement between two stays, from the last point of one to the
+# anchor of the next. Kept vertices are at least this far apart; the polyline
+# is then simplified to within this tolerance (Douglas-Peucker).
+_TRIP_VERTEX_SPACING_M = 10.0
+_TRIP_SIMPLIFY_TOLERANCE_M = 15.0
+# Long trips are simplified to half this many vertices whenever they reach it
+# (doubling the tolerance as needed), so the detector state stays bounded.
+_TRIP_MAX_VERTICES = 1_000
+
+
+@dataclass(frozen=True)
+class TripCandidate:
+    start_at: dt.datetime
+    end_at: dt.datetime
+    distance_m: float
+    point_count: int
+    # (latitude, longitude) vertices, first and last point included.
+    polyline: tuple[tuple[float, float], ...]
+
+    @property
+    def duration_s(self) -> float:
+        return (self.end_at - self.start_at).total_seconds()
+
+    @property
+    def avg_speed_mps(self) -> float:
+        duration_s = self.duration_s
+        return self.distance_m / duration_s if duration_s > 0 else 0.0
+
+
+@dataclass
+class TripWindow:
+    """Movement since the last stay ended, up to the current stay anchor.
+
+    Like `StayWindow`, it holds running totals (and thinned vertices) rather
+    than the points, so it can be persisted between recomputes.
+    """
+
+    start_at: dt.datetime
+    last_at: dt.datetime
+    last_latitude: float
+    last_longitude: float
+    point_count: int = 1
+    distance_m: float = 0.0
+    vertices: list[tuple[float, float]] = field(default_factory=list)
+
+    @classmethod
+    def start(cls, at: dt.datetime, lat: float, lon: float) -> TripWindow:
+        return cls(
+            start_at=at,
+            last_at=at,
+            last_latitude=lat,
+            last_longitude=lon,
+            vertices=[(lat, lon)],
+        )
+
+    def add(self, at: dt.datetime, lat: float, lon: float) -> None:
+        self.distance_m += _haversine_m(
+            self.last_latitude, self.last_longitude, lat, lon
+        )
+        self.point_count += 1
+        self.last_at, self.last_latitude, self.last_longitude = at, lat, lon
+        v_lat, v_lon = self.vertices[-1]
+        if _haversine_m(v_lat, v_lon, lat, lon) >= _TRIP_VERTEX_SPACING_M:
+            self.vertices.append((lat, lon))
+            if len(self.vertices) >= _TRIP_MAX_VERTICES:
+                tolerance_m = _TRIP_SIMPLIFY_TOLERANCE_M
+                while len(self.vertices) > _TRIP_MAX_VERTICES // 2:
+                    self.vertices = _simplify_polyline(
+                        self.vertices, tolerance_m=tolerance_m
+                    )
+                    tolerance_m *= 2.0
+
+    def close(self, at: dt.datetime, lat: float, lon: float) -> TripCandidate:
+        """The trip ending at (the anchor of) the next stay."""
+
+        self.add(at, lat, lon)
+        vertices = list(self.vertices)
+        if vertices[-1] != (lat, lon):
+            vertices.append((lat, lon))
+        return TripCandidate(
+            start_at=self.start_at,
+            end_at=at,
+            distance_m=self.distance_m,
+            point_count=self.point_count,
+            polyline=tuple(
+                _simplify_polyline(vertices, tolerance_m=_TRIP_SIMPLIFY_TOLERANCE_M)
+            ),
+        )
+
+
+def _simplify_polyline(
+    vertices: list[tuple[float, float]], *, tolerance_m: float
+) -> list[tuple[float, float]]:
+    # Douglas-Peucker on a local equirectangular projection (metres).
+    n = len(vertices)
+    if n <= 2:
+        return list(vertices)
+    lat0, lon0 = vertices[0]
+    kx = _M_PER_DEG_LAT * math.cos(math.radians(lat0))
+    xy = [
+        (((lon - lon0 + 540.0) % 360.0 - 180.0) * kx, (lat - lat0) * _M_PER_DEG_LAT)
+        for lat, lon in vertices
+    ]
+
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        ax, ay = xy[a]
+        dx, dy = xy[b][0] - ax, xy[b][1] - ay
+        seg2 = dx * dx + dy * dy
+        far, far_d = -1, tolerance_m
+        for k in range(a + 1, b):
+            px, py = xy[k][0] - ax, xy[k][1] - ay
+            t = min(1.0, max(0.0, (px * dx + py * dy) / seg2)) if seg2 > 0 else 0.0
+            d = math.hypot(px - t * dx, py - t * dy)
+            if d > far_d:
+                far, far_d = k, d
+        if far >= 0:
+            keep[far] = True
+            stack.append((a, far))
+            stack.append((far, b))
+    return [v for v, kept in zip(vertices, keep) if kept]
+
+
+def _make_auto_event_id(
+    *,
+    user_id: uuid.UUID,
+    event_type: str,
+    start_at: dt.datetime,
+    end_at: dt.datetime,
 ) -> uuid.UUID:
     # Deterministic id so recompute does not spam duplicates.
     # Note: if user manually edits start/end via CRUD, future recomputes may insert
     # a new auto record (MVP trade-off; see notepad).
     start_at = _normalize_to_utc(start_at)
     end_at = _normalize_to_utc(end_at)
-    name = f"{user_id}|STAY|{start_at.isoformat()}|{end_at.isoformat()}"
+    name = f"{user_id}|{event_type}|{start_at.isoformat()}|{end_at.isoformat()}"
     return uuid.uuid5(uuid.NAMESPACE_URL, name)
 
 
+# Stay detection.
+#
+# Consecutive points in the same grid cell are grouped into short runs with a
+# bounding box. While extending a window from its anchor, a run whose box lies
+# provably within the distance threshold is accepted as a whole; only runs
+# straddling the threshold are checked point by point, with the same haversine
+# as `_haversine_m`, so windows (and stays) are identical to checking every
+# point. Slow movement, the old worst case, now costs a handful of box checks
+# per anchor instead of a distance per point.
+
+_RUN_MAX_POINTS = 16
+
+
+def _point_runs(
+    lats: list[float], lons: list[float], *, cell_m: float
+) -> tuple[list[int], list[tuple[int, float, float, float, float]]]:
+    """Group points into runs; returns (run index per point, run boxes).
+
+    A run box is (end index, min lat, max lat, min lon, max lon).
+    """
+
+    n = len(lats)
+    cell_lat = max(cell_m, 1.0) / _M_PER_DEG_LAT
+    cell_lon = cell_lat / max(math.cos(math.radians(lats[0])), 0.01)
+
+    run_of = [0] * n
+    runs: list[tuple[int, float, float, float, float]] = []
+    start = 0
+    cell = (math.floor(lats[0] / cell_lat), math.floor(lons[0] / cell_lon))
+    for k in range(1, n + 1):
+        if k < n:
+            next_cell = (math.floor(lats[k] / cell_lat), math.floor(lons[k] / cell_lon))
+            if next_cell == cell and k - start < _RUN_MAX_POINTS:
+                continue
+        else:
+            next_cell = cell
+        run_lats, run_lons = lats[start:k], lons[start:k]
+        runs.append((k, min(run_lats), max(run_lats), min(run_lons), max(run_lons)))
+        for m in range(start, k):
+            run_of[m] = len(runs) - 1
+        start, cell = k, next_cell
+    return run_of, runs
+
+
+def _scan_segments(
+    points_sorted: list[TrackPoint],
+    *,
+    distance_threshold_m: float,
+    time_threshold_s: float,
+    trip: TripWindow | None = None,
+) -> tuple[list[StayCandidate], list[TripCandidate], StayWindow, TripWindow | None]:
+    """Closed stays and trips of non-empty ordered points, plus open windows.
+
+    The open stay window is the first one that reaches the last point. Every
+    stay before it was closed by a point beyond the threshold, so later points
+    cannot change them; the open window may still grow. No later anchor can
+    produce a stay either: its window ends no later and starts later.
+
+    Anchors that do not start a stay are movement: they are added to `trip`,
+    the one in progress since the previous stay (None before the first stay),
+    and the next stay closes it.
+    """
+
+    n = len(points_sorted)
+    lats = [p.latitude for p in points_sorted]
+    lons = [p.longitude for p in points_sorted]
+    cos_lats = [math.cos(math.radians(lat)) for lat in lats]
+    thr = distance_threshold_m
+    # Box bounds are rounded like any float; keep them clear of the threshold.
+    safe_thr = thr - 1e-9 * abs(thr) - 1e-6
+    run_of, runs = _point_runs(lats, lons, cell_m=thr / 2.0)
+
+    sin, cos, asin, sqrt, radians = (
+        math.sin,
+        math.cos,
+        math.asin,
+        math.sqrt,
+        math.radians,
+    )
+    two_r = 2.0 * _EARTH_RADIUS_M
+
+    def _run_within(a_lat: float, a_lon: float, a_cos: float, r: int) -> bool:
+        # Upper bound of the haversine from the anchor to any point in the box.
+        _, lo_lat, hi_lat, lo_lon, hi_lon = runs[r]
+        dphi = max(abs(hi_lat - a_lat), abs(lo_lat - a_lat))
+        dlambda = max(abs(hi_lon - a_lon), abs(lo_lon - a_lon))
+        if dlambda >= 180.0:
+            return False
+        if lo_lat <= 0.0 <= hi_lat:
+            cos_max = 1.0
+        else:
+            cos_max = cos(radians(min(abs(lo_lat), abs(hi_lat))))
+        a = (
+            sin(radians(dphi) / 2.0) ** 2
+            + a_cos * cos_max * sin(radians(dlambda) / 2.0) ** 2
+        )
+        return two_r * asin(sqrt(min(a, 1.0))) <= safe_thr
+
+    def _window_end(i: int) -> int:
+        # First index after i farther than thr from point i (n if none).
+        a_lat, a_lon, a_cos = lats[i], lons[i], cos_lats[i]
+        k = i + 1
+        while k < n:
+            r = run_of[k]
+            end = runs[r][0]
+            if _run_within(a_lat, a_lon, a_cos, r):
+                k = end
+                continue
+            while k < end:
+                # Same expression as _haversine_m(anchor, point).
+                a = (
+                    sin(radians(lats[k] - a_lat) / 2.0) ** 2
+                    + a_cos * cos_lats[k] * sin(radians(lons[k] - a_lon) / 2.0) ** 2
+                )
+                if two_r * asin(sqrt(a)) > thr:
+                    return k
+                k += 1
+        return n
+
+    stays: list[StayCandidate] = []
+    trips: list[TripCandidate] = []
+    i = 0
+    while True:
+        j = _window_end(i)
+        if j == n:
+            return stays, trips, StayWindow.over(points_sorted[i:]), trip
+
+        # Candidate window is points[i:j]. If j == i+1 (single point), duration is 0.
+        duration_s = (
+            points_sorted[j - 1].recorded_at - points_sorted[i].recorded_at
+        ).total_seconds()
+        if duration_s >= time_threshold_s and j - i >= 2:
+            if trip is not None:
+                trips.append(trip.close(points_sorted[i].recorded_at, lats[i], lons[i]))
+            stays.append(StayWindow.over(points_sorted[i:j]).candidate())
+            last = points_sorted[j - 1]
+            trip = TripWindow.start(last.recorded_at, lats[j - 1], lons[j - 1])
+            i = j
+            continue
+
+        # No valid stay: advance by one point (stable).
+        if trip is not None:
+            trip.add(points_sorted[i].recorded_at, lats[i], lons[i])
+        i += 1
+
+
+def _close_trip_at_open_stay(
+    window: StayWindow,
+    trip: TripWindow | None,
+    trips: list[TripCandidate],
+    *,
+    time_threshold_s: float,
+) -> TripWindow | None:
+    # An open window that is already a stay stays one (and keeps its anchor)
+    # however it grows, so the trip leading to it is final.
+    if trip is not None and window.is_stay(time_threshold_s=time_threshold_s):
+        trips.append(
+            trip.close(
+                window.anchor_at, window.anchor_latitude, window.anchor_longitude
+            )
+        )
+        return None
+    return trip
+
+
 def detect_stay_candidates(
     points: list[TrackPoint],
     *,
@@ -77,66 +472,42 @@ def detect_stay_candidates(
     - if duration >= time_threshold => emit one STAY event
     """
 
-    if not points:
-        return []
+    stays, _ = detect_life_segments(
+        points,
+        distance_threshold_m=distance_threshold_m,
+        time_threshold_s=time_threshold_s,
+    )
+    return stays
 
-    points_sorted = sorted(points, key=lambda p: p.recorded_at)
 
-    stays: list[StayCandidate] = []
-    i = 0
-    n = len(points_sorted)
-    while i < n:
-        anchor = points_sorted[i]
-        j = i + 1
-        # Greedily extend while points remain near the anchor.
-        while j < n:
-            p = points_sorted[j]
-            d = _haversine_m(anchor.latitude, anchor.longitude, p.latitude, p.longitude)
-            if d > distance_threshold_m:
-                break
-            j += 1
+def detect_life_segments(
+    points: list[TrackPoint],
+    *,
+    distance_threshold_m: float = DEFAULT_DISTANCE_THRESHOLD_M,
+    time_threshold_s: float = DEFAULT_TIME_THRESHOLD_S,
+) -> tuple[list[StayCandidate], list[TripCandidate]]:
+    """Detect stays (see `detect_stay_candidates`) and the trips between them.
 
-        # Candidate window is points[i:j]. If j == i+1 (single point), duration is 0.
-        last = points_sorted[j - 1]
-        duration_s = (last.recorded_at - anchor.recorded_at).total_seconds()
-        if duration_s >= time_threshold_s and j - i >= 2:
-            lat_sum = 0.0
-            lon_sum = 0.0
-            gcj_lat_sum = 0.0
-            gcj_lon_sum = 0.0
-            gcj_count = 0
-            for k in range(i, j):
-                pk = points_sorted[k]
-                lat_sum += float(pk.latitude)
-                lon_sum += float(pk.longitude)
-                if pk.gcj02_latitude is not None and pk.gcj02_longitude is not None:
-                    gcj_lat_sum += float(pk.gcj02_latitude)
-                    gcj_lon_sum += float(pk.gcj02_longitude)
-                    gcj_count += 1
-
-            center_lat = lat_sum / float(j - i)
-            center_lon = lon_sum / float(j - i)
-            center_gcj_lat = (gcj_lat_sum / float(gcj_count)) if gcj_count else None
-            center_gcj_lon = (gcj_lon_sum / float(gcj_count)) if gcj_count else None
-
-            stays.append(
-                StayCandidate(
-                    start_at=anchor.recorded_at,
-                    end_at=last.recorded_at,
-                    latitude=center_lat,
-                    longitude=center_lon,
-                    gcj02_latitude=center_gcj_lat,
-                    gcj02_longitude=center_gcj_lon,
-                    point_count=(j - i),
-                )
-            )
-            i = j
-            continue
+    Same single pass: a trip runs from a stay's last point to the next stay's
+    anchor, through the points that did not start a stay.
+    """
 
-        # No valid stay: advance by one point (stable).
-        i += 1
+    if not points:
+        return [], []
 
-    return stays
+    # Callers pass points ordered by recorded_at; only sort (stably) if not.
+    ordered = all(a.recorded_at <= b.recorded_at for a, b in zip(points, points[1:]))
+    points_sorted = points if ordered else sorted(points, key=lambda p: p.recorded_at)
+
+    stays, trips, window, trip = _scan_segments(
+        points_sorted,
+        distance_threshold_m=distance_threshold_m,
+        time_threshold_s=time_threshold_s,
+    )
+    _close_trip_at_open_stay(window, trip, trips, time_threshold_s=time_threshold_s)
+    if window.is_stay(time_threshold_s=time_threshold_s):
+        stays.append(window.candidate())
+    return stays, trips
 
 
 async def load_track_points_for_window(
@@ -145,6 +516,7 @@ async def load_track_points_for_window(
     user_id: uuid.UUID,
     start_at: dt.datetime,
     end_at: dt.datetime,
+    start_exclusive: bool = False,
 ) -> list[TrackPoint]:
     start_utc = _normalize_to_utc(start_at)
     end_utc = _normalize_to_utc(end_at)
@@ -167,7 +539,11 @@ async def load_track_points_for_window(
         sa.select(TrackPoint)
         .where(
             TrackPoint.user_id == user_id,
-            TrackPoint.recorded_at >= start_utc,
+            (
+                TrackPoint.recorded_at > start_utc
+                if start_exclusive
+                else TrackPoint.recorded_at >= start_utc
+            ),
             TrackPoint.recorded_at <= end_utc,
             ~sa.exists(edit_match),
         )
@@ -177,6 +553,184 @@ async def load_track_points_for_window(
     return list((await session.execute(stmt)).scalars().all())
 
 
+def _windows_from_state(
+    state: StayDetectorState,
+) -> tuple[StayWindow, TripWindow | None]:
+    window = StayWindow(
+        anchor_at=state.anchor_recorded_at,
+        anchor_latitude=state.anchor_latitude,
+        anchor_longitude=state.anchor_longitude,
+        last_at=state.last_recorded_at,
+        last_latitude=state.last_latitude,
+        last_longitude=state.last_longitude,
+        point_count=state.point_count,
+        latitude_sum=state.latitude_sum,
+        longitude_sum=state.longitude_sum,
+        gcj02_latitude_sum=state.gcj02_latitude_sum,
+        gcj02_longitude_sum=state.gcj02_longitude_sum,
+        gcj02_point_count=state.gcj02_point_count,
+    )
+    trip = None
+    if state.trip_started_at is not None:
+        trip = TripWindow(
+            start_at=state.trip_started_at,
+            last_at=state.trip_last_recorded_at,
+            last_latitude=state.trip_last_latitude,
+            last_longitude=state.trip_last_longitude,
+            point_count=state.trip_point_count,
+            distance_m=state.trip_distance_m,
+            vertices=[(lat, lon) for lat, lon in state.trip_vertices],
+        )
+    return window, trip
+
+
+async def _save_stay_state(
+    session: AsyncSession,
+    *,
+    user_id: uuid.UUID,
+    state: StayDetectorState | None,
+    window: StayWindow,
+    trip: TripWindow | None,
+    open_event_id: uuid.UUID | None,
+    distance_threshold_m: float,
+    time_threshold_s: float,
+) -> None:
+    if state is None:
+        state = StayDetectorState(user_id=user_id)
+        session.add(state)
+    state.distance_threshold_m = distance_threshold_m
+    state.time_threshold_s = time_threshold_s
+    state.anchor_recorded_at = _normalize_to_utc(window.anchor_at)
+    state.anchor_latitude = float(window.anchor_latitude)
+    state.anchor_longitude = float(window.anchor_longitude)
+    state.last_recorded_at = _normalize_to_utc(window.last_at)
+    state.last_latitude = float(window.last_latitude)
+    state.last_longitude = float(window.last_longitude)
+    state.point_count = window.point_count
+    state.latitude_sum = window.latitude_sum
+    state.longitude_sum = window.longitude_sum
+    state.gcj02_latitude_sum = window.gcj02_latitude_sum
+    state.gcj02_longitude_sum = window.gcj02_longitude_sum
+    state.gcj02_point_count = window.gcj02_point_count
+    state.open_event_id = open_event_id
+    state.trip_started_at = _normalize_to_utc(trip.start_at) if trip else None
+    state.trip_last_recorded_at = _normalize_to_utc(trip.last_at) if trip else None
+    state.trip_last_latitude = float(trip.last_latitude) if trip else None
+    state.trip_last_longitude = float(trip.last_longitude) if trip else None
+    state.trip_point_count = trip.point_count if trip else None
+    state.trip_distance_m = trip.distance_m if trip else None
+    state.trip_vertices = [list(v) for v in trip.vertices] if trip else None
+    try:
+        await session.commit()
+    except IntegrityError:
+        # A concurrent recompute created the row first; its state stands.
+        await session.rollback()
+
+
+async def _detect_segments_since_state(
+    *,
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    state: StayDetectorState,
+    end_at: dt.datetime,
+    distance_threshold_m: float,
+    time_threshold_s: float,
+) -> (
+    tuple[list[StayCandidate], list[TripCandidate], StayWindow, TripWindow | None]
+    | None
+):
+    """Extend the persisted open windows with points appended after them.
+
+    Returns None when no points were appended.
+    """
+
+    new_points = await load_track_points_for_window(
+        session=session,
+        user_id=user_id,
+        start_at=state.last_recorded_at,
+        end_at=end_at,
+        start_exclusive=True,
+    )
+    if not new_points:
+        return None
+
+    window, trip = _windows_from_state(state)
+    k = window.extend(new_points, distance_threshold_m=distance_threshold_m)
+    if k == len(new_points):
+        return [], [], window, trip
+
+    stays: list[StayCandidate] = []
+    trips: list[TripCandidate] = []
+    if window.is_stay(time_threshold_s=time_threshold_s):
+        # Closed by new_points[k], which anchors the next window.
+        trip = _close_trip_at_open_stay(
+            window, trip, trips, time_threshold_s=time_threshold_s
+        )
+        stays.append(window.candidate())
+        trip = TripWindow.start(
+            window.last_at, window.last_latitude, window.last_longitude
+        )
+        rest = new_points[k:]
+    else:
+        # Too short for a stay: the anchor is movement and the next anchor is
+        # the point after it. Only the window's older points are re-read, less
+        # than time_threshold_s of track.
+        if trip is not None:
+            trip.add(window.anchor_at, window.anchor_latitude, window.anchor_longitude)
+        older = await load_track_points_for_window(
+            session=session,
+            user_id=user_id,
+            start_at=state.anchor_recorded_at,
+            end_at=state.last_recorded_at,
+            start_exclusive=True,
+        )
+        rest = older + new_points
+
+    closed_stays, closed_trips, window, trip = _scan_segments(
+        rest,
+        distance_threshold_m=distance_threshold_m,
+        time_threshold_s=time_threshold_s,
+        trip=trip,
+    )
+    stays.extend(closed_stays)
+    trips.extend(closed_trips)
+    return stays, trips, window, trip
+
+
+async def _insert_auto_events(
+    session: AsyncSession, rows: list[dict[str, object]]
+) -> int:
+    dialect = session.bind.dialect.name if session.bind is not None else ""
+    inserted = 0
+    if dialect in {"sqlite", "postgresql"}:
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as _insert
+
+            stmt = _insert(LifeEvent.__table__).values(rows).prefix_with("OR IGNORE")
+        else:
+            from sqlalchemy.dialects.postgresql import insert as _insert
+
+            stmt = (
+                _insert(LifeEvent.__table__)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=["id"])
+            )
+        result = await session.execute(stmt)
+        # SQLAlchemy does not reliably report per-row ignored inserts across dialects.
+        inserted = int(getattr(result, "rowcount", 0) or 0)
+    else:
+        # Fallback: insert one-by-one and ignore conflicts.
+        for row in rows:
+            try:
+                async with session.begin_nested():
+                    session.add(LifeEvent(**row))
+                    await session.flush()
+                inserted += 1
+            except Exception:
+                pass
+    return inserted
+
+
 async def recompute_auto_life_events_for_window(
     *,
     session: AsyncSession,
@@ -186,41 +740,105 @@ async def recompute_auto_life_events_for_window(
     distance_threshold_m: float = DEFAULT_DISTANCE_THRESHOLD_M,
     time_threshold_s: float = DEFAULT_TIME_THRESHOLD_S,
 ) -> dict[str, int]:
-    """Best-effort recompute for a time window.
+    """Best-effort recompute after points were stored in a time window.
+
+    Emits STAY events and TRIP events for the movement between them.
+    Detection resumes from the user's `StayDetectorState`: points appended
+    after it extend or close the open windows, so stays and trips spanning
+    upload batches are found without re-reading the points already in them.
+    With no (matching) state, or for points back-filled at/before it, the
+    window is rescanned from the start of the user's latest unedited
+    detected stay before it.
 
     MVP behavior: only INSERT new deterministic-id events; do not delete or
-    overwrite existing rows (so user edits survive).
+    overwrite existing rows (so user edits survive). The exception is the row
+    of a stay that is still open, which is replaced as the stay grows unless
+    the user has edited it.
     """
 
-    points = await load_track_points_for_window(
-        session=session,
-        user_id=user_id,
-        start_at=start_at,
-        end_at=end_at,
-    )
-    stays = detect_stay_candidates(
-        points,
-        distance_threshold_m=float(distance_threshold_m),
-        time_threshold_s=float(time_threshold_s),
-    )
-    if not stays:
+    thr = float(distance_threshold_m)
+    min_s = float(time_threshold_s)
+    start_utc = _normalize_to_utc(start_at)
+    end_utc = _normalize_to_utc(end_at)
+
+    state = await session.get(StayDetectorState, user_id)
+    if (
+        state is not None
+        and state.distance_threshold_m == thr
+        and state.time_threshold_s == min_s
+        and start_utc > _normalize_to_utc(state.last_recorded_at)
+    ):
+        detected = await _detect_segments_since_state(
+            session=session,
+            user_id=user_id,
+            state=state,
+            end_at=end_utc,
+            distance_threshold_m=thr,
+            time_threshold_s=min_s,
+        )
+    else:
+        # A detected stay's anchor is a known greedy restart point; scan from
+        # the latest. Manual or edited stays carry no such guarantee.
+        resume_at = (
+            await session.execute(
+                sa.select(sa.func.max(LifeEvent.start_at)).where(
+                    LifeEvent.user_id == user_id,
+                    LifeEvent.event_type == "STAY",
+                    LifeEvent.payload_json["source"].as_string() == "AUTO_STAY",
+                    LifeEvent.updated_at == LifeEvent.created_at,
+                    LifeEvent.start_at < start_utc,
+                )
+            )
+        ).scalar_one_or_none()
+        scan_end = end_utc
+        if state is not None:
+            scan_end = max(scan_end, _normalize_to_utc(state.last_recorded_at))
+        points = await load_track_points_for_window(
+            session=session,
+            user_id=user_id,
+            start_at=resume_at if resume_at is not None else start_utc,
+            end_at=scan_end,
+        )
+        detected = (
+            _scan_segments(points, distance_threshold_m=thr, time_threshold_s=min_s)
+            if points
+            else None
+        )
+    if detected is None:
         return {"computed": 0, "inserted": 0}
 
+    stays, trips, window, trip = detected
+    trip = _close_trip_at_open_stay(window, trip, trips, time_threshold_s=min_s)
+    open_event_id = None
+    if window.is_stay(time_threshold_s=min_s):
+        # Still open: later points may extend it; keep it visible meanwhile.
+        open_stay = window.candidate()
+        stays.append(open_stay)
+        open_event_id = _make_auto_event_id(
+            user_id=user_id,
+            event_type="STAY",
+            start_at=open_stay.start_at,
+            end_at=open_stay.end_at,
+        )
+
     # Deterministic primary key -> can use ON CONFLICT DO NOTHING.
     rows: list[dict[str, object]] = []
     now = utcnow()
     for s in stays:
-        start_utc = _normalize_to_utc(s.start_at)
-        end_utc = _normalize_to_utc(s.end_at)
+        stay_start = _normalize_to_utc(s.start_at)
+        stay_end = _normalize_to_utc(s.end_at)
         rows.append(
             {
-                "id": _make_auto_stay_id(
-                    user_id=user_id, start_at=start_utc, end_at=end_utc
+                "id": _make_auto_event_id(
+                    user_id=user_id,
+                    event_type="STAY",
+                    start_at=stay_start,
+                    end_at=stay_end,
                 ),
                 "user_id": user_id,
                 "event_type": "STAY",
-                "start_at": start_utc,
-                "end_at": end_utc,
+                "start_at": stay_start,
+                "end_at": stay_end,
                 "latitude": float(s.latitude),
                 "longitude": float(s.longitude),
                 "gcj02_latitude": (
@@ -231,8 +849,8 @@ async def recompute_auto_life_events_for_window(
                 ),
                 "payload_json": {
                     "source": "AUTO_STAY",
-                    "distance_threshold_m": float(distance_threshold_m),
-                    "time_threshold_s": float(time_threshold_s),
+                    "distance_threshold_m": thr,
+                    "time_threshold_s": min_s,
                     "point_count": int(s.point_count),
                 },
                 "created_at": now,
@@ -240,34 +858,64 @@ async def recompute_auto_life_events_for_window(
             }
         )
 
-    dialect = session.bind.dialect.name if session.bind is not None else ""
-    inserted = 0
-    if dialect in {"sqlite", "postgresql"}:
-        if dialect == "sqlite":
-            from sqlalchemy.dialects.sqlite import insert as _insert
-
-            stmt = _insert(LifeEvent.__table__).values(rows).prefix_with("OR IGNORE")
-        else:
-            from sqlalchemy.dialects.postgresql import insert as _insert
+    for t in trips:
+        trip_start = _normalize_to_utc(t.start_at)
+        trip_end = _normalize_to_utc(t.end_at)
+        rows.append(
+            {
+                "id": _make_auto_event_id(
+                    user_id=user_id,
+                    event_type="TRIP",
+                    start_at=trip_start,
+                    end_at=trip_end,
+                ),
+                "user_id": user_id,
+                "event_type": "TRIP",
+                "start_at": trip_start,
+                "end_at": trip_end,
+                # A trip has no single location; its path is the polyline.
+                "latitude": None,
+                "longitude": None,
+                "gcj02_latitude": None,
+                "gcj02_longitude": None,
+                "payload_json": {
+                    "source": "AUTO_TRIP",
+                    "distance_m": round(t.distance_m, 1),
+                    "duration_s": t.duration_s,
+                    "avg_speed_mps": round(t.avg_speed_mps, 2),
+                    "point_count": int(t.point_count),
+                    "polyline": [
+                        [round(lat, 6), round(lon, 6)] for lat, lon in t.polyline
+                    ],
+                },
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
 
-            stmt = (
-                _insert(LifeEvent.__table__)
-                .values(rows)
-                .on_conflict_do_nothing(index_elements=["id"])
+    stale_id = state.open_event_id if state is not None else None
+    if stale_id is not None and stale_id not in {row["id"] for row in rows}:
+        # The open stay grew (or a rescan changed it): drop its superseded
+        # row, unless the user has edited it since it was inserted.
+        await session.execute(
+            sa.delete(LifeEvent).where(
+                LifeEvent.id == stale_id,
+                LifeEvent.user_id == user_id,
+                LifeEvent.updated_at == LifeEvent.created_at,
             )
-        result = await session.execute(stmt)
-        # SQLAlchemy does not reliably report per-row ignored inserts across dialects.
-        inserted = int(getattr(result, "rowcount", 0) or 0)
-    else:
-        # Fallback: insert one-by-one and ignore conflicts.
-        for row in rows:
-            try:
-                async with session.begin_nested():
-                    session.add(LifeEvent(**row))
-                    await session.flush()
-                inserted += 1
-            except Exception:
-                pass
+        )
 
+    inserted = await _insert_auto_events(session, rows) if rows else 0
     await session.commit()
-    return {"computed": len(stays), "inserted": inserted}
+
+    await _save_stay_state(
+        session,
+        user_id=user_id,
+        state=state,
+        window=window,
+        trip=trip,
+        open_event_id=open_event_id,
+        distance_threshold_m=thr,
+        time_threshold_s=min_s,
+    )
+    return {"computed": len(rows), "inserted": inserted}
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import weakref
+from collections.abc import Callable
+from typing import Any, Protocol
+
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket(Protocol):
+    async def reserve(self) -> float:
+        """Take one token; return seconds the caller must wait before using it."""
+        ...
+
+    async def defer(self, delay_s: float) -> None:
+        """Hold back every reservation for at least `delay_s` (e.g. Retry-After)."""
+        ...
+
+    async def aclose(self) -> None:
+        """Close connections opened on the running event loop."""
+        ...
+
+
+class InMemoryTokenBucket:
+    """Per-process token bucket.
+
+    Reservations are computed without awaiting, so the bucket needs no lock and
+    can be shared by coroutines on different event loops. Tokens may go
+    negative: that is the queue of callers already promised a future slot.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate_per_s: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if rate_per_s <= 0:
+            raise ValueError("rate_per_s must be positive")
+        self._rate = float(rate_per_s)
+        self._capacity = max(1.0, float(capacity))
+        self._clock = clock
+        self._tokens = self._capacity
+        self._updated_at = clock()
+        self._blocked_until = 0.0
+
+    async def reserve(self) -> float:
+        now = self._clock()
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated_at) * self._rate
+        )
+        self._updated_at = now
+        self._tokens -= 1.0
+        wait = -self._tokens / self._rate if self._tokens < 0 else 0.0
+        return max(wait, self._blocked_until - now, 0.0)
+
+    async def defer(self, delay_s: float) -> None:
+        self._blocked_until = max(self._blocked_until, self._clock() + delay_s)
+
+    async def aclose(self) -> None:
+        pass
+
+
+# KEYS[1] = bucket hash; ARGV = rate per ms, capacity, key ttl ms.
+# Uses the Redis server clock so workers on different hosts agree on time.
+_RESERVE_LUA = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + tonumber(t[2]) / 1000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'blocked')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+local blocked = tonumber(state[3]) or 0
+tokens = math.min(capacity, tokens + (now - ts) * rate) - 1
+local wait = 0
+if tokens < 0 then wait = -tokens / rate end
+if blocked - now > wait then wait = blocked - now end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], ARGV[3])
+return math.ceil(wait)
+"""
+
+# KEYS[1] = bucket hash; ARGV = delay ms, key ttl ms.
+_DEFER_LUA = """
+local t = redis.call('TIME')
+local until_ms = tonumber(t[1]) * 1000 + tonumber(t[2]) / 1000 + tonumber(ARGV[1])
+local blocked = tonumber(redis.call('HGET', KEYS[1], 'blocked')) or 0
+if until_ms > blocked then
+  redis.call('HSET', KEYS[1], 'blocked', tostring(until_ms))
+end
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+
+class LoopLocalRedis:
+    """Lazily created `redis.asyncio` client per running event loop.
+
+    redis.asyncio connections are bound to the loop that opened them, and
+    Celery tasks run each job on a fresh loop, so the loop's owner calls
+    `aclose()` before the loop ends. Requires the optional `redis` package.
+    """
+
+    def __init__(self, redis_url: str) -> None:
+        self._redis_url = redis_url
+        self._clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def get(self) -> Any:
+        import redis.asyncio as redis_asyncio
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = redis_asyncio.Redis.from_url(self._redis_url)
+            self._clients[loop] = client
+        return client
+
+    async def aclose(self) -> None:
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+class RedisTokenBucket:
+    """Token bucket shared by every worker through one Redis hash.
+
+    Any Redis failure falls back to the per-process `fallback` bucket so weather
+    enrichment degrades to local limiting instead of failing.
+    """
+
+    def __init__(
+        self,
+        *,
+        redis_url: str,
+        key: str,
+        rate_per_s: float,
+        capacity: float,
+        fallback: InMemoryTokenBucket,
+    ) -> None:
+        self._key = key
+        self._rate_per_ms = float(rate_per_s) / 1000.0
+        self._capacity = max(1.0, float(capacity))
+        # Long enough for a full refill; idle buckets clean themselves up.
+        self._ttl_ms = int(max(60_000.0, self._capacity / self._rate_per_ms * 2))
+        self._fallback = fallback
+        self._redis = LoopLocalRedis(redis_url)
+
+    async def reserve(self) -> float:
+        try:
+            wait_ms = await self._redis.get().eval(
+                _RESERVE_LUA,
+                1,
+                self._key,
+                self._rate_per_ms,
+                self._capacity,
+                self._ttl_ms,
+            )
+        except Exception:
+            logger.warning(
+                "Redis token bucket unavailable; using local limit", exc_info=True
+            )
+            return await self._fallback.reserve()
+        return max(0.0, float(wait_ms) / 1000.0)
+
+    async def defer(self, delay_s: float) -> None:
+        await self._fallback.defer(delay_s)
+        try:
+            await self._redis.get().eval(
+                _DEFER_LUA, 1, self._key, int(delay_s * 1000), self._ttl_ms
+            )
+        except Exception:
+            logger.warning(
+                "Redis token bucket unavailable; deferring locally", exc_info=True
+            )
+
+    async def aclose(self) -> None:
+        await self._redis.aclose()
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+import weakref
+from collections.abc import Callable, Hashable
+from typing import Any, Generic, Protocol, TypeVar
+
+from app.services.rate_limit import LoopLocalRedis
+
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class FlightAbandoned(Exception):
+    """The leader of a flight gave up without a result; joiners should retry."""
+
+
+class SingleFlight(Generic[K, V]):
+    """Share one in-flight result per key among concurrent callers.
+
+    A caller that finds no flight for a key becomes its leader via `lead()` and
+    must `finish()` or `abandon()` it; everyone else `join()`s and awaits the
+    leader's future. Futures belong to an event loop, so flights are tracked
+    per running loop.
+    """
+
+    def __init__(self) -> None:
+        self._flights: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[K, asyncio.Future[V]]
+        ] = weakref.WeakKeyDictionary()
+
+    def _current(self) -> dict[K, asyncio.Future[V]]:
+        loop = asyncio.get_running_loop()
+        flights = self._flights.get(loop)
+        if flights is None:
+            flights = {}
+            self._flights[loop] = flights
+        return flights
+
+    def join(self, key: K) -> asyncio.Future[V] | None:
+        return self._current().get(key)
+
+    def lead(self, key: K) -> asyncio.Future[V]:
+        flights = self._current()
+        if key in flights:
+            raise RuntimeError(f"flight already in progress: {key!r}")
+        fut: asyncio.Future[V] = asyncio.get_running_loop().create_future()
+        flights[key] = fut
+        return fut
+
+    def finish(self, key: K, value: V) -> None:
+        fut = self._current().pop(key, None)
+        if fut is not None and not fut.done():
+            fut.set_result(value)
+
+    def abandon(self, key: K) -> None:
+        """End the flight without a result; joiners get `FlightAbandoned`."""
+
+        fut = self._current().pop(key, None)
+        if fut is not None and not fut.done():
+            fut.set_exception(FlightAbandoned(key))
+            # Mark it retrieved: nobody may be waiting on it.
+            fut.exception()
+
+    def in_flight(self) -> int:
+        return len(self._current())
+
+
+class FetchLock(Protocol):
+    async def acquire(self, name: str) -> bool:
+        """Try to take `name` without waiting; True if this caller now holds it."""
+        ...
+
+    async def release(self, name: str) -> None: ...
+
+    async def wait_released(
+        self, name: str, *, sleep: Callable[[float], Any] | None = None
+    ) -> None:
+        """Wait until nobody holds `name` (or the lock's timeout passes)."""
+        ...
+
+    async def aclose(self) -> None:
+        """Close connections opened on the running event loop."""
+        ...
+
+
+# Delete only if we still own the lock; a slow holder must not free a lock that
+# already expired and was taken over by someone else.
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisFetchLock:
+    """Cross-process `SET NX PX` lock so only one worker fetches a key at a time.
+
+    Locks expire after `ttl_s` in case the holder dies. Redis errors are treated
+    as "lock acquired" so callers fall back to fetching on their own.
+    """
+
+    def __init__(
+        self,
+        *,
+        redis_url: str,
+        prefix: str,
+        ttl_s: float,
+        poll_interval_s: float = 0.2,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._redis = LoopLocalRedis(redis_url)
+        self._prefix = prefix
+        self._ttl_ms = max(1, int(ttl_s * 1000))
+        self._ttl_s = float(ttl_s)
+        self._poll_interval_s = float(poll_interval_s)
+        self._clock = clock
+        self._token = uuid.uuid4().hex
+
+    async def acquire(self, name: str) -> bool:
+        try:
+            ok = await self._redis.get().set(
+                self._prefix + name, self._token, nx=True, px=self._ttl_ms
+            )
+        except Exception:
+            logger.warning("Redis fetch lock unavailable", exc_info=True)
+            return True
+        return bool(ok)
+
+    async def release(self, name: str) -> None:
+        try:
+            await self._redis.get().eval(
+                _RELEASE_LUA, 1, self._prefix + name, self._token
+            )
+        except Exception:
+            logger.warning("Redis fetch lock release failed", exc_info=True)
+
+    async def wait_released(
+        self, name: str, *, sleep: Callable[[float], Any] | None = None
+    ) -> None:
+        sleep = sleep or asyncio.sleep
+        deadline = self._clock() + self._ttl_s
+        while self._clock() < deadline:
+            try:
+                held = await self._redis.get().exists(self._prefix + name)
+            except Exception:
+                logger.warning("Redis fetch lock unavailable", exc_info=True)
+                return
+            if not held:
+                return
+            await sleep(self._poll_interval_s)
+
+    async def aclose(self) -> None:
+        await self._redis.aclose()
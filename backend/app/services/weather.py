@@ -1,7 +1,15 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import datetime as dt
+import email.utils
+import importlib.util
+import os
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Collection, Iterable, Sequence
 from dataclasses import dataclass
 from typing import Any, Callable
 
@@ -10,8 +18,31 @@ import sqlalchemy as sa
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.settings import get_settings
+from app.models.track_point import TrackPoint
 from app.models.weather_cache import WeatherCache
-from app.utils.geohash import decode_center, encode
+from app.services.rate_limit import InMemoryTokenBucket, RedisTokenBucket, TokenBucket
+from app.services.single_flight import (
+    FetchLock,
+    FlightAbandoned,
+    RedisFetchLock,
+    SingleFlight,
+)
+from app.utils.geohash import decode_center, encode_many
+
+
+# Keys per (geohash_5, hour_time) IN query / rows per cache insert; keeps bind
+# parameter counts modest.
+_CACHE_LOOKUP_BATCH = 500
+_CACHE_INSERT_BATCH = 500
+
+# Keep hourly fields minimal; they can be extended later without schema changes.
+_HOURLY_FIELDS = (
+    "temperature_2m",
+    "relativehumidity_2m",
+    "precipitation",
+    "weathercode",
+    "windspeed_10m",
+)
 
 
 class WeatherProviderError(Exception):
@@ -39,11 +70,234 @@ class WeatherKey:
     hour_time: dt.datetime
 
 
+class WeatherMemoryCache:
+    """Bounded in-process LRU in front of `weather_cache`.
+
+    Entries expire after `ttl_s`. Provider failures are stored as negative
+    entries (payload None) for the shorter `negative_ttl_s`, so a failing key
+    is not retried for every point while the provider is degraded. Positive
+    entries may also carry their `weather_cache.id`, for callers that link
+    points to cache rows.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int,
+        ttl_s: float,
+        negative_ttl_s: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_entries = max(0, int(max_entries))
+        self._ttl_s = float(ttl_s)
+        self._negative_ttl_s = float(negative_ttl_s)
+        self._clock = clock
+        self._entries: OrderedDict[
+            WeatherKey, tuple[float, dict[str, object] | None, int | None]
+        ] = OrderedDict()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: WeatherKey) -> tuple[bool, dict[str, object] | None]:
+        """Return (found, payload); found with payload None is a negative hit."""
+
+        found, payload, _ = self.get_entry(key)
+        return found, payload
+
+    def get_entry(
+        self, key: WeatherKey
+    ) -> tuple[bool, dict[str, object] | None, int | None]:
+        """Like `get`, plus the entry's cache row id (None if not known)."""
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= self._clock():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return False, None, None
+
+        self._entries.move_to_end(key)
+        if entry[1] is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return True, entry[1], entry[2]
+
+    def put(
+        self,
+        key: WeatherKey,
+        payload: dict[str, object] | None,
+        cache_id: int | None = None,
+    ) -> None:
+        ttl_s = self._ttl_s if payload is not None else self._negative_ttl_s
+        if self._max_entries == 0 or ttl_s <= 0:
+            return
+        self._entries[key] = (self._clock() + ttl_s, payload, cache_id)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "max_entries": self._max_entries,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+_memory_cache: WeatherMemoryCache | None = None
+
+
+def get_memory_cache() -> WeatherMemoryCache:
+    """Process-wide weather LRU, created lazily from settings."""
+
+    global _memory_cache
+    if _memory_cache is None:
+        settings = get_settings()
+        _memory_cache = WeatherMemoryCache(
+            max_entries=int(settings.weather_memory_cache_max_entries),
+            ttl_s=float(settings.weather_memory_cache_ttl_s),
+            negative_ttl_s=float(settings.weather_negative_cache_ttl_s),
+        )
+    return _memory_cache
+
+
+def _retry_after_s(resp: httpx.Response) -> float | None:
+    """Parse `Retry-After` as delta-seconds or an HTTP date; None if absent."""
+
+    raw = resp.headers.get("Retry-After")
+    if raw is None:
+        return None
+    raw = raw.strip()
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(raw)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=dt.timezone.utc)
+    return max(0.0, (when - dt.datetime.now(dt.timezone.utc)).total_seconds())
+
+
+_rate_limiter: TokenBucket | None = None
+
+
+def get_open_meteo_rate_limiter() -> TokenBucket | None:
+    """Process-wide Open-Meteo token bucket; None when limiting is disabled.
+
+    Backed by Redis when `redis_url` is set and the `redis` package is
+    installed, otherwise by a per-process bucket.
+    """
+
+    global _rate_limiter
+    settings = get_settings()
+    rate_per_s = float(settings.open_meteo_rate_limit_per_min) / 60.0
+    if rate_per_s <= 0:
+        return None
+    if _rate_limiter is None:
+        capacity = float(settings.open_meteo_rate_limit_burst)
+        local = InMemoryTokenBucket(rate_per_s=rate_per_s, capacity=capacity)
+        redis_url = settings.redis_url or os.getenv("REDIS_URL")
+        if redis_url and importlib.util.find_spec("redis") is not None:
+            _rate_limiter = RedisTokenBucket(
+                redis_url=redis_url,
+                key="wayfarer:ratelimit:open-meteo",
+                rate_per_s=rate_per_s,
+                capacity=capacity,
+                fallback=local,
+            )
+        else:
+            _rate_limiter = local
+    return _rate_limiter
+
+
+_http_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, httpx.AsyncClient
+] = weakref.WeakKeyDictionary()
+
+
+def get_open_meteo_http_client() -> httpx.AsyncClient:
+    """Pooled keep-alive client for Open-Meteo, one per running event loop.
+
+    Reusing connections saves a TCP+TLS handshake per request. Connections are
+    bound to the loop that opened them (Celery runs each job on a fresh loop),
+    so owners close the loop's client with `close_open_meteo_clients()`.
+    HTTP/2 needs the optional `h2` package.
+    """
+
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None or client.is_closed:
+        settings = get_settings()
+        http2 = bool(settings.open_meteo_http2) and (
+            importlib.util.find_spec("h2") is not None
+        )
+        client = httpx.AsyncClient(
+            http2=http2,
+            timeout=float(settings.open_meteo_timeout_s),
+            limits=httpx.Limits(
+                max_connections=int(settings.open_meteo_max_connections),
+                max_keepalive_connections=int(
+                    settings.open_meteo_max_keepalive_connections
+                ),
+                keepalive_expiry=float(settings.open_meteo_keepalive_expiry_s),
+            ),
+        )
+        _http_clients[loop] = client
+    return client
+
+
+async def close_open_meteo_clients() -> None:
+    """Close the running loop's pooled client and Redis connections, if any.
+
+    The shared rate limiter and fetch lock keep one Redis client per loop too;
+    they are closed here so a finished Celery job leaves no sockets behind.
+    """
+
+    client = _http_clients.pop(asyncio.get_running_loop(), None)
+    try:
+        if client is not None:
+            await client.aclose()
+    finally:
+        if _rate_limiter is not None:
+            await _rate_limiter.aclose()
+        if _fetch_lock is not None:
+            await _fetch_lock.aclose()
+
+
+@contextlib.asynccontextmanager
+async def open_meteo_http_client() -> AsyncIterator[httpx.AsyncClient]:
+    """Use the running loop's pooled client and close it (and Redis) on exit.
+
+    For code that owns the loop, such as a Celery job's `asyncio.run()`.
+    """
+
+    try:
+        yield get_open_meteo_http_client()
+    finally:
+        await close_open_meteo_clients()
+
+
 class OpenMeteoArchiveClient:
     """Minimal Open-Meteo archive client with 429 exponential backoff.
 
-    Baseline rate limit: 600/min (free tier); we back off on 429 to avoid a
-    request storm.
+    Baseline rate limit: 600/min (free tier). Every request first takes a token
+    from `rate_limiter` (shared across workers when Redis is configured), and a
+    429/5xx `Retry-After` pauses the whole bucket; without that header we fall
+    back to exponential backoff to avoid a request storm.
     """
 
     def __init__(
@@ -55,6 +309,7 @@ class OpenMeteoArchiveClient:
         backoff_base_s: float,
         http_client: httpx.AsyncClient | None = None,
         sleep: Callable[[float], Any] | None = None,
+        rate_limiter: TokenBucket | None = None,
     ) -> None:
         self._base_url = base_url
         self._timeout = timeout_s
@@ -62,74 +317,79 @@ class OpenMeteoArchiveClient:
         self._backoff_base = backoff_base_s
         self._client = http_client
         self._sleep = sleep or asyncio.sleep
+        self._rate_limiter = rate_limiter
+
+    async def _backoff(self, *, attempt: int, resp: httpx.Response) -> None:
+        retry_after = _retry_after_s(resp)
+        if retry_after is not None and self._rate_limiter is not None:
+            # Pause every caller sharing the bucket; the next reserve() waits.
+            await self._rate_limiter.defer(retry_after)
+            return
+        if retry_after is None:
+            retry_after = self._backoff_base * (2**attempt)
+        await self._sleep(retry_after)
 
     async def _get_json(self, *, params: dict[str, Any]) -> dict[str, Any]:
-        close_client = False
-        client = self._client
-        if client is None:
-            close_client = True
-            client = httpx.AsyncClient()
-
-        try:
-            for attempt in range(self._max_retries):
-                try:
-                    resp = await client.get(
-                        self._base_url,
-                        params=params,
-                        timeout=self._timeout,
+        client = self._client or get_open_meteo_http_client()
+        for attempt in range(self._max_retries):
+            if self._rate_limiter is not None:
+                wait = await self._rate_limiter.reserve()
+                if wait > 0:
+                    await self._sleep(wait)
+            try:
+                resp = await client.get(
+                    self._base_url,
+                    params=params,
+                    timeout=self._timeout,
+                )
+            except httpx.TimeoutException as e:
+                raise WeatherTimeoutError("Open-Meteo request timed out") from e
+            except httpx.HTTPError as e:
+                raise WeatherProviderError("Open-Meteo request failed") from e
+
+            if resp.status_code == 429:
+                if attempt >= self._max_retries - 1:
+                    raise WeatherRateLimitedError("Open-Meteo rate limited")
+                await self._backoff(attempt=attempt, resp=resp)
+                continue
+
+            if 500 <= resp.status_code < 600:
+                if attempt >= self._max_retries - 1:
+                    raise WeatherProviderError(
+                        f"Open-Meteo server error: {resp.status_code}"
                     )
-                except httpx.TimeoutException as e:
-                    raise WeatherTimeoutError("Open-Meteo request timed out") from e
-                except httpx.HTTPError as e:
-                    raise WeatherProviderError("Open-Meteo request failed") from e
-
-                if resp.status_code == 429:
-                    if attempt >= self._max_retries - 1:
-                        raise WeatherRateLimitedError("Open-Meteo rate limited")
-                    delay = self._backoff_base * (2**attempt)
-                    await self._sleep(delay)
-                    continue
-
-                if 500 <= resp.status_code < 600:
-                    if attempt >= self._max_retries - 1:
-                        raise WeatherProviderError(
-                            f"Open-Meteo server error: {resp.status_code}"
-                        )
-                    delay = self._backoff_base * (2**attempt)
-                    await self._sleep(delay)
-                    continue
-
-                resp.raise_for_status()
-                return resp.json()
-
-            raise WeatherProviderError("Open-Meteo request retries exhausted")
-        finally:
-            if close_client:
-                await client.aclose()
+                await self._backoff(attempt=attempt, resp=resp)
+                continue
 
-    async def get_hour_snapshot(
+            resp.raise_for_status()
+            return resp.json()
+
+        raise WeatherProviderError("Open-Meteo request retries exhausted")
+
+    async def get_day_snapshots(
         self,
         *,
         latitude: float,
         longitude: float,
-        hour_time_utc: dt.datetime,
-    ) -> dict[str, object]:
-        hour_time_utc = floor_to_hour_utc(hour_time_utc)
-        day = hour_time_utc.date()
-        # Keep hourly fields minimal; they can be extended later without schema changes.
-        hourly_fields = [
-            "temperature_2m",
-            "relativehumidity_2m",
-            "precipitation",
-            "weathercode",
-            "windspeed_10m",
-        ]
+        start_day: dt.date,
+        end_day: dt.date | None = None,
+    ) -> dict[dt.datetime, dict[str, object]]:
+        """Fetch every hour in [start_day, end_day] (UTC) with a single request.
+
+        Returns snapshots keyed by their UTC hour; hours the provider omits are
+        simply absent from the result.
+        """
+
+        end_day = end_day or start_day
+        if end_day < start_day:
+            raise ValueError("end_day must not be before start_day")
+
         params = {
             "latitude": latitude,
             "longitude": longitude,
-            "start_date": day.isoformat(),
-            "end_date": day.isoformat(),
-            "hourly": ",".join(hourly_fields),
+            "start_date": start_day.isoformat(),
+            "end_date": end_day.isoformat(),
+            "hourly": ",".join(_HOURLY_FIELDS),
             "timezone": "UTC",
         }
         data = await self._get_json(params=params)
@@ -142,23 +402,528 @@ class OpenMeteoArchiveClient:
         if not isinstance(times, list):
             raise WeatherProviderError("Open-Meteo response missing hourly.time")
 
-        target = hour_time_utc.replace(tzinfo=None).isoformat(timespec="minutes")
+        out: dict[dt.datetime, dict[str, object]] = {}
+        for idx, raw in enumerate(times):
+            try:
+                hour_time_utc = floor_to_hour_utc(dt.datetime.fromisoformat(str(raw)))
+            except ValueError:
+                continue
+            snapshot: dict[str, object] = {
+                "provider": "open-meteo",
+                "hour_time": hour_time_utc.isoformat().replace("+00:00", "Z"),
+                "latitude": latitude,
+                "longitude": longitude,
+            }
+            for k in _HOURLY_FIELDS:
+                values = hourly.get(k)
+                if isinstance(values, list) and idx < len(values):
+                    snapshot[k] = values[idx]
+            out[hour_time_utc] = snapshot
+        return out
+
+    async def get_hour_snapshot(
+        self,
+        *,
+        latitude: float,
+        longitude: float,
+        hour_time_utc: dt.datetime,
+    ) -> dict[str, object]:
+        hour_time_utc = floor_to_hour_utc(hour_time_utc)
+        snapshots = await self.get_day_snapshots(
+            latitude=latitude,
+            longitude=longitude,
+            start_day=hour_time_utc.date(),
+        )
         try:
-            idx = times.index(target)
-        except ValueError as e:
+            return snapshots[hour_time_utc]
+        except KeyError as e:
             raise WeatherProviderError("Open-Meteo response missing target hour") from e
 
-        snapshot: dict[str, object] = {
-            "provider": "open-meteo",
-            "hour_time": hour_time_utc.isoformat().replace("+00:00", "Z"),
-            "latitude": latitude,
-            "longitude": longitude,
-        }
-        for k in hourly_fields:
-            values = hourly.get(k)
-            if isinstance(values, list) and idx < len(values):
-                snapshot[k] = values[idx]
-        return snapshot
+
+def _day_ranges(
+    days: Iterable[dt.date], *, max_days: int
+) -> list[tuple[dt.date, dt.date]]:
+    """Collapse days into runs of consecutive days, each at most `max_days` long."""
+
+    out: list[tuple[dt.date, dt.date]] = []
+    for day in sorted(set(days)):
+        if out:
+            first, last = out[-1]
+            if day - last == dt.timedelta(days=1) and (day - first).days < max_days:
+                out[-1] = (first, day)
+                continue
+        out.append((day, day))
+    return out
+
+
+_DayKey = tuple[str, dt.date]
+_DayHours = dict[dt.datetime, dict[str, object]]
+
+# In-flight provider fetches per (geohash, day), shared by concurrent callers.
+_day_flights: SingleFlight[_DayKey, _DayHours] = SingleFlight()
+
+_fetch_lock: FetchLock | None = None
+
+
+def get_weather_fetch_lock() -> FetchLock | None:
+    """Cross-process fetch lock; None unless enabled and Redis is available."""
+
+    global _fetch_lock
+    if _fetch_lock is None:
+        settings = get_settings()
+        redis_url = settings.redis_url or os.getenv("REDIS_URL")
+        if not settings.weather_fetch_lock_enabled or not redis_url:
+            return None
+        if importlib.util.find_spec("redis") is None:
+            return None
+        _fetch_lock = RedisFetchLock(
+            redis_url=redis_url,
+            prefix="wayfarer:lock:weather:",
+            ttl_s=float(settings.weather_fetch_lock_ttl_s),
+        )
+    return _fetch_lock
+
+
+def _fetch_lock_name(day_key: _DayKey) -> str:
+    return f"{day_key[0]}:{day_key[1].isoformat()}"
+
+
+def _cancelable_sleep(
+    sleep: Callable[[float], Any] | None,
+    check_canceled: Callable[[], Awaitable[None]],
+) -> Callable[[float], Awaitable[None]]:
+    base = sleep or asyncio.sleep
+
+    async def _sleep(delay: float) -> None:
+        await check_canceled()
+        await base(delay)
+        await check_canceled()
+
+    return _sleep
+
+
+def _make_client(
+    *,
+    http_client: httpx.AsyncClient | None,
+    sleep: Callable[[float], Any] | None,
+) -> OpenMeteoArchiveClient:
+    settings = get_settings()
+    return OpenMeteoArchiveClient(
+        base_url=settings.open_meteo_archive_base_url,
+        timeout_s=float(settings.open_meteo_timeout_s),
+        max_retries=int(settings.open_meteo_max_retries),
+        backoff_base_s=float(settings.open_meteo_backoff_base_s),
+        http_client=http_client,
+        sleep=sleep,
+        rate_limiter=get_open_meteo_rate_limiter(),
+    )
+
+
+def weather_keys(
+    points: Sequence[tuple[float, float, dt.datetime]],
+) -> list[WeatherKey]:
+    """Cache keys for (latitude, longitude, recorded_at) points, batch-encoded."""
+
+    precision = int(get_settings().weather_geohash_precision)
+    hashes = encode_many(
+        [float(p[0]) for p in points],
+        [float(p[1]) for p in points],
+        precision=precision,
+    )
+    return [
+        WeatherKey(geohash_5, floor_to_hour_utc(p[2]))
+        for geohash_5, p in zip(hashes, points, strict=True)
+    ]
+
+
+async def _select_cache_rows(
+    session: AsyncSession, keys: Collection[WeatherKey]
+) -> list[tuple[WeatherKey, int, dict[str, object]]]:
+    """Bulk-load cache rows for `keys` with (geohash_5, hour_time) IN queries."""
+
+    ordered = list(keys)
+    out: list[tuple[WeatherKey, int, dict[str, object]]] = []
+    for i in range(0, len(ordered), _CACHE_LOOKUP_BATCH):
+        batch = ordered[i : i + _CACHE_LOOKUP_BATCH]
+        stmt = sa.select(
+            WeatherCache.id,
+            WeatherCache.geohash_5,
+            WeatherCache.hour_time,
+            WeatherCache.payload,
+        ).where(
+            sa.tuple_(WeatherCache.geohash_5, WeatherCache.hour_time).in_(
+                [(k.geohash_5, k.hour_time) for k in batch]
+            )
+        )
+        for row_id, geohash_5, hour_time, payload in (
+            await session.execute(stmt)
+        ).all():
+            out.append(
+                (WeatherKey(geohash_5, floor_to_hour_utc(hour_time)), row_id, payload)
+            )
+    return out
+
+
+async def _load_cached_payloads(
+    session: AsyncSession, keys: Collection[WeatherKey]
+) -> dict[WeatherKey, dict[str, object]]:
+    return {k: payload for k, _, payload in await _select_cache_rows(session, keys)}
+
+
+async def load_weather_payloads(
+    session: AsyncSession, ids: Collection[int]
+) -> dict[int, dict[str, object]]:
+    """Load `weather_cache` payloads by id, one IN query per batch."""
+
+    ordered = sorted(set(ids))
+    out: dict[int, dict[str, object]] = {}
+    for i in range(0, len(ordered), _CACHE_LOOKUP_BATCH):
+        batch = ordered[i : i + _CACHE_LOOKUP_BATCH]
+        stmt = sa.select(WeatherCache.id, WeatherCache.payload).where(
+            WeatherCache.id.in_(batch)
+        )
+        for row_id, payload in (await session.execute(stmt)).all():
+            out[row_id] = payload
+    return out
+
+
+async def _store_cached_payloads(
+    session: AsyncSession, payloads: dict[WeatherKey, dict[str, object]]
+) -> None:
+    # Cache write: unique (geohash_5, hour_time); concurrent writers may race.
+    rows = [
+        {"geohash_5": k.geohash_5, "hour_time": k.hour_time, "payload": payload}
+        for k, payload in payloads.items()
+    ]
+    if not rows:
+        return
+
+    dialect = session.bind.dialect.name if session.bind is not None else ""
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as _insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as _insert
+
+        for i in range(0, len(rows), _CACHE_INSERT_BATCH):
+            stmt_ins = (
+                _insert(WeatherCache.__table__)
+                .values(rows[i : i + _CACHE_INSERT_BATCH])
+                .on_conflict_do_nothing(index_elements=["geohash_5", "hour_time"])
+            )
+            await session.execute(stmt_ins)
+    else:
+        # Fallback: best-effort insert; if it races, ignore the error.
+        for values in rows:
+            try:
+                async with session.begin_nested():
+                    session.add(WeatherCache(**values))
+                    await session.flush()
+            except Exception:
+                pass
+
+
+async def _fetch_missing(
+    session: AsyncSession,
+    missing: Sequence[WeatherKey],
+    *,
+    http_client: httpx.AsyncClient | None,
+    sleep: Callable[[float], Any] | None,
+    concurrency: int | None,
+    check_canceled: Callable[[], Awaitable[None]] | None = None,
+) -> dict[WeatherKey, dict[str, object]]:
+    """Fetch `missing` keys from Open-Meteo and cache every returned hour.
+
+    Work is coalesced per (geohash, day): a day already being fetched by
+    another coroutine in this process is awaited instead of requested again,
+    and with the cross-process lock enabled, a day locked by another worker is
+    awaited and then read back from `weather_cache`. The result may include
+    more hours than asked for.
+
+    `check_canceled` runs before every provider request and around every
+    wait (rate limiter, backoff, fetch lock); if it raises, requests still in
+    flight are cancelled and the error propagates. Days this call was leading
+    are then abandoned, and coroutines waiting on them fetch them instead.
+    """
+
+    wait = sleep
+    if check_canceled is not None:
+        wait = _cancelable_sleep(sleep, check_canceled)
+    settings = get_settings()
+    lock = get_weather_fetch_lock()
+    wanted = sorted({(k.geohash_5, k.hour_time.date()) for k in missing})
+
+    joined: dict[_DayKey, asyncio.Future[_DayHours]] = {}
+    leases: list[_DayKey] = []
+    for day_key in wanted:
+        fut = _day_flights.join(day_key)
+        if fut is not None:
+            joined[day_key] = fut
+        else:
+            _day_flights.lead(day_key)
+            leases.append(day_key)
+
+    # No awaits between lead() and try: every lease must reach finish().
+    by_day: dict[_DayKey, _DayHours] = {}
+    held: list[str] = []
+    try:
+        to_fetch = leases
+        if lock is not None:
+            to_fetch = []
+            contended: list[_DayKey] = []
+            for day_key in leases:
+                if await lock.acquire(_fetch_lock_name(day_key)):
+                    held.append(_fetch_lock_name(day_key))
+                    to_fetch.append(day_key)
+                else:
+                    contended.append(day_key)
+            if contended:
+                # Another worker is fetching these days; wait and read its rows.
+                await asyncio.gather(
+                    *(
+                        lock.wait_released(_fetch_lock_name(d), sleep=wait)
+                        for d in contended
+                    )
+                )
+                contended_set = set(contended)
+                reload_keys = [
+                    k
+                    for k in missing
+                    if (k.geohash_5, k.hour_time.date()) in contended_set
+                ]
+                reloaded = await _load_cached_payloads(session, reload_keys)
+                for k, payload in reloaded.items():
+                    by_day.setdefault((k.geohash_5, k.hour_time.date()), {})[
+                        k.hour_time
+                    ] = payload
+                # Whatever the other worker could not fetch, fetch ourselves.
+                to_fetch += sorted(
+                    {
+                        (k.geohash_5, k.hour_time.date())
+                        for k in reload_keys
+                        if k not in reloaded
+                    }
+                )
+
+        client = _make_client(http_client=http_client, sleep=wait)
+        limit = int(concurrency or settings.weather_fetch_concurrency)
+        semaphore = asyncio.Semaphore(max(1, limit))
+
+        # One request per geohash and run of consecutive days; every hour the
+        # provider returns is cached, not just the hours asked for.
+        days_by_cell: dict[str, set[dt.date]] = {}
+        for geohash_5, day in to_fetch:
+            days_by_cell.setdefault(geohash_5, set()).add(day)
+        max_days = max(1, int(settings.weather_fetch_max_days))
+        requests = [
+            (geohash_5, first, last)
+            for geohash_5, days in days_by_cell.items()
+            for first, last in _day_ranges(days, max_days=max_days)
+        ]
+
+        async def _fetch(geohash_5: str, first: dt.date, last: dt.date) -> _DayHours:
+            # Query provider at the geohash cell center for stable caching.
+            lat_c, lon_c = decode_center(geohash_5)
+            async with semaphore:
+                if check_canceled is not None:
+                    await check_canceled()
+                try:
+                    return await client.get_day_snapshots(
+                        latitude=lat_c,
+                        longitude=lon_c,
+                        start_day=first,
+                        end_day=last,
+                    )
+                except WeatherProviderError:
+                    return {}
+
+        # The session is not touched while requests are in flight (except by
+        # `check_canceled`, one query at a time).
+        tasks = [asyncio.ensure_future(_fetch(*r)) for r in requests]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        fetched: dict[WeatherKey, dict[str, object]] = {}
+        for (geohash_5, _, _), hours in zip(requests, results, strict=True):
+            for hour_time, payload in hours.items():
+                fetched[WeatherKey(geohash_5, hour_time)] = payload
+                by_day.setdefault((geohash_5, hour_time.date()), {})[hour_time] = (
+                    payload
+                )
+        await _store_cached_payloads(session, fetched)
+        memory = get_memory_cache()
+        for k, payload in fetched.items():
+            memory.put(k, payload)
+    except BaseException:
+        # Our own cancellation or error is not a provider failure: joiners
+        # must not see these days as empty, so they fetch them themselves.
+        for day_key in leases:
+            _day_flights.abandon(day_key)
+        raise
+    finally:
+        if lock is not None:
+            for name in held:
+                await lock.release(name)
+        for day_key in leases:
+            _day_flights.finish(day_key, by_day.get(day_key, {}))
+
+    abandoned: set[_DayKey] = set()
+    for day_key, fut in joined.items():
+        try:
+            by_day[day_key] = await fut
+        except FlightAbandoned:
+            abandoned.add(day_key)
+    if abandoned:
+        retried = await _fetch_missing(
+            session,
+            [k for k in missing if (k.geohash_5, k.hour_time.date()) in abandoned],
+            http_client=http_client,
+            sleep=sleep,
+            concurrency=concurrency,
+            check_canceled=check_canceled,
+        )
+        for k, payload in retried.items():
+            by_day.setdefault((k.geohash_5, k.hour_time.date()), {})[k.hour_time] = (
+                payload
+            )
+
+    return {
+        WeatherKey(geohash_5, hour_time): payload
+        for (geohash_5, _), hours in by_day.items()
+        for hour_time, payload in hours.items()
+    }
+
+
+async def _lookup_weather(
+    session: AsyncSession,
+    keys: Sequence[WeatherKey],
+    *,
+    http_client: httpx.AsyncClient | None,
+    sleep: Callable[[float], Any] | None,
+    concurrency: int | None,
+    check_canceled: Callable[[], Awaitable[None]] | None,
+    with_ids: bool,
+) -> tuple[dict[WeatherKey, dict[str, object]], dict[WeatherKey, int], bool]:
+    distinct = list(dict.fromkeys(keys))
+
+    memory = get_memory_cache()
+    payloads: dict[WeatherKey, dict[str, object]] = {}
+    ids: dict[WeatherKey, int] = {}
+    known_failures = False
+    lookup: list[WeatherKey] = []
+    for k in distinct:
+        found, payload, cache_id = memory.get_entry(k)
+        if not found:
+            lookup.append(k)
+        elif payload is None:
+            known_failures = True
+        else:
+            payloads[k] = payload
+            if cache_id is not None:
+                ids[k] = cache_id
+
+    for k, cache_id, payload in await _select_cache_rows(session, lookup):
+        memory.put(k, payload, cache_id)
+        payloads[k] = payload
+        ids[k] = cache_id
+
+    missing = [k for k in lookup if k not in payloads]
+    degraded = known_failures
+    if missing:
+        fetched = await _fetch_missing(
+            session,
+            missing,
+            http_client=http_client,
+            sleep=sleep,
+            concurrency=concurrency,
+            check_canceled=check_canceled,
+        )
+        payloads.update(fetched)
+
+        failed = [k for k in missing if k not in fetched]
+        for k in failed:
+            memory.put(k, None)
+        degraded = degraded or bool(failed)
+
+    if with_ids:
+        # Only just-fetched keys (and LRU entries stored by a fetch) lack ids.
+        unknown = [k for k in distinct if k in payloads and k not in ids]
+        for k, cache_id, payload in await _select_cache_rows(session, unknown):
+            memory.put(k, payload, cache_id)
+            ids[k] = cache_id
+
+    return payloads, ids, degraded
+
+
+async def get_weather_snapshots(
+    *,
+    session: AsyncSession,
+    points: Sequence[tuple[float, float, dt.datetime]],
+    http_client: httpx.AsyncClient | None = None,
+    sleep: Callable[[float], Any] | None = None,
+    concurrency: int | None = None,
+    check_canceled: Callable[[], Awaitable[None]] | None = None,
+) -> tuple[list[dict[str, object] | None], bool]:
+    """Batch lookup for (latitude, longitude, recorded_at) points.
+
+    Points are grouped by distinct (geohash, hour) key first. Keys are served
+    from the in-process LRU when possible, otherwise loaded from
+    `weather_cache` with bulk IN queries. Misses are fetched from Open-Meteo
+    one geohash-day range per request with at most `concurrency` requests in
+    flight (concurrent misses for the same day share one request), and all
+    returned hours are cached with bulk inserts. Keys whose
+    fetch failed are negatively cached for a short while. Returns (snapshots
+    aligned with `points`, degraded). `check_canceled` lets the caller abort
+    between provider requests and waits (see `_fetch_missing`).
+    """
+
+    keys = weather_keys(points)
+    payloads, _, degraded = await _lookup_weather(
+        session,
+        keys,
+        http_client=http_client,
+        sleep=sleep,
+        concurrency=concurrency,
+        check_canceled=check_canceled,
+        with_ids=False,
+    )
+    return [payloads.get(k) for k in keys], degraded
+
+
+async def get_weather_cache_entries(
+    *,
+    session: AsyncSession,
+    points: Sequence[tuple[float, float, dt.datetime]],
+    http_client: httpx.AsyncClient | None = None,
+    sleep: Callable[[float], Any] | None = None,
+    concurrency: int | None = None,
+    check_canceled: Callable[[], Awaitable[None]] | None = None,
+) -> tuple[list[tuple[int | None, dict[str, object]] | None], bool]:
+    """Like `get_weather_snapshots`, with each snapshot's `weather_cache.id`.
+
+    Returns ((cache id, snapshot) or None per point, degraded); the id is None
+    only if the snapshot could not be stored. Ids come with
+    the payloads from the LRU or the cache lookup; only keys fetched in this
+    call need one more IN query.
+    """
+
+    keys = weather_keys(points)
+    payloads, ids, degraded = await _lookup_weather(
+        session,
+        keys,
+        http_client=http_client,
+        sleep=sleep,
+        concurrency=concurrency,
+        check_canceled=check_canceled,
+        with_ids=True,
+    )
+    return [
+        (ids.get(k), payloads[k]) if k in payloads else None for k in keys
+    ], degraded
 
 
 async def get_weather_snapshot(
@@ -176,72 +941,61 @@ async def get_weather_snapshot(
     - degraded=True means provider failed; caller may mark job as PARTIAL.
     """
 
-    settings = get_settings()
-    precision = int(settings.weather_geohash_precision)
-
-    geohash_5 = encode(latitude, longitude, precision=precision)
-    hour_time = floor_to_hour_utc(recorded_at)
-
-    stmt = sa.select(WeatherCache).where(
-        WeatherCache.geohash_5 == geohash_5,
-        WeatherCache.hour_time == hour_time,
-    )
-    cached = (await session.execute(stmt)).scalar_one_or_none()
-    if cached is not None:
-        return cached.payload, False
-
-    # Query provider at the geohash cell center for stable caching.
-    lat_c, lon_c = decode_center(geohash_5)
-    client = OpenMeteoArchiveClient(
-        base_url=settings.open_meteo_archive_base_url,
-        timeout_s=float(settings.open_meteo_timeout_s),
-        max_retries=int(settings.open_meteo_max_retries),
-        backoff_base_s=float(settings.open_meteo_backoff_base_s),
+    snapshots, degraded = await get_weather_snapshots(
+        session=session,
+        points=[(latitude, longitude, recorded_at)],
         http_client=http_client,
         sleep=sleep,
     )
-    try:
-        payload = await client.get_hour_snapshot(
-            latitude=lat_c,
-            longitude=lon_c,
-            hour_time_utc=hour_time,
-        )
-    except WeatherProviderError:
-        return None, True
-
-    # Cache write: unique (geohash_5, hour_time).
-    values = {
-        "geohash_5": geohash_5,
-        "hour_time": hour_time,
-        "payload": payload,
-    }
+    return snapshots[0], degraded
 
-    dialect = session.bind.dialect.name if session.bind is not None else ""
-    if dialect == "sqlite":
-        from sqlalchemy.dialects.sqlite import insert as _insert
 
-        stmt_ins = (
-            _insert(WeatherCache.__table__)
-            .values(**values)
-            .on_conflict_do_nothing(index_elements=["geohash_5", "hour_time"])
+async def warm_weather_cache(
+    *,
+    session: AsyncSession,
+    start_at: dt.datetime,
+    end_at: dt.datetime,
+    http_client: httpx.AsyncClient | None = None,
+    sleep: Callable[[float], Any] | None = None,
+) -> dict[str, int]:
+    """Fill `weather_cache` for the points ingested in [start_at, end_at).
+
+    Points are picked by `created_at`, so late uploads of old tracks are warmed
+    too; hours recorded at or after `end_at` are skipped. Keys are looked up
+    through `get_weather_snapshots`, so already-cached keys cost nothing and
+    misses go through the same day-range fetches, rate limiter and
+    single-flight as export enrichment. Commits per batch.
+    """
+
+    settings = get_settings()
+    stmt = (
+        sa.select(TrackPoint.latitude, TrackPoint.longitude, TrackPoint.recorded_at)
+        .where(
+            TrackPoint.created_at >= start_at,
+            TrackPoint.created_at < end_at,
+            TrackPoint.recorded_at < end_at,
         )
-        await session.execute(stmt_ins)
-    elif dialect == "postgresql":
-        from sqlalchemy.dialects.postgresql import insert as _insert
-
-        stmt_ins = (
-            _insert(WeatherCache.__table__)
-            .values(**values)
-            .on_conflict_do_nothing(index_elements=["geohash_5", "hour_time"])
+        .execution_options(yield_per=5_000)
+    )
+    distinct: dict[WeatherKey, None] = {}
+    result = await session.stream(stmt)
+    async for partition in result.partitions():
+        distinct.update(dict.fromkeys(weather_keys(partition)))
+    keys = list(distinct)
+
+    batch_keys = max(1, int(settings.weather_warm_batch_keys))
+    unavailable = 0
+    for i in range(0, len(keys), batch_keys):
+        batch = keys[i : i + batch_keys]
+        snapshots, _ = await get_weather_snapshots(
+            session=session,
+            # Any point inside the cell maps back to the same key.
+            points=[(*decode_center(k.geohash_5), k.hour_time) for k in batch],
+            http_client=http_client,
+            sleep=sleep,
+            concurrency=int(settings.weather_warm_concurrency),
         )
-        await session.execute(stmt_ins)
-    else:
-        # Fallback: best-effort insert; if it races, ignore the error.
-        try:
-            async with session.begin_nested():
-                session.add(WeatherCache(**values))
-                await session.flush()
-        except Exception:
-            pass
+        await session.commit()
+        unavailable += sum(1 for snap in snapshots if snap is None)
 
-    return payload, False
+    return {"keys": len(keys), "unavailable": unavailable}
@@ -2,28 +2,27 @@ from __future__ import annotations
 
 import asyncio
 import datetime as dt
-import math
 import uuid
 from concurrent.futures import ThreadPoolExecutor
-from collections.abc import Callable
+from collections.abc import Callable, Sequence
 from typing import Any, Coroutine, TypeVar, cast
 
 import sqlalchemy as sa
 from sqlalchemy import Table, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.settings import get_settings
 from app.db.session import get_sessionmaker
+from app.models.anti_cheat_reaudit import AntiCheatReauditJob, AntiCheatReauditShard
+from app.models.anti_cheat_watermark import AntiCheatWatermark
 from app.models.track_point import TrackPoint
+from app.models.user import User
+from app.services.anti_cheat_rules import RULES, Prev, RuleSet, build_segment
 from app.tasks.celery_app import celery_app
 
-# Hard-rule thresholds (see plan-supplement Anti-Cheat section).
-_MAX_STEP_RATE_STEPS_PER_SEC = 4.0
-_MIN_STEP_LENGTH_M = 0.3
-_MAX_STEP_LENGTH_M = 2.5
-
-# Conservative "teleportation" detection: only flag clearly impossible jumps.
-# We offset distance by reported GPS accuracy so we don't punish noisy points.
-_TELEPORT_SPEED_MPS = 120.0  # ~432 km/h
-_ACCURACY_FUDGE_M = 5.0
+# Rows per set-based `UPDATE ... FROM (VALUES ...)` on PostgreSQL.
+_FLAG_UPDATE_BATCH = 1_000
 
 
 _T = TypeVar("_T")
@@ -47,53 +46,244 @@ def _coerce_datetime(value: dt.datetime | str) -> dt.datetime:
     return out
 
 
-def _haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    # WGS84-ish spherical distance; sufficient for anti-cheat heuristics.
-    r = 6_371_000.0
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
+async def _user_rules(session: AsyncSession, user_id: uuid.UUID) -> RuleSet:
+    user = await session.get(User, user_id)
+    return RuleSet.for_user_settings(user.settings if user is not None else None)
+
+
+# Set-based audit (PostgreSQL).
+#
+# The same rules as one UPDATE: LAG() pairs each point with its predecessor
+# per user, the haversine runs in SQL (explicitly rather than PostGIS
+# ST_DistanceSphere, whose earth radius differs, so flags agree with the Python
+# engine), and only rows whose flag flips are written. Only rule sets whose
+# enabled rules all have a SQL form (`RuleSet.sql_compatible`) run here.
+
+
+def _sql_flags_cte(
+    *,
+    user_id: uuid.UUID | None,
+    start_at: dt.datetime | None,
+    end_at: dt.datetime | None,
+    rules: RuleSet,
+    exclude_user_ids: Sequence[uuid.UUID] = (),
+) -> sa.CTE:
+    """CTE of (id, was_dirty, was_reasons, reasons) for the points to audit.
+
+    With `user_id`, points in [start_at, end_at] are evaluated against their
+    actual predecessor; without, every user's track is evaluated except those
+    in `exclude_user_ids`.
+    """
 
-    a = (
-        math.sin(dphi / 2.0) ** 2
-        + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2.0) ** 2
+    tp = cast(Table, TrackPoint.__table__)
+    order = (tp.c.recorded_at.asc(), tp.c.id.asc())
+
+    def _lag(col: sa.ColumnElement[Any]) -> sa.ColumnElement[Any]:
+        return sa.func.lag(col).over(partition_by=tp.c.user_id, order_by=order)
+
+    seg = sa.select(
+        tp.c.id,
+        tp.c.recorded_at,
+        tp.c.latitude,
+        tp.c.longitude,
+        tp.c.accuracy,
+        tp.c.step_delta,
+        tp.c.is_dirty,
+        tp.c.dirty_reasons,
+        _lag(tp.c.recorded_at).label("p_recorded_at"),
+        _lag(tp.c.latitude).label("p_latitude"),
+        _lag(tp.c.longitude).label("p_longitude"),
+        _lag(tp.c.accuracy).label("p_accuracy"),
+    )
+    if user_id is not None:
+        seg = seg.where(tp.c.user_id == user_id)
+        if start_at is not None:
+            # Reach back exactly one point so LAG() sees the real predecessor.
+            before = (
+                sa.select(sa.func.max(tp.c.recorded_at))
+                .where(tp.c.user_id == user_id)
+                .where(tp.c.recorded_at < start_at)
+                .scalar_subquery()
+            )
+            seg = seg.where(tp.c.recorded_at >= sa.func.coalesce(before, start_at))
+    elif exclude_user_ids:
+        seg = seg.where(tp.c.user_id.not_in(exclude_user_ids))
+    if end_at is not None:
+        seg = seg.where(tp.c.recorded_at <= end_at)
+    s = seg.subquery("seg")
+
+    def _f(value: float) -> sa.ColumnElement[float]:
+        return sa.literal(value, sa.Float)
+
+    def _sin2(delta: sa.ColumnElement[Any]) -> sa.ColumnElement[float]:
+        return sa.func.power(sa.func.sin(sa.func.radians(delta) / _f(2.0)), _f(2.0))
+
+    # Per-pair quantities once, then the rules over them.
+    a = _sin2(s.c.latitude - s.c.p_latitude) + sa.func.cos(
+        sa.func.radians(s.c.p_latitude)
+    ) * sa.func.cos(sa.func.radians(s.c.latitude)) * _sin2(
+        s.c.longitude - s.c.p_longitude
     )
-    return 2.0 * r * math.asin(math.sqrt(a))
+    dist_m = _f(2.0 * 6_371_000.0) * sa.func.asin(sa.func.sqrt(a))
+    pairs = sa.select(
+        s.c.id,
+        s.c.recorded_at,
+        s.c.is_dirty,
+        s.c.dirty_reasons,
+        s.c.p_recorded_at,
+        dist_m.label("dist_m"),
+        (
+            sa.func.coalesce(s.c.p_accuracy, _f(0.0))
+            + sa.func.coalesce(s.c.accuracy, _f(0.0))
+        ).label("accuracy_sum_m"),
+        sa.cast(
+            sa.extract("epoch", s.c.recorded_at - s.c.p_recorded_at), sa.Float
+        ).label("dt_s"),
+        sa.cast(sa.func.coalesce(s.c.step_delta, 0), sa.Float).label("steps"),
+    ).subquery("pairs")
+    p = pairs.c
+    steps = sa.func.nullif(p.steps, _f(0.0))
+
+    def _effective_dist_m(fudge: float) -> sa.ColumnElement[float]:
+        return sa.func.greatest(_f(0.0), p.dist_m - (p.accuracy_sum_m + _f(fudge)))
+
+    # Conditions of the enabled rules, split by which side of dt_s = 0 they
+    # apply to (the CASE keeps divisions by dt_s on the positive side).
+    same_time: list[tuple[str, sa.ColumnElement[bool]]] = []
+    moving: list[tuple[str, sa.ColumnElement[bool]]] = []
+    if (q := rules.params("time_order")) is not None:
+        same_time.append(
+            (
+                "time_order",
+                sa.or_(
+                    p.steps > _f(0.0),
+                    _effective_dist_m(q["accuracy_fudge_m"]) > _f(0.0),
+                ),
+            )
+        )
+    if (q := rules.params("step_rate")) is not None:
+        moving.append(
+            (
+                "step_rate",
+                sa.and_(p.steps > _f(0.0), steps / p.dt_s > _f(q["max_steps_per_s"])),
+            )
+        )
+    if (q := rules.params("step_length")) is not None:
+        moving.append(
+            (
+                "step_length",
+                sa.and_(
+                    p.steps > _f(0.0),
+                    sa.or_(
+                        p.dist_m / steps < _f(q["min_m"]),
+                        p.dist_m / steps > _f(q["max_m"]),
+                    ),
+                ),
+            )
+        )
+    if (q := rules.params("teleport")) is not None:
+        moving.append(
+            (
+                "teleport",
+                _effective_dist_m(q["accuracy_fudge_m"]) / p.dt_s
+                > _f(q["max_speed_mps"]),
+            )
+        )
 
+    def _mask(conds: list[tuple[str, sa.ColumnElement[bool]]]) -> sa.ColumnElement[int]:
+        # Sum of distinct bits == their OR.
+        out: sa.ColumnElement[int] = sa.literal(0, sa.Integer)
+        for name, cond in conds:
+            out = out + sa.case((cond, RULES[name].bit), else_=0)
+        return out
+
+    reasons = sa.case(
+        (p.p_recorded_at.is_(None), 0),
+        (p.dt_s <= _f(0.0), _mask(same_time)),
+        else_=_mask(moving),
+    )
 
-def _is_point_dirty(prev: TrackPoint | None, cur: TrackPoint) -> bool:
-    if prev is None:
-        # No segment to evaluate yet.
-        return False
+    flags = sa.select(
+        p.id,
+        p.is_dirty.label("was_dirty"),
+        p.dirty_reasons.label("was_reasons"),
+        reasons.label("reasons"),
+    )
+    if user_id is not None and start_at is not None:
+        # The reached-back predecessor is context only.
+        flags = flags.where(p.recorded_at >= start_at)
+    return flags.cte("flags")
 
-    dt_s = (cur.recorded_at - prev.recorded_at).total_seconds()
-    step_delta = int(cur.step_delta or 0)
 
-    dist_m = _haversine_m(prev.latitude, prev.longitude, cur.latitude, cur.longitude)
-    acc_prev = float(prev.accuracy or 0.0)
-    acc_cur = float(cur.accuracy or 0.0)
-    effective_dist_m = max(0.0, dist_m - (acc_prev + acc_cur + _ACCURACY_FUDGE_M))
+def _audit_sql_stmt(
+    *,
+    user_id: uuid.UUID | None = None,
+    start_at: dt.datetime | None = None,
+    end_at: dt.datetime | None = None,
+    rules: RuleSet | None = None,
+    exclude_user_ids: Sequence[uuid.UUID] = (),
+) -> sa.Select[tuple[int, int, int]]:
+    """One statement that writes changed flags and reasons.
+
+    Returns (updated, dirty, total).
+    """
 
-    if dt_s <= 0:
-        # Same timestamp (or out-of-order). Any positive steps or real movement is impossible.
-        return step_delta > 0 or effective_dist_m > 0.0
+    tp = cast(Table, TrackPoint.__table__)
+    flags = _sql_flags_cte(
+        user_id=user_id,
+        start_at=start_at,
+        end_at=end_at,
+        rules=rules or RuleSet.default(),
+        exclude_user_ids=exclude_user_ids,
+    )
+    dirty = flags.c.reasons != 0
+    flipped = (
+        sa.update(tp)
+        .where(tp.c.id == flags.c.id)
+        .where(
+            sa.or_(flags.c.was_dirty != dirty, flags.c.was_reasons != flags.c.reasons)
+        )
+        .values(is_dirty=dirty, dirty_reasons=flags.c.reasons)
+        .returning(tp.c.id)
+        .cte("flipped")
+    )
+    return sa.select(
+        sa.select(sa.func.count()).select_from(flipped).scalar_subquery(),
+        sa.func.count().filter(dirty),
+        sa.func.count(),
+    ).select_from(flags)
 
-    # Hard rule: impossible step rate.
-    if step_delta > 0 and (step_delta / dt_s) > _MAX_STEP_RATE_STEPS_PER_SEC:
-        return True
 
-    # Hard rule: implausible step length.
-    if step_delta > 0:
-        step_len = dist_m / step_delta
-        if step_len < _MIN_STEP_LENGTH_M or step_len > _MAX_STEP_LENGTH_M:
-            return True
+async def _audit_sql(
+    session: AsyncSession,
+    *,
+    user_id: uuid.UUID | None = None,
+    start_at: dt.datetime | None = None,
+    end_at: dt.datetime | None = None,
+    rules: RuleSet | None = None,
+    exclude_user_ids: Sequence[uuid.UUID] = (),
+) -> dict[str, int]:
+    """Evaluate and write `is_dirty` inside PostgreSQL in one statement."""
+
+    stmt = _audit_sql_stmt(
+        user_id=user_id,
+        start_at=start_at,
+        end_at=end_at,
+        rules=rules,
+        exclude_user_ids=exclude_user_ids,
+    )
+    updated, dirty, total = (await session.execute(stmt)).one()
+    await session.commit()
+    return {"updated": int(updated), "dirty": int(dirty), "clean": total - dirty}
 
-    # Hard rule: teleportation / impossible speed jump.
-    if (effective_dist_m / dt_s) > _TELEPORT_SPEED_MPS:
-        return True
 
-    return False
+def _use_sql_engine(session: AsyncSession, rules: RuleSet) -> bool:
+    dialect = session.bind.dialect.name if session.bind is not None else ""
+    return (
+        get_settings().anti_cheat_engine == "sql"
+        and dialect == "postgresql"
+        and rules.sql_compatible
+    )
 
 
 def _run_coro_sync(coro_factory: Callable[[], Coroutine[Any, Any, _T]]) -> _T:
@@ -114,6 +304,139 @@ def _run_coro_sync(coro_factory: Callable[[], Coroutine[Any, Any, _T]]) -> _T:
         return fut.result()
 
 
+async def _write_dirty_flags(
+    session: AsyncSession, changed: list[tuple[int, bool, int]]
+) -> None:
+    """Write (id, is_dirty, dirty_reasons) for each changed point."""
+
+    table = cast(Table, TrackPoint.__table__)
+    dialect = session.bind.dialect.name if session.bind is not None else ""
+    if dialect == "postgresql":
+        # One set-based statement per batch instead of a statement per row.
+        for i in range(0, len(changed), _FLAG_UPDATE_BATCH):
+            flips = sa.values(
+                sa.column("id", sa.BigInteger),
+                sa.column("is_dirty", sa.Boolean),
+                sa.column("dirty_reasons", sa.Integer),
+                name="flips",
+            ).data(changed[i : i + _FLAG_UPDATE_BATCH])
+            await session.execute(
+                sa.update(table)
+                .where(table.c.id == flips.c.id)
+                .values(is_dirty=flips.c.is_dirty, dirty_reasons=flips.c.dirty_reasons)
+            )
+        return
+
+    update_stmt = (
+        # Use a Core table update to avoid ORM session synchronization errors
+        # when doing executemany-style bulk updates.
+        sa.update(table)
+        .where(table.c.id == sa.bindparam("b_id"))
+        .values(
+            is_dirty=sa.bindparam("is_dirty"),
+            dirty_reasons=sa.bindparam("dirty_reasons"),
+        )
+    )
+    await session.execute(
+        update_stmt,
+        [
+            {"b_id": pid, "is_dirty": dirty, "dirty_reasons": reasons}
+            for pid, dirty, reasons in changed
+        ],
+    )
+
+
+def _as_utc(ts: dt.datetime) -> dt.datetime:
+    # SQLite hands back naive datetimes for timezone-aware columns.
+    return ts if ts.tzinfo is not None else ts.replace(tzinfo=dt.timezone.utc)
+
+
+# What the rules read from a point, and from its predecessor.
+_AUDIT_COLUMNS = (
+    TrackPoint.id,
+    TrackPoint.recorded_at,
+    TrackPoint.latitude,
+    TrackPoint.longitude,
+    TrackPoint.accuracy,
+    TrackPoint.step_delta,
+    TrackPoint.altitude,
+    TrackPoint.activity_type,
+    TrackPoint.is_dirty,
+    TrackPoint.dirty_reasons,
+)
+_PREV_COLUMNS = (
+    TrackPoint.recorded_at,
+    TrackPoint.latitude,
+    TrackPoint.longitude,
+    TrackPoint.accuracy,
+    TrackPoint.altitude,
+)
+
+
+def _audit_rows(
+    rows: Sequence[sa.Row[Any]], *, prev: Prev | None, rules: RuleSet
+) -> tuple[list[bool], list[tuple[int, bool, int]]]:
+    """Flags for `_AUDIT_COLUMNS` rows, and the (id, flag, reasons) that change."""
+
+    ids, recorded_at, lats, lons, accs, steps, alts, acts, cur_flags, cur_reasons = zip(
+        *rows
+    )
+    if prev is not None and (prev[0].tzinfo is None) != (recorded_at[0].tzinfo is None):
+        # Checkpointed predecessors are tz-aware; SQLite rows are not.
+        prev = (_as_utc(prev[0]), *prev[1:])
+        recorded_at = tuple(_as_utc(ts) for ts in recorded_at)
+    seg = build_segment(
+        recorded_at,
+        lats,
+        lons,
+        accs,
+        steps,
+        altitudes=alts,
+        activity_types=acts,
+        prev=prev,
+    )
+    result = rules.evaluate(seg)
+    # Re-audits mostly reproduce the stored values; only write what changed.
+    changed = [
+        (pid, dirty, reasons)
+        for pid, dirty, reasons, was_dirty, was_reasons in zip(
+            ids, result.flags, result.reasons, cur_flags, cur_reasons
+        )
+        if reasons != was_reasons or dirty != bool(was_dirty)
+    ]
+    return result.flags, changed
+
+
+async def _advance_watermark(
+    session: AsyncSession,
+    *,
+    user_id: uuid.UUID,
+    mark: AntiCheatWatermark | None,
+    last: sa.Row[Any],
+) -> None:
+    """Move the user's watermark to `last` unless it already points later."""
+
+    if mark is not None and (_as_utc(mark.last_recorded_at), mark.last_point_id) > (
+        _as_utc(last.recorded_at),
+        last.id,
+    ):
+        return
+    if mark is None:
+        mark = AntiCheatWatermark(user_id=user_id)
+        session.add(mark)
+    mark.last_point_id = last.id
+    mark.last_recorded_at = last.recorded_at
+    mark.last_latitude = last.latitude
+    mark.last_longitude = last.longitude
+    mark.last_accuracy = last.accuracy
+    mark.last_altitude = last.altitude
+    try:
+        await session.commit()
+    except IntegrityError:
+        # A concurrent audit created the row first; its watermark stands.
+        await session.rollback()
+
+
 async def _audit_track_segment(
     *,
     user_id: uuid.UUID,
@@ -122,52 +445,73 @@ async def _audit_track_segment(
 ) -> dict[str, int]:
     sessionmaker = get_sessionmaker()
     async with sessionmaker() as session:
-        prev_stmt = (
-            select(TrackPoint)
-            .where(TrackPoint.user_id == user_id)
-            .where(TrackPoint.recorded_at < start_at)
-            .order_by(TrackPoint.recorded_at.desc())
-            .limit(1)
-        )
-        prev = (await session.execute(prev_stmt)).scalars().first()
+        rules = await _user_rules(session, user_id)
+        if _use_sql_engine(session, rules):
+            # The predecessor comes from LAG(), so no watermark is needed.
+            return await _audit_sql(
+                session, user_id=user_id, start_at=start_at, end_at=end_at, rules=rules
+            )
+
+        mark = await session.get(AntiCheatWatermark, user_id)
+
+        prev: Prev | None
+        if mark is not None and start_at > _as_utc(mark.last_recorded_at):
+            # Appended data: resume right after the watermark, so only points
+            # not yet audited are read (including any gap before start_at).
+            prev = (
+                mark.last_recorded_at,
+                mark.last_latitude,
+                mark.last_longitude,
+                mark.last_accuracy,
+                mark.last_altitude,
+            )
+            # Points sharing the watermark's timestamp are ordered by id.
+            window_start = sa.or_(
+                TrackPoint.recorded_at > mark.last_recorded_at,
+                sa.and_(
+                    TrackPoint.recorded_at == mark.last_recorded_at,
+                    TrackPoint.id > mark.last_point_id,
+                ),
+            )
+        else:
+            # First audit, or points back-filled at/before the watermark:
+            # re-audit the requested window from its actual predecessor.
+            # Plain column rows: ORM hydration would dominate long audits.
+            prev_stmt = (
+                select(*_PREV_COLUMNS)
+                .where(TrackPoint.user_id == user_id)
+                .where(TrackPoint.recorded_at < start_at)
+                .order_by(TrackPoint.recorded_at.desc(), TrackPoint.id.desc())
+                .limit(1)
+            )
+            prev_row = (await session.execute(prev_stmt)).first()
+            prev = cast(Prev, tuple(prev_row)) if prev_row is not None else None
+            window_start = TrackPoint.recorded_at >= start_at
 
         points_stmt = (
-            select(TrackPoint)
+            select(*_AUDIT_COLUMNS)
             .where(TrackPoint.user_id == user_id)
-            .where(TrackPoint.recorded_at >= start_at)
+            .where(window_start)
             .where(TrackPoint.recorded_at <= end_at)
-            .order_by(TrackPoint.recorded_at.asc())
+            .order_by(TrackPoint.recorded_at.asc(), TrackPoint.id.asc())
         )
-        points = list((await session.execute(points_stmt)).scalars().all())
+        rows = (await session.execute(points_stmt)).all()
 
-        if not points:
+        if not rows:
             return {"updated": 0, "dirty": 0, "clean": 0}
 
-        updates: list[dict[str, object]] = []
-        dirty_count = 0
-        cur_prev = prev
-        for p in points:
-            dirty = _is_point_dirty(cur_prev, p)
-            if dirty:
-                dirty_count += 1
-            updates.append({"b_id": p.id, "is_dirty": dirty})
-            cur_prev = p
-
-        table = cast(Table, TrackPoint.__table__)
-        update_stmt = (
-            # Use a Core table update to avoid ORM session synchronization errors
-            # when doing executemany-style bulk updates.
-            sa.update(table)
-            .where(table.c.id == sa.bindparam("b_id"))
-            .values(is_dirty=sa.bindparam("is_dirty"))
-        )
-        await session.execute(update_stmt, updates)
+        flags, changed = _audit_rows(rows, prev=prev, rules=rules)
+        dirty_count = sum(flags)
+        if changed:
+            await _write_dirty_flags(session, changed)
         await session.commit()
 
+        await _advance_watermark(session, user_id=user_id, mark=mark, last=rows[-1])
+
         return {
-            "updated": len(updates),
+            "updated": len(changed),
             "dirty": dirty_count,
-            "clean": len(updates) - dirty_count,
+            "clean": len(flags) - dirty_count,
         }
 
 
@@ -193,3 +537,314 @@ def audit_track_segment_task(
     return _run_coro_sync(
         lambda: _audit_track_segment(user_id=uid, start_at=start_dt, end_at=end_dt)
     )
+
+
+async def _reaudit_all_sql() -> dict[str, int]:
+    sessionmaker = get_sessionmaker()
+    async with sessionmaker() as session:
+        dialect = session.bind.dialect.name if session.bind is not None else ""
+        if dialect != "postgresql":
+            raise RuntimeError("set-based re-audit requires PostgreSQL")
+
+        # Users with their own rule configuration are audited one by one.
+        overrides: dict[uuid.UUID, RuleSet] = {}
+        users = await session.execute(
+            select(User.id, User.settings).where(User.settings.is_not(None))
+        )
+        for uid, user_settings in users:
+            rules = RuleSet.for_user_settings(user_settings)
+            if rules != RuleSet.default():
+                overrides[uid] = rules
+
+        total = await _audit_sql(session, exclude_user_ids=list(overrides))
+        for uid, rules in overrides.items():
+            if rules.sql_compatible:
+                out = await _audit_sql(session, user_id=uid, rules=rules)
+            else:
+                out = await _audit_track_segment(
+                    user_id=uid,
+                    start_at=dt.datetime.min.replace(tzinfo=dt.timezone.utc),
+                    end_at=dt.datetime.max.replace(tzinfo=dt.timezone.utc),
+                )
+            for key, value in out.items():
+                total[key] += value
+        return total
+
+
+@celery_app.task(name="app.tasks.anti_cheat.reaudit_all_sql_task")
+def reaudit_all_sql_task() -> dict[str, int]:
+    """Re-evaluate `is_dirty` for every user's whole track in one statement.
+
+    PostgreSQL only; nothing is loaded into the worker. Users with their own
+    anti-cheat rules get a statement each (or the Python engine, for rules
+    without a SQL form).
+    """
+
+    return _run_coro_sync(_reaudit_all_sql)
+
+
+# Sharded bulk re-audit.
+#
+# An admin-triggered job plans one shard per user and time window (at most
+# `anti_cheat_reaudit_shard_days` long) and fans them out as separate Celery
+# tasks. Each shard walks its points in keyset pages of
+# `anti_cheat_reaudit_chunk_rows`, committing flag flips, counters and a
+# checkpoint after every page, so a retried shard resumes where it stopped.
+
+
+def _plan_shards(
+    first: dt.datetime, last: dt.datetime, *, days: int
+) -> list[tuple[dt.datetime, dt.datetime]]:
+    """Split [first, last] into consecutive inclusive windows of `days` days."""
+
+    span = dt.timedelta(days=max(1, days))
+    out: list[tuple[dt.datetime, dt.datetime]] = []
+    start = first
+    while start + span <= last:
+        out.append((start, start + span - dt.timedelta(microseconds=1)))
+        start += span
+    out.append((start, last))
+    return out
+
+
+async def _start_reaudit_job(*, job_id: uuid.UUID) -> list[int]:
+    settings = get_settings()
+    sessionmaker = get_sessionmaker()
+    async with sessionmaker() as session:
+        job = await session.get(AntiCheatReauditJob, job_id)
+        if job is None:
+            raise ValueError("Re-audit job not found")
+        if job.state != "CREATED":
+            # Already planned; redelivery must not enqueue the shards twice.
+            return []
+
+        spans = (
+            await session.execute(
+                select(
+                    TrackPoint.user_id,
+                    sa.func.min(TrackPoint.recorded_at),
+                    sa.func.max(TrackPoint.recorded_at),
+                )
+                .group_by(TrackPoint.user_id)
+                .order_by(TrackPoint.user_id)
+            )
+        ).all()
+        shards = [
+            AntiCheatReauditShard(
+                job_id=job.id, user_id=uid, start_at=start, end_at=end, state="PENDING"
+            )
+            for uid, first, last in spans
+            for start, end in _plan_shards(
+                _as_utc(first),
+                _as_utc(last),
+                days=settings.anti_cheat_reaudit_shard_days,
+            )
+        ]
+        session.add_all(shards)
+
+        now = dt.datetime.now(dt.timezone.utc)
+        job.shards_total = len(shards)
+        job.started_at = now
+        if shards:
+            job.state = "RUNNING"
+        else:
+            job.state = "SUCCEEDED"
+            job.finished_at = now
+        await session.commit()
+        return [shard.id for shard in shards]
+
+
+@celery_app.task(name="app.tasks.anti_cheat.start_reaudit_job_task")
+def start_reaudit_job_task(job_id: str) -> dict[str, Any]:
+    """Plan a bulk re-audit job into shards and enqueue one task per shard."""
+
+    jid = uuid.UUID(str(job_id))
+    shard_ids = _run_coro_sync(lambda: _start_reaudit_job(job_id=jid))
+    for shard_id in shard_ids:
+        cast(Any, reaudit_shard_task).delay(shard_id)
+    return {"job_id": str(jid), "shards": len(shard_ids)}
+
+
+def _checkpoint_prev(checkpoint: dict[str, Any]) -> Prev:
+    ts, lat, lon, acc, *alt = checkpoint["prev"]
+    return _coerce_datetime(ts), lat, lon, acc, alt[0] if alt else None
+
+
+async def _reaudit_shard_chunks(
+    session: AsyncSession,
+    shard: AntiCheatReauditShard,
+    *,
+    chunk_rows: int,
+    rules: RuleSet,
+) -> None:
+    prev: Prev | None
+    after: tuple[dt.datetime, int] | None
+    if shard.checkpoint:
+        prev = _checkpoint_prev(shard.checkpoint)
+        after = (
+            _coerce_datetime(shard.checkpoint["after_recorded_at"]),
+            int(shard.checkpoint["after_id"]),
+        )
+    else:
+        prev_stmt = (
+            select(*_PREV_COLUMNS)
+            .where(TrackPoint.user_id == shard.user_id)
+            .where(TrackPoint.recorded_at < shard.start_at)
+            .order_by(TrackPoint.recorded_at.desc(), TrackPoint.id.desc())
+            .limit(1)
+        )
+        prev_row = (await session.execute(prev_stmt)).first()
+        prev = cast(Prev, tuple(prev_row)) if prev_row is not None else None
+        after = None
+
+    while True:
+        stmt = (
+            select(*_AUDIT_COLUMNS)
+            .where(TrackPoint.user_id == shard.user_id)
+            .where(TrackPoint.recorded_at <= shard.end_at)
+            .order_by(TrackPoint.recorded_at.asc(), TrackPoint.id.asc())
+            .limit(chunk_rows)
+        )
+        if after is None:
+            stmt = stmt.where(TrackPoint.recorded_at >= shard.start_at)
+        else:
+            after_at, after_id = after
+            stmt = stmt.where(
+                sa.or_(
+                    TrackPoint.recorded_at > after_at,
+                    sa.and_(
+                        TrackPoint.recorded_at == after_at, TrackPoint.id > after_id
+                    ),
+                )
+            )
+        rows = (await session.execute(stmt)).all()
+        if not rows:
+            return
+
+        flags, changed = _audit_rows(rows, prev=prev, rules=rules)
+        if changed:
+            await _write_dirty_flags(session, changed)
+
+        last = rows[-1]
+        last_at = _as_utc(last.recorded_at)
+        prev = (last_at, last.latitude, last.longitude, last.accuracy, last.altitude)
+        after = (last_at, last.id)
+        shard.points_audited += len(rows)
+        shard.points_dirty += sum(flags)
+        shard.points_updated += len(changed)
+        shard.checkpoint = {
+            "after_recorded_at": last_at.isoformat(),
+            "after_id": last.id,
+            "prev": [last_at.isoformat(), *prev[1:]],
+        }
+        # Flips and the checkpoint that covers them commit together.
+        await session.commit()
+
+        if len(rows) < chunk_rows:
+            return
+
+
+async def _run_reaudit_shard(*, shard_id: int) -> dict[str, Any]:
+    settings = get_settings()
+    sessionmaker = get_sessionmaker()
+    async with sessionmaker() as session:
+        shard = await session.get(AntiCheatReauditShard, shard_id)
+        if shard is None:
+            raise ValueError("Re-audit shard not found")
+        if shard.state != "DONE":
+            jobs = cast(Table, AntiCheatReauditJob.__table__)
+            shards = cast(Table, AntiCheatReauditShard.__table__)
+            job_id = shard.job_id
+            shard.state = "RUNNING"
+            shard.started_at = shard.started_at or dt.datetime.now(dt.timezone.utc)
+            shard.error_message = None
+            await session.commit()
+
+            try:
+                rules = await _user_rules(session, shard.user_id)
+                if _use_sql_engine(session, rules):
+                    # One statement per shard; nothing to page or checkpoint.
+                    result = await _audit_sql(
+                        session,
+                        user_id=shard.user_id,
+                        start_at=shard.start_at,
+                        end_at=shard.end_at,
+                        rules=rules,
+                    )
+                    shard.points_audited = result["dirty"] + result["clean"]
+                    shard.points_dirty = result["dirty"]
+                    shard.points_updated = result["updated"]
+                else:
+                    await _reaudit_shard_chunks(
+                        session,
+                        shard,
+                        chunk_rows=max(1, settings.anti_cheat_reaudit_chunk_rows),
+                        rules=rules,
+                    )
+            except Exception as exc:
+                # Committed chunks (and their checkpoint) stay; a retry resumes.
+                await session.rollback()
+                now = dt.datetime.now(dt.timezone.utc)
+                await session.execute(
+                    sa.update(shards)
+                    .where(shards.c.id == shard_id)
+                    .values(
+                        state="FAILED",
+                        error_message=str(exc)[:1000],
+                        finished_at=now,
+                        updated_at=now,
+                    )
+                )
+                await session.execute(
+                    sa.update(jobs)
+                    .where(jobs.c.id == job_id)
+                    .where(jobs.c.state == "RUNNING")
+                    .values(
+                        state="FAILED",
+                        error_message=f"Shard {shard_id} failed",
+                        updated_at=now,
+                    )
+                )
+                await session.commit()
+                raise
+
+            now = dt.datetime.now(dt.timezone.utc)
+            shard.state = "DONE"
+            shard.finished_at = now
+            # Counter bump in SQL: sibling shards finish concurrently.
+            await session.execute(
+                sa.update(jobs)
+                .where(jobs.c.id == job_id)
+                .values(shards_done=jobs.c.shards_done + 1, updated_at=now)
+            )
+            # The last shard closes the job; a retried shard can heal a FAILED one.
+            await session.execute(
+                sa.update(jobs)
+                .where(jobs.c.id == job_id)
+                .where(jobs.c.shards_done >= jobs.c.shards_total)
+                .where(jobs.c.state.in_(("RUNNING", "FAILED")))
+                .values(state="SUCCEEDED", error_message=None, finished_at=now)
+            )
+            await session.commit()
+
+        return {
+            "shard_id": shard.id,
+            "state": shard.state,
+            "audited": shard.points_audited,
+            "updated": shard.points_updated,
+            "dirty": shard.points_dirty,
+        }
+
+
+# Acked only once the shard returns: a lost worker's shard is redelivered and
+# resumes from its checkpoint. Failed shards are re-enqueued by the admin
+# retry endpoint.
+@celery_app.task(
+    name="app.tasks.anti_cheat.reaudit_shard_task",
+    acks_late=True,
+    reject_on_worker_lost=True,
+)
+def reaudit_shard_task(shard_id: int) -> dict[str, Any]:
+    """Re-audit one shard of a bulk job, resuming from its checkpoint if any."""
+
+    return _run_coro_sync(lambda: _run_reaudit_shard(shard_id=int(shard_id)))
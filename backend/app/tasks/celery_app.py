@@ -7,6 +7,10 @@ from celery import Celery
 from app.core.settings import Settings, get_settings
 
 
+# Low-priority queue for cache warming; default workers do not consume it.
+WEATHER_WARM_QUEUE = "weather-warm"
+
+
 def create_celery_app(settings: Settings | None = None) -> Celery:
     """Create and configure the project's Celery application.
 
@@ -23,9 +27,23 @@ def create_celery_app(settings: Settings | None = None) -> Celery:
             "app.tasks.anti_cheat",
             "app.tasks.export",
             "app.tasks.life_event",
+            "app.tasks.weather",
         ],
     )
 
+    # Only takes effect when a `celery beat` process runs alongside workers.
+    app.conf.beat_schedule = {
+        "warm-weather-cache": {
+            "task": "app.tasks.weather.warm_weather_cache_task",
+            "schedule": 3600.0,
+        },
+    }
+    # Background warming gets its own queue so it never delays user-facing
+    # jobs; consume it with a small worker (`celery worker -Q weather-warm`).
+    app.conf.task_routes = {
+        "app.tasks.weather.warm_weather_cache_task": {"queue": WEATHER_WARM_QUEUE},
+    }
+
     if settings.celery_eager:
         app.conf.update(
             task_always_eager=True,
@@ -42,6 +60,9 @@ def create_celery_app(settings: Settings | None = None) -> Celery:
 
     app.conf.update(
         broker_url=broker_url,
+        broker_transport_options={
+            "visibility_timeout": settings.celery_visibility_timeout_s
+        },
         task_always_eager=False,
         task_eager_propagates=False,
     )
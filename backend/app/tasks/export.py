@@ -1,21 +1,31 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import csv
 import datetime as dt
+import importlib.util
 import io
 import json
+import os
+import shutil
+import tempfile
+import time
 import uuid
-import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
 from concurrent.futures import ThreadPoolExecutor
-from collections.abc import Callable
+from dataclasses import dataclass
+from collections.abc import AsyncIterator, Callable, Iterable, Sequence
 from pathlib import Path
-from typing import Any, Coroutine, TypeVar
+from typing import Any, BinaryIO, Coroutine, TypeVar, cast
+from xml.sax.saxutils import escape as xml_escape
 from zoneinfo import ZoneInfo
 
 import httpx
 import sqlalchemy as sa
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.core.settings import get_settings
 from app.db.base import utcnow
@@ -28,6 +38,12 @@ from app.tasks.celery_app import celery_app
 
 _T = TypeVar("_T")
 
+# Columnar formats need the optional `pyarrow` dependency (extra: columnar).
+COLUMNAR_FORMATS = frozenset({"Parquet", "Arrow"})
+
+# Rows per Arrow record batch / Parquet row group; bounds writer memory.
+_COLUMNAR_BATCH_ROWS = 65_536
+
 
 def _run_coro_sync(coro_factory: Callable[[], Coroutine[Any, Any, _T]]) -> _T:
     """Run an async coroutine from a sync context.
@@ -47,7 +63,7 @@ def _run_coro_sync(coro_factory: Callable[[], Coroutine[Any, Any, _T]]) -> _T:
         return fut.result()
 
 
-def _tzinfo_from_name(name: str) -> dt.tzinfo:
+def tzinfo_from_name(name: str) -> dt.tzinfo:
     if name.upper() == "UTC":
         return dt.timezone.utc
     try:
@@ -57,7 +73,7 @@ def _tzinfo_from_name(name: str) -> dt.tzinfo:
         return dt.timezone.utc
 
 
-def _format_dt(ts: dt.datetime, tz: dt.tzinfo) -> str:
+def format_dt(ts: dt.datetime, tz: dt.tzinfo) -> str:
     out = ts.astimezone(tz)
     if tz is dt.timezone.utc:
         # Keep a stable Z suffix for common clients.
@@ -75,146 +91,677 @@ def _export_ext(fmt: str) -> str:
             return "geojson"
         case "KML":
             return "kml"
+        case "Parquet":
+            return "parquet"
+        case "Arrow":
+            return "arrow"
         case _:
             # Should be prevented at API boundary.
             return "bin"
 
 
-def _csv_bytes(points: list[TrackPoint], tz: dt.tzinfo) -> bytes:
-    buf = io.StringIO(newline="")
-    w = csv.writer(buf)
-    w.writerow(
-        [
-            "client_point_id",
-            "recorded_at",
-            "latitude",
-            "longitude",
-            "accuracy",
-            "altitude",
-            "speed",
-            "is_dirty",
-            "weather_snapshot_json",
-        ]
+def _weather_json(p: TrackPoint) -> str | None:
+    if p.weather_snapshot is None:
+        return None
+    return json.dumps(p.weather_snapshot, sort_keys=True, separators=(",", ":"))
+
+
+class _ExportWriter(ABC):
+    """Incremental export writer: header, then row chunks, then footer.
+
+    Writers emit bytes to `out` as rows arrive so an export never holds the
+    whole document in memory. `total_rows` must be known up front for formats
+    that print it in the header (KML).
+    """
+
+    # Body bytes are append-only between header and footer, so a partial
+    # artifact can be truncated to a checkpointed offset and continued.
+    resumable = True
+    # Whether the format needs a side file (see _KmlWriter).
+    uses_spool = False
+
+    def __init__(
+        self,
+        out: BinaryIO,
+        tz: dt.tzinfo,
+        *,
+        total_rows: int,
+        rows_written: int = 0,
+        spool: BinaryIO | None = None,
+    ) -> None:
+        self._out = out
+        self._tz = tz
+        self._total_rows = total_rows
+        self._rows_written = rows_written
+
+    @property
+    def rows_written(self) -> int:
+        return self._rows_written
+
+    def write_header(self) -> None:
+        pass
+
+    @abstractmethod
+    def write_rows(self, points: Sequence[TrackPoint]) -> None: ...
+
+    def write_footer(self) -> None:
+        pass
+
+
+class _CsvWriter(_ExportWriter):
+    _COLUMNS = (
+        "client_point_id",
+        "recorded_at",
+        "latitude",
+        "longitude",
+        "accuracy",
+        "altitude",
+        "speed",
+        "is_dirty",
+        "weather_snapshot_json",
     )
-    for p in points:
-        weather_json = (
-            json.dumps(p.weather_snapshot, sort_keys=True, separators=(",", ":"))
-            if p.weather_snapshot is not None
-            else ""
-        )
-        w.writerow(
+
+    def _encode(self, rows: Iterable[Sequence[object]]) -> None:
+        buf = io.StringIO(newline="")
+        csv.writer(buf).writerows(rows)
+        self._out.write(buf.getvalue().encode("utf-8"))
+
+    def write_header(self) -> None:
+        self._encode([self._COLUMNS])
+
+    def write_rows(self, points: Sequence[TrackPoint]) -> None:
+        tz = self._tz
+        self._encode(
             [
                 str(p.client_point_id),
-                _format_dt(p.recorded_at, tz),
+                format_dt(p.recorded_at, tz),
                 p.latitude,
                 p.longitude,
                 p.accuracy,
                 p.altitude,
                 p.speed,
                 bool(p.is_dirty),
-                weather_json,
+                _weather_json(p) or "",
             ]
+            for p in points
         )
-    return buf.getvalue().encode("utf-8")
-
-
-def _geojson_bytes(points: list[TrackPoint], tz: dt.tzinfo) -> bytes:
-    features: list[dict[str, Any]] = []
-    for p in points:
-        features.append(
-            {
-                "type": "Feature",
-                "geometry": {
-                    "type": "Point",
-                    "coordinates": [p.longitude, p.latitude],
-                },
-                "properties": {
-                    "client_point_id": str(p.client_point_id),
-                    "recorded_at": _format_dt(p.recorded_at, tz),
-                    "accuracy": p.accuracy,
-                    "altitude": p.altitude,
-                    "speed": p.speed,
-                    "is_dirty": bool(p.is_dirty),
-                    "weather_snapshot": p.weather_snapshot,
+        self._rows_written += len(points)
+
+
+class _GeoJsonWriter(_ExportWriter):
+    # Matches json.dumps(sort_keys=True) of {"type": ..., "features": [...]}.
+    def write_header(self) -> None:
+        self._out.write(b'{"features":[')
+
+    def write_rows(self, points: Sequence[TrackPoint]) -> None:
+        if not points:
+            return
+        tz = self._tz
+        parts = [
+            json.dumps(
+                {
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "Point",
+                        "coordinates": [p.longitude, p.latitude],
+                    },
+                    "properties": {
+                        "client_point_id": str(p.client_point_id),
+                        "recorded_at": format_dt(p.recorded_at, tz),
+                        "accuracy": p.accuracy,
+                        "altitude": p.altitude,
+                        "speed": p.speed,
+                        "is_dirty": bool(p.is_dirty),
+                        "weather_snapshot": p.weather_snapshot,
+                    },
                 },
-            }
+                sort_keys=True,
+                separators=(",", ":"),
+            )
+            for p in points
+        ]
+        prefix = "," if self._rows_written else ""
+        self._out.write((prefix + ",".join(parts)).encode("utf-8"))
+        self._rows_written += len(points)
+
+    def write_footer(self) -> None:
+        self._out.write(b'],"type":"FeatureCollection"}')
+
+
+# XML writers reproduce xml.etree.ElementTree.tostring(..., xml_declaration=True)
+# byte for byte. Row values are floats, UUIDs and ISO timestamps, which never
+# contain markup characters, so only free-form text goes through escaping.
+_XML_DECLARATION = b"<?xml version='1.0' encoding='utf-8'?>\n"
+
+
+def _xml_text(value: str) -> str:
+    return xml_escape(value)
+
+
+class _GpxWriter(_ExportWriter):
+    def write_header(self) -> None:
+        self._out.write(
+            _XML_DECLARATION
+            + b'<gpx version="1.1" creator="wayfarer" '
+            + b'xmlns="http://www.topografix.com/GPX/1/1"><trk>'
+        )
+
+    def write_rows(self, points: Sequence[TrackPoint]) -> None:
+        if not points:
+            return
+        tz = self._tz
+        parts: list[str] = [] if self._rows_written else ["<trkseg>"]
+        for p in points:
+            ele = f"<ele>{p.altitude}</ele>" if p.altitude is not None else ""
+            parts.append(
+                f'<trkpt lat="{p.latitude}" lon="{p.longitude}">{ele}'
+                f"<time>{format_dt(p.recorded_at, tz)}</time></trkpt>"
+            )
+        self._out.write("".join(parts).encode("utf-8"))
+        self._rows_written += len(points)
+
+    def write_footer(self) -> None:
+        trkseg_close = b"</trkseg>" if self._rows_written else b"<trkseg />"
+        self._out.write(trkseg_close + b"</trk></gpx>")
+
+
+class _KmlWriter(_ExportWriter):
+    """KML writer; ExtendedData follows the coordinates, so it is spooled to disk."""
+
+    uses_spool = True
+
+    def __init__(
+        self,
+        out: BinaryIO,
+        tz: dt.tzinfo,
+        *,
+        total_rows: int,
+        rows_written: int = 0,
+        spool: BinaryIO | None = None,
+    ) -> None:
+        super().__init__(out, tz, total_rows=total_rows, rows_written=rows_written)
+        self._ext: BinaryIO = spool or cast(BinaryIO, tempfile.TemporaryFile())
+
+    def write_header(self) -> None:
+        tz_name = self._tz.tzname(dt.datetime.now(self._tz)) or "UTC"
+        description = _xml_text(f"points={self._total_rows}; timezone={tz_name}")
+        self._out.write(
+            _XML_DECLARATION
+            + b'<kml xmlns="http://www.opengis.net/kml/2.2"><Document><Placemark>'
+            + b"<name>Wayfarer Export</name>"
+            + f"<description>{description}</description>".encode("utf-8")
+            + b"<LineString><tessellate>1</tessellate>"
+        )
+
+    def write_rows(self, points: Sequence[TrackPoint]) -> None:
+        if not points:
+            return
+        tz = self._tz
+        coords = " ".join(
+            f"{p.longitude},{p.latitude},{p.altitude or 0.0}" for p in points
         )
+        prefix = " " if self._rows_written else "<coordinates>"
+        self._out.write((prefix + coords).encode("utf-8"))
+        self._ext.write(
+            "".join(
+                f'<Data name="{p.client_point_id}">'
+                f"<value>{format_dt(p.recorded_at, tz)}</value></Data>"
+                for p in points
+            ).encode("utf-8")
+        )
+        self._rows_written += len(points)
+
+    def write_footer(self) -> None:
+        if not self._rows_written:
+            self._out.write(b"<coordinates /></LineString><ExtendedData />")
+        else:
+            self._out.write(b"</coordinates></LineString><ExtendedData>")
+            self._ext.seek(0)
+            shutil.copyfileobj(self._ext, self._out)
+            self._out.write(b"</ExtendedData>")
+        self._ext.close()
+        self._out.write(b"</Placemark></Document></kml>")
+
+
+def columnar_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _arrow_tz_name(tz: dt.tzinfo) -> str:
+    # Arrow stores UTC instants plus an IANA zone name as column metadata.
+    key = getattr(tz, "key", None)
+    return key if isinstance(key, str) and key else "UTC"
 
-    payload = {
-        "type": "FeatureCollection",
-        "features": features,
-    }
-    return json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
-
-
-def _gpx_bytes(points: list[TrackPoint], tz: dt.tzinfo) -> bytes:
-    gpx = ET.Element(
-        "gpx",
-        attrib={
-            "version": "1.1",
-            "creator": "wayfarer",
-            "xmlns": "http://www.topografix.com/GPX/1/1",
-        },
+
+def _as_utc(ts: dt.datetime) -> dt.datetime:
+    # SQLite returns naive datetimes for timezone-aware columns; they are UTC.
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=dt.timezone.utc)
+    return ts.astimezone(dt.timezone.utc)
+
+
+def _arrow_schema(tz: dt.tzinfo) -> Any:
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            pa.field("client_point_id", pa.string(), nullable=False),
+            pa.field(
+                "recorded_at", pa.timestamp("us", tz=_arrow_tz_name(tz)), nullable=False
+            ),
+            pa.field("latitude", pa.float64(), nullable=False),
+            pa.field("longitude", pa.float64(), nullable=False),
+            pa.field("accuracy", pa.float64()),
+            pa.field("altitude", pa.float64()),
+            pa.field("speed", pa.float64()),
+            pa.field("is_dirty", pa.bool_(), nullable=False),
+            pa.field("weather_snapshot_json", pa.string()),
+        ]
     )
-    trk = ET.SubElement(gpx, "trk")
-    trkseg = ET.SubElement(trk, "trkseg")
-    for p in points:
-        trkpt = ET.SubElement(
-            trkseg,
-            "trkpt",
-            attrib={"lat": str(p.latitude), "lon": str(p.longitude)},
+
+
+class _ColumnarWriter(_ExportWriter):
+    """Buffers rows into fixed-size Arrow record batches (one per row group)."""
+
+    # The Parquet/IPC footer indexes every batch; a crash restarts the file.
+    resumable = False
+
+    def __init__(
+        self,
+        out: BinaryIO,
+        tz: dt.tzinfo,
+        *,
+        total_rows: int,
+        rows_written: int = 0,
+        spool: BinaryIO | None = None,
+    ) -> None:
+        super().__init__(out, tz, total_rows=total_rows)
+        self._schema = _arrow_schema(tz)
+        self._columns: dict[str, list[Any]] = {n: [] for n in self._schema.names}
+
+    @abstractmethod
+    def _write_batch(self, batch: Any) -> None: ...
+
+    def _flush(self) -> None:
+        import pyarrow as pa
+
+        if not self._columns["client_point_id"]:
+            return
+        self._write_batch(
+            pa.RecordBatch.from_pydict(self._columns, schema=self._schema)
         )
-        if p.altitude is not None:
-            ET.SubElement(trkpt, "ele").text = str(p.altitude)
-        ET.SubElement(trkpt, "time").text = _format_dt(p.recorded_at, tz)
-    return ET.tostring(gpx, encoding="utf-8", xml_declaration=True)
+        self._columns = {n: [] for n in self._schema.names}
+
+    def write_rows(self, points: Sequence[TrackPoint]) -> None:
+        cols = self._columns
+        for p in points:
+            cols["client_point_id"].append(str(p.client_point_id))
+            cols["recorded_at"].append(_as_utc(p.recorded_at))
+            cols["latitude"].append(p.latitude)
+            cols["longitude"].append(p.longitude)
+            cols["accuracy"].append(p.accuracy)
+            cols["altitude"].append(p.altitude)
+            cols["speed"].append(p.speed)
+            cols["is_dirty"].append(bool(p.is_dirty))
+            cols["weather_snapshot_json"].append(_weather_json(p))
+            if len(cols["client_point_id"]) >= _COLUMNAR_BATCH_ROWS:
+                self._flush()
+                cols = self._columns
+        self._rows_written += len(points)
+
+
+class _ParquetWriter(_ColumnarWriter):
+    def write_header(self) -> None:
+        import pyarrow.parquet as pq
+
+        self._writer = pq.ParquetWriter(self._out, self._schema, compression="zstd")
+
+    def _write_batch(self, batch: Any) -> None:
+        self._writer.write_batch(batch, row_group_size=_COLUMNAR_BATCH_ROWS)
+
+    def write_footer(self) -> None:
+        self._flush()
+        self._writer.close()
+
+
+class _ArrowIpcWriter(_ColumnarWriter):
+    def write_header(self) -> None:
+        import pyarrow as pa
+
+        options = pa.ipc.IpcWriteOptions(compression="zstd")
+        self._writer = pa.ipc.new_file(self._out, self._schema, options=options)
+
+    def _write_batch(self, batch: Any) -> None:
+        self._writer.write_batch(batch)
+
+    def write_footer(self) -> None:
+        self._flush()
+        self._writer.close()
+
+
+_WRITERS: dict[str, type[_ExportWriter]] = {
+    "CSV": _CsvWriter,
+    "GeoJSON": _GeoJsonWriter,
+    "GPX": _GpxWriter,
+    "KML": _KmlWriter,
+    "Parquet": _ParquetWriter,
+    "Arrow": _ArrowIpcWriter,
+}
+
+
+def _writer_cls(fmt: str) -> type[_ExportWriter]:
+    writer_cls = _WRITERS.get(fmt)
+    if writer_cls is None:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    return writer_cls
+
+
+def open_writer(
+    fmt: str,
+    out: BinaryIO,
+    tz: dt.tzinfo,
+    *,
+    total_rows: int,
+    rows_written: int = 0,
+    spool: BinaryIO | None = None,
+) -> _ExportWriter:
+    return _writer_cls(fmt)(
+        out, tz, total_rows=total_rows, rows_written=rows_written, spool=spool
+    )
 
 
-def _kml_bytes(points: list[TrackPoint], tz: dt.tzinfo) -> bytes:
-    kml = ET.Element(
-        "kml",
-        attrib={"xmlns": "http://www.opengis.net/kml/2.2"},
+def format_bytes(fmt: str, points: list[TrackPoint], tz: dt.tzinfo) -> bytes:
+    buf = io.BytesIO()
+    writer = open_writer(fmt, buf, tz, total_rows=len(points))
+    writer.write_header()
+    writer.write_rows(points)
+    writer.write_footer()
+    return buf.getvalue()
+
+
+def _export_points_filter(job: ExportJob) -> list[sa.ColumnElement[bool]]:
+    # Exclude points covered by active DELETE_RANGE edits (correlated NOT EXISTS).
+    edit_match = (
+        sa.select(1)
+        .select_from(TrackEdit)
+        .where(
+            TrackEdit.user_id == job.user_id,
+            TrackEdit.type == "DELETE_RANGE",
+            TrackEdit.canceled_at.is_(None),
+            TrackPoint.recorded_at >= TrackEdit.start_at,
+            TrackPoint.recorded_at <= TrackEdit.end_at,
+        )
+        .correlate(TrackPoint)
     )
-    doc = ET.SubElement(kml, "Document")
+    return [
+        TrackPoint.user_id == job.user_id,
+        TrackPoint.recorded_at >= job.start_at,
+        TrackPoint.recorded_at <= job.end_at,
+        ~sa.exists(edit_match),
+    ]
+
+
+async def iter_export_chunks(
+    session: AsyncSession,
+    *,
+    job: ExportJob,
+    chunk_rows: int,
+    after: tuple[dt.datetime, int] | None = None,
+) -> AsyncIterator[list[TrackPoint]]:
+    """Yield export points in (recorded_at, id) order using keyset pagination.
+
+    `after` resumes strictly past a previously exported (recorded_at, id).
+    """
 
-    placemark = ET.SubElement(doc, "Placemark")
-    ET.SubElement(placemark, "name").text = "Wayfarer Export"
-    ET.SubElement(
-        placemark, "description"
-    ).text = f"points={len(points)}; timezone={tz.tzname(dt.datetime.now(tz)) or 'UTC'}"
+    filters = _export_points_filter(job)
+    while True:
+        stmt = (
+            sa.select(TrackPoint)
+            .where(*filters)
+            .order_by(TrackPoint.recorded_at.asc(), TrackPoint.id.asc())
+            .limit(chunk_rows)
+        )
+        if after is not None:
+            after_at, after_id = after
+            stmt = stmt.where(
+                sa.or_(
+                    TrackPoint.recorded_at > after_at,
+                    sa.and_(
+                        TrackPoint.recorded_at == after_at, TrackPoint.id > after_id
+                    ),
+                )
+            )
+        chunk = list((await session.execute(stmt)).scalars().all())
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < chunk_rows:
+            return
+        after = (chunk[-1].recorded_at, chunk[-1].id)
 
-    linestring = ET.SubElement(placemark, "LineString")
-    ET.SubElement(linestring, "tessellate").text = "1"
-    coords = []
-    for p in points:
-        alt = p.altitude or 0.0
-        coords.append(f"{p.longitude},{p.latitude},{alt}")
-    ET.SubElement(linestring, "coordinates").text = " ".join(coords)
 
-    # Optional: attach timestamps as a simple ExtendedData block.
-    ext = ET.SubElement(placemark, "ExtendedData")
-    for p in points:
-        d = ET.SubElement(ext, "Data", attrib={"name": str(p.client_point_id)})
-        ET.SubElement(d, "value").text = _format_dt(p.recorded_at, tz)
+class _ExportCanceled(Exception):
+    pass
 
-    return ET.tostring(kml, encoding="utf-8", xml_declaration=True)
 
+class _CancelProbe:
+    """Throttled check of `ExportJob.state` for cooperative cancellation.
+
+    Long loops call `raise_if_canceled()` freely, including concurrent weather
+    fetches; the DB is consulted at most once per `interval_s` and by one
+    caller at a time, so a canceled job stops within about that long.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        *,
+        job_id: uuid.UUID,
+        interval_s: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._session = session
+        self._job_id = job_id
+        self._interval_s = interval_s
+        self._clock = clock
+        self._last_check: float | None = None
+        self._checking = False
+
+    async def raise_if_canceled(self) -> None:
+        now = self._clock()
+        if self._checking:
+            # The session runs one statement at a time; let that check decide.
+            return
+        if self._last_check is not None and now - self._last_check < self._interval_s:
+            return
+        self._last_check = now
+        self._checking = True
+        try:
+            state = (
+                await self._session.execute(
+                    sa.select(ExportJob.state).where(ExportJob.id == self._job_id)
+                )
+            ).scalar_one_or_none()
+        finally:
+            self._checking = False
+        if state is None or state == "CANCELED":
+            raise _ExportCanceled()
+
+
+async def attach_weather_snapshots(
+    session: AsyncSession, points: Sequence[TrackPoint]
+) -> None:
+    """Resolve `weather_cache_id` references into in-memory `weather_snapshot`s.
+
+    Points in one chunk mostly share a handful of cache rows, so each payload is
+    loaded once by id and fanned out. Only the loaded objects change; the
+    legacy JSON column stays empty in the database.
+    """
+
+    from app.services.weather import load_weather_payloads
+
+    linked = [
+        p
+        for p in points
+        if p.weather_cache_id is not None and p.weather_snapshot is None
+    ]
+    if not linked:
+        return
+    payloads = await load_weather_payloads(
+        session, {cast(int, p.weather_cache_id) for p in linked}
+    )
+    for p in linked:
+        payload = payloads.get(cast(int, p.weather_cache_id))
+        if payload is not None:
+            set_committed_value(p, "weather_snapshot", payload)
+
+
+async def _enrich_weather(
+    session: AsyncSession,
+    *,
+    points: Sequence[TrackPoint],
+    http_client: httpx.AsyncClient,
+    cancel_probe: _CancelProbe | None = None,
+) -> bool:
+    """Fill missing weather and link points to it; True if any lookup degraded.
+
+    Points are linked to their `weather_cache` row with one executemany UPDATE
+    of `weather_cache_id` keyed by id (committed with the chunk), so later
+    weather exports skip the points already enriched here.
+    """
+
+    from app.services.weather import get_weather_cache_entries
+
+    pending = [
+        p for p in points if p.weather_cache_id is None and p.weather_snapshot is None
+    ]
+    if not pending:
+        return False
+    if cancel_probe is not None:
+        await cancel_probe.raise_if_canceled()
+
+    entries, degraded = await get_weather_cache_entries(
+        session=session,
+        points=[
+            (float(p.latitude), float(p.longitude), p.recorded_at) for p in pending
+        ],
+        http_client=http_client,
+        check_canceled=(
+            cancel_probe.raise_if_canceled if cancel_probe is not None else None
+        ),
+    )
+
+    updates: list[dict[str, object]] = []
+    for p, entry in zip(pending, entries, strict=True):
+        if entry is None:
+            continue
+        cache_id, snapshot = entry
+        # Update the loaded object without marking it dirty; the bulk UPDATE
+        # below is the only write, instead of one implicit UPDATE per row.
+        set_committed_value(p, "weather_snapshot", snapshot)
+        if cache_id is not None:
+            set_committed_value(p, "weather_cache_id", cache_id)
+            updates.append({"b_id": p.id, "weather_cache_id": cache_id})
+
+    if updates:
+        table = cast(sa.Table, TrackPoint.__table__)
+        update_stmt = (
+            sa.update(table)
+            .where(table.c.id == sa.bindparam("b_id"))
+            .values(weather_cache_id=sa.bindparam("weather_cache_id"))
+        )
+        await session.execute(update_stmt, updates)
+    return degraded
+
+
+@dataclass(frozen=True)
+class _ExportCheckpoint:
+    """Durable resume point, stored in `ExportJob.checkpoint` after each chunk."""
+
+    after_recorded_at: dt.datetime
+    after_id: int
+    offset: int
+    spool_offset: int
+    degraded_weather: bool
+
+    def to_json(self) -> dict[str, object]:
+        return {
+            "after_recorded_at": _as_utc(self.after_recorded_at).isoformat(),
+            "after_id": self.after_id,
+            "offset": self.offset,
+            "spool_offset": self.spool_offset,
+            "degraded_weather": self.degraded_weather,
+        }
+
+    @classmethod
+    def from_json(cls, raw: object) -> _ExportCheckpoint | None:
+        if not isinstance(raw, dict):
+            return None
+        try:
+            return cls(
+                after_recorded_at=_as_utc(
+                    dt.datetime.fromisoformat(str(raw["after_recorded_at"]))
+                ),
+                after_id=int(raw["after_id"]),
+                offset=int(raw["offset"]),
+                spool_offset=int(raw.get("spool_offset", 0)),
+                degraded_weather=bool(raw.get("degraded_weather", False)),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+
+def artifact_rel_path(job: ExportJob) -> str:
+    return f"{job.user_id}/{job.id}.{_export_ext(job.format)}"
+
+
+def partial_artifact_paths(abs_path: Path) -> tuple[Path, Path]:
+    # In-progress artifact (and KML spool) live next to the final path.
+    return (
+        abs_path.with_name(abs_path.name + ".part"),
+        abs_path.with_name(abs_path.name + ".spool"),
+    )
 
-def _format_bytes(fmt: str, points: list[TrackPoint], tz: dt.tzinfo) -> bytes:
-    match fmt:
-        case "CSV":
-            return _csv_bytes(points, tz)
-        case "GeoJSON":
-            return _geojson_bytes(points, tz)
-        case "GPX":
-            return _gpx_bytes(points, tz)
-        case "KML":
-            return _kml_bytes(points, tz)
-        case _:
-            raise ValueError(f"Unsupported export format: {fmt}")
+
+def _usable_checkpoint(
+    job: ExportJob, *, part_path: Path, spool_path: Path
+) -> _ExportCheckpoint | None:
+    """Return the job checkpoint if its partial artifact is still on disk."""
+
+    if not _writer_cls(job.format).resumable:
+        return None
+    checkpoint = _ExportCheckpoint.from_json(job.checkpoint)
+    if checkpoint is None or job.total_rows is None:
+        return None
+    try:
+        if part_path.stat().st_size < checkpoint.offset:
+            return None
+        if _writer_cls(job.format).uses_spool:
+            if spool_path.stat().st_size < checkpoint.spool_offset:
+                return None
+    except FileNotFoundError:
+        return None
+    return checkpoint
+
+
+def _open_at(path: Path, offset: int | None) -> BinaryIO:
+    # Truncate to the checkpoint: bytes past it belong to an uncommitted chunk.
+    if offset is None:
+        return path.open("w+b")
+    fh = path.open("r+b")
+    fh.truncate(offset)
+    fh.seek(offset)
+    return fh
+
+
+def _sync(fh: BinaryIO) -> None:
+    fh.flush()
+    os.fsync(fh.fileno())
 
 
 async def _run_export_job(*, job_id: uuid.UUID) -> dict[str, Any]:
+    from app.services.weather import open_meteo_http_client
+
     settings = get_settings()
     sessionmaker = get_sessionmaker()
 
@@ -228,35 +775,25 @@ async def _run_export_job(*, job_id: uuid.UUID) -> dict[str, Any]:
         if job.state in {"SUCCEEDED", "PARTIAL", "FAILED", "CANCELED"}:
             return {"status": "skipped", "state": job.state}
 
+        if job.format in COLUMNAR_FORMATS and not columnar_available():
+            # API rejects these up front; guard workers deployed without the extra.
+            job.state = "FAILED"
+            job.error_code = "EXPORT_FORMAT_UNSUPPORTED"
+            job.error_message = f"{job.format} export requires pyarrow on the worker"
+            job.finished_at = utcnow()
+            await session.commit()
+            return {"status": "failed", "error": job.error_code}
+
         job.state = "RUNNING"
         job.error_code = None
         job.error_message = None
         job.finished_at = None
         await session.commit()
 
-        # Exclude points covered by active DELETE_RANGE edits (correlated NOT EXISTS).
-        edit_match = (
-            sa.select(1)
-            .select_from(TrackEdit)
-            .where(
-                TrackEdit.user_id == job.user_id,
-                TrackEdit.type == "DELETE_RANGE",
-                TrackEdit.canceled_at.is_(None),
-                TrackPoint.recorded_at >= TrackEdit.start_at,
-                TrackPoint.recorded_at <= TrackEdit.end_at,
-            )
-            .correlate(TrackPoint)
-        )
-
         count_stmt = (
             sa.select(sa.func.count())
             .select_from(TrackPoint)
-            .where(
-                TrackPoint.user_id == job.user_id,
-                TrackPoint.recorded_at >= job.start_at,
-                TrackPoint.recorded_at <= job.end_at,
-                ~sa.exists(edit_match),
-            )
+            .where(*_export_points_filter(job))
         )
         points_count = int((await session.execute(count_stmt)).scalar_one() or 0)
         if points_count > settings.max_export_points:
@@ -267,58 +804,108 @@ async def _run_export_job(*, job_id: uuid.UUID) -> dict[str, Any]:
             await session.commit()
             return {"status": "failed", "error": job.error_code}
 
-        points_stmt = (
-            sa.select(TrackPoint)
-            .where(
-                TrackPoint.user_id == job.user_id,
-                TrackPoint.recorded_at >= job.start_at,
-                TrackPoint.recorded_at <= job.end_at,
-                ~sa.exists(edit_match),
-            )
-            .order_by(TrackPoint.recorded_at.asc())
-        )
-        points = list((await session.execute(points_stmt)).scalars().all())
-
-        degraded_weather = False
-        if job.include_weather and points:
-            from app.services.weather import get_weather_snapshot
-
-            # Reuse one client per job; tests patch httpx (no real network).
-            async with httpx.AsyncClient() as http_client:
-                for p in points:
-                    if p.weather_snapshot is not None:
-                        continue
-                    snapshot, degraded = await get_weather_snapshot(
-                        session=session,
-                        latitude=float(p.latitude),
-                        longitude=float(p.longitude),
-                        recorded_at=p.recorded_at,
-                        http_client=http_client,
-                    )
-                    if snapshot is not None:
-                        p.weather_snapshot = snapshot
-                    if degraded:
-                        degraded_weather = True
-
-        tz = _tzinfo_from_name(job.timezone)
-        ext = _export_ext(job.format)
-        rel_path = f"{job.user_id}/{job.id}.{ext}"
+        tz = tzinfo_from_name(job.timezone)
+        rel_path = artifact_rel_path(job)
         abs_path = Path(settings.export_dir) / rel_path
         abs_path.parent.mkdir(parents=True, exist_ok=True)
+        part_path, spool_path = partial_artifact_paths(abs_path)
 
-        payload = _format_bytes(job.format, points, tz)
-        abs_path.write_bytes(payload)
+        checkpoint = _usable_checkpoint(job, part_path=part_path, spool_path=spool_path)
+        if checkpoint is None:
+            job.rows_written = 0
+            job.total_rows = points_count
+            job.checkpoint = None
+            await session.commit()
+        total_rows = int(job.total_rows or 0)
+        after = (
+            (checkpoint.after_recorded_at, checkpoint.after_id) if checkpoint else None
+        )
+
+        # Stream: read keyset chunks, enrich, and append to the artifact as we go.
+        degraded_weather = checkpoint.degraded_weather if checkpoint else False
+        cancel_probe = _CancelProbe(
+            session,
+            job_id=job.id,
+            interval_s=float(settings.export_cancel_check_interval_s),
+        )
+        try:
+            with contextlib.ExitStack() as stack:
+                out = stack.enter_context(
+                    _open_at(part_path, checkpoint.offset if checkpoint else None)
+                )
+                spool = None
+                if _writer_cls(job.format).uses_spool:
+                    spool = stack.enter_context(
+                        _open_at(
+                            spool_path, checkpoint.spool_offset if checkpoint else None
+                        )
+                    )
+                writer = open_writer(
+                    job.format,
+                    out,
+                    tz,
+                    total_rows=total_rows,
+                    rows_written=job.rows_written if checkpoint else 0,
+                    spool=spool,
+                )
+                if checkpoint is None:
+                    writer.write_header()
+                # Pooled client for this job's loop; tests patch httpx (no network).
+                async with open_meteo_http_client() as http_client:
+                    async for chunk in iter_export_chunks(
+                        session,
+                        job=job,
+                        chunk_rows=int(settings.export_chunk_rows),
+                        after=after,
+                    ):
+                        await cancel_probe.raise_if_canceled()
+                        await attach_weather_snapshots(session, chunk)
+                        if job.include_weather:
+                            if await _enrich_weather(
+                                session,
+                                points=chunk,
+                                http_client=http_client,
+                                cancel_probe=cancel_probe,
+                            ):
+                                degraded_weather = True
+                        writer.write_rows(chunk)
+
+                        # Make the chunk durable before publishing progress past it.
+                        job.rows_written = writer.rows_written
+                        if writer.resumable:
+                            _sync(out)
+                            if spool is not None:
+                                _sync(spool)
+                            job.checkpoint = _ExportCheckpoint(
+                                after_recorded_at=chunk[-1].recorded_at,
+                                after_id=int(chunk[-1].id),
+                                offset=out.tell(),
+                                spool_offset=spool.tell() if spool is not None else 0,
+                                degraded_weather=degraded_weather,
+                            ).to_json()
+                        await session.commit()
+                writer.write_footer()
+        except _ExportCanceled:
+            for path in (part_path, spool_path):
+                path.unlink(missing_ok=True)
+            return {"status": "canceled", "rows_written": job.rows_written}
 
         # Respect cancel requests that raced with artifact generation.
         await session.refresh(job)
         if job.state == "CANCELED":
-            try:
-                abs_path.unlink(missing_ok=True)
-            except Exception:
-                pass
-            return {"status": "canceled"}
+            for path in (part_path, spool_path):
+                path.unlink(missing_ok=True)
+            return {"status": "canceled", "rows_written": job.rows_written}
+
+        try:
+            part_path.replace(abs_path)
+        except FileNotFoundError:
+            # The cancel endpoint removed the partial artifact under us.
+            return {"status": "canceled", "rows_written": job.rows_written}
+        spool_path.unlink(missing_ok=True)
 
         job.artifact_path = rel_path
+        job.checkpoint = None
         if job.include_weather and degraded_weather:
             job.state = "PARTIAL"
             job.error_code = "EXPORT_WEATHER_DEGRADED"
@@ -334,11 +921,17 @@ async def _run_export_job(*, job_id: uuid.UUID) -> dict[str, Any]:
             "status": "ok",
             "state": job.state,
             "artifact_path": job.artifact_path,
-            "points_count": points_count,
+            "points_count": job.rows_written,
         }
 
 
-@celery_app.task(name="app.tasks.export.run_export_job_task")
+# Ack only after the job returns: if the worker dies mid-export the broker
+# redelivers the message and the job resumes from its checkpoint.
+@celery_app.task(
+    name="app.tasks.export.run_export_job_task",
+    acks_late=True,
+    reject_on_worker_lost=True,
+)
 def run_export_job_task(job_id: str | uuid.UUID) -> dict[str, Any]:
     jid = job_id if isinstance(job_id, uuid.UUID) else uuid.UUID(str(job_id))
     return _run_coro_sync(lambda: _run_export_job(job_id=jid))
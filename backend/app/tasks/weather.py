@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Coroutine, TypeVar
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.settings import get_settings
+from app.db.session import get_sessionmaker
+from app.models.weather_warm_cursor import WeatherWarmCursor
+from app.services.weather import open_meteo_http_client, warm_weather_cache
+from app.tasks.celery_app import celery_app
+
+
+_T = TypeVar("_T")
+
+# Cursor row of the scheduled runs (those without an explicit `start_at`).
+_WARM_CURSOR = "track_points"
+
+
+def _coerce_datetime(value: dt.datetime | str) -> dt.datetime:
+    if isinstance(value, dt.datetime):
+        out = value
+    elif isinstance(value, str):
+        # Support ISO strings from clients/workers (including trailing 'Z').
+        s = value.strip()
+        if s.endswith("Z"):
+            s = s[:-1] + "+00:00"
+        out = dt.datetime.fromisoformat(s)
+    else:
+        raise TypeError(f"Unsupported datetime value: {type(value)!r}")
+
+    # DB column is timezone-aware; treat naive values as UTC to avoid comparison errors.
+    if out.tzinfo is None:
+        out = out.replace(tzinfo=dt.timezone.utc)
+    return out
+
+
+def _run_coro_sync(coro_factory: Callable[[], Coroutine[Any, Any, _T]]) -> _T:
+    """Run an async coroutine from a sync context.
+
+    In Celery eager mode, tasks may be invoked from within an already-running
+    event loop (e.g. FastAPI). `asyncio.run()` would crash there, so we fall
+    back to executing the coroutine on a one-off thread.
+    """
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro_factory())
+
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        fut = ex.submit(lambda: asyncio.run(coro_factory()))
+        return fut.result()
+
+
+async def _advance_warm_cursor(session: AsyncSession, *, to: dt.datetime) -> None:
+    """Move the warm cursor to `to` unless it already points later."""
+
+    cursor = await session.get(WeatherWarmCursor, _WARM_CURSOR)
+    if cursor is None:
+        session.add(WeatherWarmCursor(name=_WARM_CURSOR, warmed_until=to))
+    elif _coerce_datetime(cursor.warmed_until) < to:
+        cursor.warmed_until = to
+    else:
+        return
+    try:
+        await session.commit()
+    except IntegrityError:
+        # A concurrent run created the row first; its cursor stands.
+        await session.rollback()
+
+
+async def _warm_weather_cache(
+    *, start_at: dt.datetime | None, end_at: dt.datetime
+) -> dict[str, int]:
+    sessionmaker = get_sessionmaker()
+    async with sessionmaker() as session, open_meteo_http_client() as http_client:
+        from_cursor = start_at is None
+        if start_at is None:
+            cursor = await session.get(WeatherWarmCursor, _WARM_CURSOR)
+            if cursor is not None:
+                start_at = _coerce_datetime(cursor.warmed_until)
+            else:
+                start_at = end_at - dt.timedelta(
+                    hours=int(get_settings().weather_warm_lookback_hours)
+                )
+        if start_at >= end_at:
+            return {"keys": 0, "unavailable": 0}
+
+        result = await warm_weather_cache(
+            session=session, start_at=start_at, end_at=end_at, http_client=http_client
+        )
+        if from_cursor:
+            # Advanced only once the window is done: a failed run is retried
+            # whole by the next one, where cached keys cost no provider calls.
+            await _advance_warm_cursor(session, to=end_at)
+        return result
+
+
+@celery_app.task(name="app.tasks.weather.warm_weather_cache_task", ignore_result=True)
+def warm_weather_cache_task(
+    start_at: dt.datetime | str | None = None,
+    end_at: dt.datetime | str | None = None,
+) -> dict[str, int]:
+    """Pre-fetch weather for recently ingested track points.
+
+    The bounds apply to ingestion time (`created_at`). Without `end_at` the
+    window ends `weather_archive_lag_hours` ago (the archive has no data after
+    that). Without `start_at` it starts where the previous such run ended, so
+    each upload is scanned (and each unavailable key requested) once however
+    often the schedule runs; the first run looks back
+    `weather_warm_lookback_hours`. Runs given a `start_at` leave that cursor
+    alone.
+    """
+
+    settings = get_settings()
+    if end_at is None:
+        end_dt = dt.datetime.now(dt.timezone.utc) - dt.timedelta(
+            hours=int(settings.weather_archive_lag_hours)
+        )
+    else:
+        end_dt = _coerce_datetime(end_at)
+    start_dt = _coerce_datetime(start_at) if start_at is not None else None
+    if start_dt is not None and start_dt > end_dt:
+        raise ValueError("start_at must be <= end_at")
+
+    return _run_coro_sync(lambda: _warm_weather_cache(start_at=start_dt, end_at=end_dt))
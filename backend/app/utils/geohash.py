@@ -6,6 +6,8 @@ We keep this tiny and dependency-free; precision=5 (approx ~5km) is the
 project default for weather caching.
 """
 
+from collections.abc import Iterable
+
 _BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
 _DECODE_MAP = {c: i for i, c in enumerate(_BASE32)}
 
@@ -88,3 +90,330 @@ def decode_bbox(geohash: str) -> tuple[float, float, float, float]:
 def decode_center(geohash: str) -> tuple[float, float]:
     lat_min, lat_max, lon_min, lon_max = decode_bbox(geohash)
     return (lat_min + lat_max) / 2.0, (lon_min + lon_max) / 2.0
+
+
+# Batch/integer helpers.
+#
+# A geohash of precision p is the Morton (Z-order) code of the cell indices
+# (lon_q, lat_q): 5p bits alternating lon/lat, lon first, so lon gets
+# ceil(5p/2) bits and lat floor(5p/2). Working on integers replaces the
+# per-bit bisection loop with a few arithmetic ops per coordinate.
+
+_MAX_PRECISION = 12
+
+
+def _bit_split(precision: int) -> tuple[int, int]:
+    total = 5 * precision
+    return (total + 1) // 2, total // 2  # (lon_bits, lat_bits)
+
+
+def _spread(v: int) -> int:
+    """Insert a zero bit between each of the low 32 bits of `v`."""
+
+    v &= 0xFFFFFFFF
+    v = (v | (v << 16)) & 0x0000FFFF0000FFFF
+    v = (v | (v << 8)) & 0x00FF00FF00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v << 2)) & 0x3333333333333333
+    v = (v | (v << 1)) & 0x5555555555555555
+    return v
+
+
+def _compact(v: int) -> int:
+    """Inverse of `_spread`: keep every other bit, starting at bit 0."""
+
+    v &= 0x5555555555555555
+    v = (v | (v >> 1)) & 0x3333333333333333
+    v = (v | (v >> 2)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v >> 4)) & 0x00FF00FF00FF00FF
+    v = (v | (v >> 8)) & 0x0000FFFF0000FFFF
+    v = (v | (v >> 16)) & 0x00000000FFFFFFFF
+    return v
+
+
+def _check_precision(precision: int) -> None:
+    if precision <= 0:
+        raise ValueError("precision must be > 0")
+    if precision > _MAX_PRECISION:
+        raise ValueError(f"precision must be <= {_MAX_PRECISION}")
+
+
+def _from_cells(lat_q: int, lon_q: int, precision: int) -> str:
+    lon_bits, lat_bits = _bit_split(precision)
+    # Pad lat to lon's width so the interleave starts with a lon bit; the
+    # padding bit (odd total only) is shifted out again.
+    pad = lon_bits - lat_bits
+    code = (_spread(lon_q) << 1 | _spread(lat_q << pad)) >> pad
+    total = 5 * precision
+    return "".join(_BASE32[(code >> shift) & 31] for shift in range(total - 5, -1, -5))
+
+
+def _to_cells(geohash: str) -> tuple[int, int]:
+    """Return (lat_q, lon_q) cell indices for `geohash`."""
+
+    if not geohash:
+        raise ValueError("geohash must be non-empty")
+    _check_precision(len(geohash))
+    code = 0
+    for c in geohash.lower():
+        try:
+            code = (code << 5) | _DECODE_MAP[c]
+        except KeyError as e:
+            raise ValueError(f"Invalid geohash character: {c!r}") from e
+    lon_bits, lat_bits = _bit_split(len(geohash))
+    pad = lon_bits - lat_bits
+    code <<= pad
+    return _compact(code) >> pad, _compact(code >> 1)
+
+
+def _build_char_tables() -> tuple[list[str], list[str]]:
+    # A pair of characters holds exactly 5 lon and 5 lat bits
+    # (l0 a0 l1 a1 l2 | a2 l3 a3 l4 a4); a trailing odd character holds
+    # 3 lon and 2 lat bits (l0 a0 l1 a1 l2).
+    pairs = []
+    for lon5 in range(32):
+        for lat5 in range(32):
+            code = _spread(lon5) << 1 | _spread(lat5)
+            pairs.append(_BASE32[code >> 5] + _BASE32[code & 31])
+    tails = []
+    for lon3 in range(8):
+        for lat2 in range(4):
+            tails.append(_BASE32[(_spread(lon3) << 1 | _spread(lat2 << 1)) >> 1])
+    return pairs, tails
+
+
+_PAIR_CHARS, _TAIL_CHARS = _build_char_tables()
+
+
+def encode_many(
+    latitudes: Iterable[float],
+    longitudes: Iterable[float],
+    precision: int = 5,
+) -> list[str]:
+    """Batch `encode`: same output, integer cell indices instead of bisection.
+
+    Each coordinate is quantized to its cell index once, then the string is
+    assembled two characters per table lookup. Precisions above 12 fall back
+    to `encode` per point.
+    """
+
+    if precision <= 0:
+        raise ValueError("precision must be > 0")
+    if precision > _MAX_PRECISION:
+        return [
+            encode(lat, lon, precision=precision)
+            for lat, lon in zip(latitudes, longitudes, strict=True)
+        ]
+    lon_bits, lat_bits = _bit_split(precision)
+    lat_n, lon_n = 1 << lat_bits, 1 << lon_bits
+    # The bisection in `encode` compares against dyadic midpoints, which are
+    # exact in float64 here (180/2**k and 360/2**k are exact), so the float
+    # estimate of each cell index is corrected against those boundaries.
+    lat_step, lon_step = 180.0 / lat_n, 360.0 / lon_n
+    lat_scale, lon_scale = lat_n / 180.0, lon_n / 360.0
+    pair_shifts = [
+        (lon_bits - 5 * (k + 1), lat_bits - 5 * (k + 1)) for k in range(precision // 2)
+    ]
+    odd = precision % 2 == 1
+    pairs, tails = _PAIR_CHARS, _TAIL_CHARS
+
+    out: list[str] = []
+    for lat, lon in zip(latitudes, longitudes, strict=True):
+        # Clamped before int(): NaN (every `>=` in `encode` is False) lands in
+        # cell 0 and infinities in the edge cells, as they do in `encode`.
+        a_f = (lat + 90.0) * lat_scale
+        a = int(a_f) if 0.0 < a_f < lat_n else (lat_n - 1 if a_f >= lat_n else 0)
+        while a > 0 and lat < a * lat_step - 90.0:
+            a -= 1
+        while a < lat_n - 1 and lat >= (a + 1) * lat_step - 90.0:
+            a += 1
+
+        o_f = (lon + 180.0) * lon_scale
+        o = int(o_f) if 0.0 < o_f < lon_n else (lon_n - 1 if o_f >= lon_n else 0)
+        while o > 0 and lon < o * lon_step - 180.0:
+            o -= 1
+        while o < lon_n - 1 and lon >= (o + 1) * lon_step - 180.0:
+            o += 1
+
+        gh = "".join(
+            [pairs[((o >> so) & 31) << 5 | ((a >> sa) & 31)] for so, sa in pair_shifts]
+        )
+        if odd:
+            gh += tails[(o & 7) << 2 | (a & 3)]
+        out.append(gh)
+    return out
+
+
+def adjacent(geohash: str, direction: str) -> str | None:
+    """Same-precision cell next to `geohash` in direction n/s/e/w.
+
+    Longitude wraps around the antimeridian; there is no cell beyond a pole,
+    so None is returned there.
+    """
+
+    lat_q, lon_q = _to_cells(geohash)
+    lon_bits, lat_bits = _bit_split(len(geohash))
+    d_lat, d_lon = {"n": (1, 0), "s": (-1, 0), "e": (0, 1), "w": (0, -1)}[
+        direction.lower()
+    ]
+    lat_q += d_lat
+    if lat_q < 0 or lat_q >= 1 << lat_bits:
+        return None
+    lon_q = (lon_q + d_lon) % (1 << lon_bits)
+    return _from_cells(lat_q, lon_q, len(geohash))
+
+
+def prefix_range(prefix: str) -> tuple[str, str]:
+    """Half-open string range [lo, hi) holding every geohash starting with `prefix`.
+
+    Geohash characters sort in base32 order, so `col >= lo AND col < hi` is an
+    index range scan equivalent to `col LIKE 'prefix%'`.
+    """
+
+    if not prefix:
+        raise ValueError("prefix must be non-empty")
+    prefix = prefix.lower()
+    for c in prefix:
+        if c not in _DECODE_MAP:
+            raise ValueError(f"Invalid geohash character: {c!r}")
+    # The next prefix up in base32 order (no other string between the two is a
+    # geohash); "z" is the largest character, so carry leftwards.
+    head = prefix
+    while head and head[-1] == "z":
+        head = head[:-1]
+    if not head:
+        return prefix, "{"  # "{" sorts right after "z"
+    return prefix, head[:-1] + _BASE32[_DECODE_MAP[head[-1]] + 1]
+
+
+_NEIGHBOR_OFFSETS = (
+    (1, 0),  # n
+    (1, 1),  # ne
+    (0, 1),  # e
+    (-1, 1),  # se
+    (-1, 0),  # s
+    (-1, -1),  # sw
+    (0, -1),  # w
+    (1, -1),  # nw
+)
+
+
+def neighbors(geohash: str) -> list[str]:
+    """The up to 8 same-precision cells around `geohash`, clockwise from north.
+
+    Together with `geohash` itself they cover every point within one cell
+    size of it, which is what a "nearby" query needs. Cells beyond a pole do
+    not exist and are left out.
+    """
+
+    lat_q, lon_q = _to_cells(geohash)
+    lon_bits, lat_bits = _bit_split(len(geohash))
+    out: list[str] = []
+    for d_lat, d_lon in _NEIGHBOR_OFFSETS:
+        n_lat = lat_q + d_lat
+        if n_lat < 0 or n_lat >= 1 << lat_bits:
+            continue
+        n_lon = (lon_q + d_lon) % (1 << lon_bits)
+        out.append(_from_cells(n_lat, n_lon, len(geohash)))
+    return out
+
+
+def _cover_spans(
+    lat_min: float,
+    lat_max: float,
+    lon_min: float,
+    lon_max: float,
+    precision: int,
+) -> list[tuple[int, int, int, int]]:
+    """Cell index spans (a0, a1, o0, o1) covering the bbox at `precision`."""
+
+    if lat_min > lat_max:
+        raise ValueError("lat_min must be <= lat_max")
+    # lon_min > lon_max means the box crosses the antimeridian: split it.
+    lon_parts = (
+        [(lon_min, lon_max)]
+        if lon_min <= lon_max
+        else [(lon_min, 180.0), (-180.0, lon_max)]
+    )
+    spans = []
+    for west, east in lon_parts:
+        a0, o0 = _to_cells(encode(lat_min, west, precision=precision))
+        a1, o1 = _to_cells(encode(lat_max, east, precision=precision))
+        spans.append((a0, a1, o0, o1))
+    return spans
+
+
+def _cover_size(spans: list[tuple[int, int, int, int]]) -> int:
+    return sum((a1 - a0 + 1) * (o1 - o0 + 1) for a0, a1, o0, o1 in spans)
+
+
+def precision_for_bbox(
+    lat_min: float,
+    lat_max: float,
+    lon_min: float,
+    lon_max: float,
+    *,
+    max_cells: int = 32,
+) -> int:
+    """Finest precision whose `bbox_cover` needs at most `max_cells` cells.
+
+    Coarser cells mean fewer range scans but more false positives to filter;
+    `max_cells` bounds the number of scans. Falls back to precision 1.
+    """
+
+    best = 1
+    for precision in range(1, _MAX_PRECISION + 1):
+        spans = _cover_spans(lat_min, lat_max, lon_min, lon_max, precision)
+        if _cover_size(spans) > max_cells:
+            break
+        best = precision
+    return best
+
+
+def bbox_cover(
+    lat_min: float,
+    lat_max: float,
+    lon_min: float,
+    lon_max: float,
+    precision: int | None = None,
+    *,
+    max_cells: int = 32,
+) -> list[str]:
+    """Sorted geohash cells that together contain the bbox.
+
+    Every point inside the box falls in one of the returned cells (cells may
+    extend past the box). A box with lon_min > lon_max crosses the
+    antimeridian. Without `precision`, `precision_for_bbox` picks one.
+    """
+
+    if precision is None:
+        precision = precision_for_bbox(
+            lat_min, lat_max, lon_min, lon_max, max_cells=max_cells
+        )
+    _check_precision(precision)
+    cells = {
+        _from_cells(a, o, precision)
+        for a0, a1, o0, o1 in _cover_spans(
+            lat_min, lat_max, lon_min, lon_max, precision
+        )
+        for a in range(a0, a1 + 1)
+        for o in range(o0, o1 + 1)
+    }
+    return sorted(cells)
+
+
+def cover_ranges(cells: Iterable[str]) -> list[tuple[str, str]]:
+    """Merge cells into the fewest half-open [lo, hi) string ranges.
+
+    Cells sort in Z-order, so neighbouring cells often produce contiguous
+    ranges; each range is one indexed `col >= lo AND col < hi` scan.
+    """
+
+    out: list[tuple[str, str]] = []
+    for cell in sorted(set(cells)):
+        lo, hi = prefix_range(cell)
+        if out and out[-1][1] >= lo:
+            out[-1] = (out[-1][0], max(out[-1][1], hi))
+        else:
+            out.append((lo, hi))
+    return out
@@ -0,0 +1,215 @@
+"""Benchmark the columnar anti-cheat rules against the per-point reference.
+
+Usage (from backend/):
+
+    python scripts/bench_anti_cheat.py --points 86400
+
+Simulates a day-long 1 Hz track, checks that the default `RuleSet` flags
+exactly what the original per-point rules flag, then prints wall time for
+both: the rules alone, and load + rules from an in-memory SQLite table (ORM
+entities vs plain column rows, as `_audit_track_segment` loads them).
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import math
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import app.models  # noqa: E402, F401
+from app.db.base import Base  # noqa: E402
+from app.models.track_point import TrackPoint  # noqa: E402
+from app.services.anti_cheat_rules import (  # noqa: E402
+    ACCURACY_FUDGE_M,
+    EARTH_RADIUS_M,
+    MAX_STEP_LENGTH_M,
+    MAX_STEP_RATE_STEPS_PER_SEC,
+    MIN_STEP_LENGTH_M,
+    TELEPORT_SPEED_MPS,
+    RuleSet,
+    build_segment,
+)
+
+
+def _haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(dphi / 2.0) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2.0) ** 2
+    )
+    return 2.0 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def _reference_is_dirty(prev, cur) -> bool:  # noqa: ANN001
+    # The original per-point hard rules, one pair at a time.
+    if prev is None:
+        return False
+
+    dt_s = (cur.recorded_at - prev.recorded_at).total_seconds()
+    step_delta = int(cur.step_delta or 0)
+    dist_m = _haversine_m(prev.latitude, prev.longitude, cur.latitude, cur.longitude)
+    acc = float(prev.accuracy or 0.0) + float(cur.accuracy or 0.0)
+    effective_dist_m = max(0.0, dist_m - (acc + ACCURACY_FUDGE_M))
+
+    if dt_s <= 0:
+        return step_delta > 0 or effective_dist_m > 0.0
+    if step_delta > 0 and (step_delta / dt_s) > MAX_STEP_RATE_STEPS_PER_SEC:
+        return True
+    if step_delta > 0:
+        step_len = dist_m / step_delta
+        if step_len < MIN_STEP_LENGTH_M or step_len > MAX_STEP_LENGTH_M:
+            return True
+    return (effective_dist_m / dt_s) > TELEPORT_SPEED_MPS
+
+
+def _dirty_flags(*columns) -> list[bool]:  # noqa: ANN002
+    return RuleSet.default().evaluate(build_segment(*columns)).flags
+
+
+def _make_track(n: int, *, seed: int = 7) -> list[SimpleNamespace]:
+    # 1 Hz walk with occasional GPS jumps and bursts of impossible steps.
+    rng = random.Random(seed)
+    t = dt.datetime(2026, 1, 30, tzinfo=dt.timezone.utc)
+    lat, lon = 31.2304, 121.4737
+    out = []
+    for _ in range(n):
+        t += dt.timedelta(seconds=1)
+        jump = 0.01 if rng.random() < 0.001 else 1e-5
+        lat += rng.uniform(-jump, jump)
+        lon += rng.uniform(-jump, jump)
+        out.append(
+            SimpleNamespace(
+                recorded_at=t,
+                latitude=lat,
+                longitude=lon,
+                accuracy=rng.choice([None, 5.0, 12.0]),
+                step_delta=rng.choice([None, 1, 2, 2, 8]),
+            )
+        )
+    return out
+
+
+def _bench_db(track: list[SimpleNamespace], *, repeat: int) -> None:
+    engine = sa.create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    user_id = uuid.uuid4()
+    with Session(engine) as session:
+        session.execute(
+            sa.insert(TrackPoint),
+            [
+                {
+                    "user_id": user_id,
+                    "client_point_id": uuid.uuid4(),
+                    "recorded_at": p.recorded_at,
+                    "latitude": p.latitude,
+                    "longitude": p.longitude,
+                    "accuracy": p.accuracy,
+                    "step_delta": p.step_delta,
+                }
+                for p in track
+            ],
+        )
+        session.commit()
+
+    orm_s = rows_s = float("inf")
+    for _ in range(repeat):
+        with Session(engine) as session:
+            t0 = time.perf_counter()
+            points = (
+                session.execute(
+                    sa.select(TrackPoint).order_by(TrackPoint.recorded_at.asc())
+                )
+                .scalars()
+                .all()
+            )
+            scalar = []
+            prev = None
+            for p in points:
+                scalar.append(_reference_is_dirty(prev, p))
+                prev = p
+            orm_s = min(orm_s, time.perf_counter() - t0)
+
+        with Session(engine) as session:
+            t0 = time.perf_counter()
+            rows = session.execute(
+                sa.select(
+                    TrackPoint.recorded_at,
+                    TrackPoint.latitude,
+                    TrackPoint.longitude,
+                    TrackPoint.accuracy,
+                    TrackPoint.step_delta,
+                ).order_by(TrackPoint.recorded_at.asc())
+            ).all()
+            flags = _dirty_flags(*zip(*rows))
+            rows_s = min(rows_s, time.perf_counter() - t0)
+
+        if flags != scalar:
+            raise SystemExit("column-row audit differs from ORM audit")
+
+    print(
+        f"load+audit: orm={orm_s:.3f}s columns={rows_s:.3f}s "
+        f"speedup={orm_s / rows_s:.1f}x"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=86_400)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--no-db", action="store_true", help="skip the SQLite load benchmark"
+    )
+    args = parser.parse_args()
+
+    track = _make_track(args.points)
+    columns = (
+        [p.recorded_at for p in track],
+        [p.latitude for p in track],
+        [p.longitude for p in track],
+        [p.accuracy for p in track],
+        [p.step_delta for p in track],
+    )
+
+    scalar_s = columnar_s = float("inf")
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        scalar = []
+        prev = None
+        for p in track:
+            scalar.append(_reference_is_dirty(prev, p))
+            prev = p
+        scalar_s = min(scalar_s, time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        flags = _dirty_flags(*columns)
+        columnar_s = min(columnar_s, time.perf_counter() - t0)
+
+        if flags != scalar:
+            raise SystemExit("columnar rules differ from the per-point reference")
+
+    print(
+        f"points={args.points} dirty={sum(flags)} "
+        f"scalar={scalar_s:.3f}s columnar={columnar_s:.3f}s "
+        f"speedup={scalar_s / columnar_s:.1f}x"
+    )
+    if not args.no_db:
+        _bench_db(track, repeat=args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Benchmark streaming GPX/KML writers against the ElementTree reference.
+
+Usage (from backend/):
+
+    python scripts/bench_export_writers.py --points 200000
+
+Every run first checks that the streaming output is byte-identical to the
+reference, then prints wall time and tracemalloc peak for both.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import io
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+import xml.etree.ElementTree as ET
+from collections.abc import Callable
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.models.track_point import TrackPoint  # noqa: E402
+from app.tasks.export import format_dt, open_writer, tzinfo_from_name  # noqa: E402
+
+
+def _reference_gpx_bytes(points: list[TrackPoint], tz: dt.tzinfo) -> bytes:
+    gpx = ET.Element(
+        "gpx",
+        attrib={
+            "version": "1.1",
+            "creator": "wayfarer",
+            "xmlns": "http://www.topografix.com/GPX/1/1",
+        },
+    )
+    trk = ET.SubElement(gpx, "trk")
+    trkseg = ET.SubElement(trk, "trkseg")
+    for p in points:
+        trkpt = ET.SubElement(
+            trkseg,
+            "trkpt",
+            attrib={"lat": str(p.latitude), "lon": str(p.longitude)},
+        )
+        if p.altitude is not None:
+            ET.SubElement(trkpt, "ele").text = str(p.altitude)
+        ET.SubElement(trkpt, "time").text = format_dt(p.recorded_at, tz)
+    return ET.tostring(gpx, encoding="utf-8", xml_declaration=True)
+
+
+def _reference_kml_bytes(points: list[TrackPoint], tz: dt.tzinfo) -> bytes:
+    kml = ET.Element("kml", attrib={"xmlns": "http://www.opengis.net/kml/2.2"})
+    doc = ET.SubElement(kml, "Document")
+    placemark = ET.SubElement(doc, "Placemark")
+    ET.SubElement(placemark, "name").text = "Wayfarer Export"
+    ET.SubElement(
+        placemark, "description"
+    ).text = f"points={len(points)}; timezone={tz.tzname(dt.datetime.now(tz)) or 'UTC'}"
+    linestring = ET.SubElement(placemark, "LineString")
+    ET.SubElement(linestring, "tessellate").text = "1"
+    coords = []
+    for p in points:
+        alt = p.altitude or 0.0
+        coords.append(f"{p.longitude},{p.latitude},{alt}")
+    ET.SubElement(linestring, "coordinates").text = " ".join(coords)
+    ext = ET.SubElement(placemark, "ExtendedData")
+    for p in points:
+        d = ET.SubElement(ext, "Data", attrib={"name": str(p.client_point_id)})
+        ET.SubElement(d, "value").text = format_dt(p.recorded_at, tz)
+    return ET.tostring(kml, encoding="utf-8", xml_declaration=True)
+
+
+def _make_points(n: int, *, seed: int = 7) -> list[TrackPoint]:
+    rng = random.Random(seed)
+    t0 = dt.datetime(2026, 1, 30, tzinfo=dt.timezone.utc)
+    lat, lon = 31.2304, 121.4737
+    out: list[TrackPoint] = []
+    for i in range(n):
+        lat += rng.uniform(-1e-4, 1e-4)
+        lon += rng.uniform(-1e-4, 1e-4)
+        out.append(
+            TrackPoint(
+                client_point_id=uuid.UUID(int=rng.getrandbits(128)),
+                recorded_at=t0 + dt.timedelta(seconds=i),
+                latitude=lat,
+                longitude=lon,
+                altitude=(rng.uniform(0, 50) if i % 5 else None),
+                accuracy=5.0,
+                is_dirty=False,
+            )
+        )
+    return out
+
+
+def _streaming(fmt: str, chunk: int) -> Callable[[list[TrackPoint], dt.tzinfo], bytes]:
+    def run(points: list[TrackPoint], tz: dt.tzinfo) -> bytes:
+        buf = io.BytesIO()
+        writer = open_writer(fmt, buf, tz, total_rows=len(points))
+        writer.write_header()
+        for i in range(0, len(points), chunk):
+            writer.write_rows(points[i : i + chunk])
+        writer.write_footer()
+        return buf.getvalue()
+
+    return run
+
+
+def _measure(
+    fn: Callable[[list[TrackPoint], dt.tzinfo], bytes],
+    points: list[TrackPoint],
+    tz: dt.tzinfo,
+) -> tuple[bytes, float, int]:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn(points, tz)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--chunk", type=int, default=5_000)
+    parser.add_argument("--timezone", default="Asia/Shanghai")
+    args = parser.parse_args()
+
+    tz = tzinfo_from_name(args.timezone)
+    points = _make_points(args.points)
+
+    cases = [
+        ("GPX", _reference_gpx_bytes),
+        ("KML", _reference_kml_bytes),
+    ]
+    for fmt, reference in cases:
+        ref_out, ref_s, ref_peak = _measure(reference, points, tz)
+        new_out, new_s, new_peak = _measure(_streaming(fmt, args.chunk), points, tz)
+        if ref_out != new_out:
+            raise SystemExit(f"{fmt}: streaming output differs from reference")
+        print(
+            f"{fmt}: points={len(points)} bytes={len(new_out)} "
+            f"etree={ref_s:.3f}s/{ref_peak / 1e6:.1f}MB "
+            f"streaming={new_s:.3f}s/{new_peak / 1e6:.1f}MB "
+            f"speedup={ref_s / new_s:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
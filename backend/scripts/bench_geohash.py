@@ -0,0 +1,75 @@
+"""Benchmark batch geohash encoding against the scalar bisection encoder.
+
+Usage (from backend/):
+
+    python scripts/bench_geohash.py --points 200000 --precision 5
+
+Every run first checks that `encode_many` returns exactly what `encode`
+returns for each point, then prints wall time for both.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.utils.geohash import encode, encode_many  # noqa: E402
+
+
+def _make_coords(n: int, *, seed: int = 7) -> tuple[list[float], list[float]]:
+    # A random walk (like a real track) plus uniform global points.
+    rng = random.Random(seed)
+    lats: list[float] = []
+    lons: list[float] = []
+    lat, lon = 31.2304, 121.4737
+    for i in range(n):
+        if i % 2:
+            lat += rng.uniform(-1e-3, 1e-3)
+            lon += rng.uniform(-1e-3, 1e-3)
+            lats.append(lat)
+            lons.append(lon)
+        else:
+            lats.append(rng.uniform(-90, 90))
+            lons.append(rng.uniform(-180, 180))
+    return lats, lons
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--precision", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    lats, lons = _make_coords(args.points)
+
+    scalar_s = batch_s = float("inf")
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        scalar = [
+            encode(lat, lon, precision=args.precision) for lat, lon in zip(lats, lons)
+        ]
+        scalar_s = min(scalar_s, time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        batch = encode_many(lats, lons, precision=args.precision)
+        batch_s = min(batch_s, time.perf_counter() - t0)
+
+        if batch != scalar:
+            raise SystemExit("encode_many output differs from encode")
+
+    print(
+        f"points={args.points} precision={args.precision} "
+        f"scalar={scalar_s:.3f}s encode_many={batch_s:.3f}s "
+        f"speedup={scalar_s / batch_s:.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
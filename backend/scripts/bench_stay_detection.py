@@ -0,0 +1,140 @@
+"""Benchmark stay detection against the original point-by-point windowing.
+
+Usage (from backend/):
+
+    python scripts/bench_stay_detection.py --hours 24
+
+Simulates a 1 Hz day (home, a slow walk, a drive, an office stay, ...),
+checks that `detect_stay_candidates` returns exactly what the original
+detector returns, then prints wall time for both. `--skip-reference` times
+only the current detector (e.g. for a week: `--hours 168`).
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import random
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.life_event import (  # noqa: E402
+    DEFAULT_DISTANCE_THRESHOLD_M,
+    DEFAULT_TIME_THRESHOLD_S,
+    StayCandidate,
+    _haversine_m,
+    detect_stay_candidates,
+)
+
+
+def _make_track(hours: int, *, seed: int = 7) -> list[SimpleNamespace]:
+    rng = random.Random(seed)
+    deg_per_m = 1.0 / 111_194.9
+    t = dt.datetime(2026, 1, 30, tzinfo=dt.timezone.utc)
+    lat, lon = 31.2304, 121.4737
+    out = []
+    # (mode, seconds): stays jitter a few metres, walks ~1.4 m/s, drives ~15 m/s.
+    plan = [("stay", 7200), ("walk", 1800), ("drive", 1200), ("stay", 5400)]
+    remaining = hours * 3600
+    while remaining > 0:
+        for mode, seconds in plan:
+            for _ in range(min(seconds, remaining)):
+                t += dt.timedelta(seconds=1)
+                if mode == "stay":
+                    lat += rng.gauss(0.0, 3 * deg_per_m) * 0.1
+                    lon += rng.gauss(0.0, 3 * deg_per_m) * 0.1
+                elif mode == "walk":
+                    lat += 1.0 * deg_per_m
+                    lon += rng.uniform(0.5, 1.5) * deg_per_m
+                else:
+                    lat += rng.uniform(10, 20) * deg_per_m
+                out.append(
+                    SimpleNamespace(
+                        recorded_at=t,
+                        latitude=lat,
+                        longitude=lon,
+                        gcj02_latitude=None,
+                        gcj02_longitude=None,
+                    )
+                )
+            remaining -= seconds
+            if remaining <= 0:
+                break
+    return out
+
+
+def _reference(points: list, thr: float, min_s: float) -> list[StayCandidate]:
+    # The original detector: distances from each anchor, one point at a time.
+    stays = []
+    i, n = 0, len(points)
+    while i < n:
+        anchor = points[i]
+        j = i + 1
+        while j < n:
+            p = points[j]
+            if (
+                _haversine_m(anchor.latitude, anchor.longitude, p.latitude, p.longitude)
+                > thr
+            ):
+                break
+            j += 1
+        last = points[j - 1]
+        if (
+            last.recorded_at - anchor.recorded_at
+        ).total_seconds() >= min_s and j - i >= 2:
+            lat_sum = lon_sum = 0.0
+            for k in range(i, j):
+                lat_sum += float(points[k].latitude)
+                lon_sum += float(points[k].longitude)
+            stays.append(
+                StayCandidate(
+                    start_at=anchor.recorded_at,
+                    end_at=last.recorded_at,
+                    latitude=lat_sum / float(j - i),
+                    longitude=lon_sum / float(j - i),
+                    gcj02_latitude=None,
+                    gcj02_longitude=None,
+                    point_count=j - i,
+                )
+            )
+            i = j
+            continue
+        i += 1
+    return stays
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=int, default=24)
+    parser.add_argument("--skip-reference", action="store_true")
+    args = parser.parse_args()
+
+    track = _make_track(args.hours)
+    thr, min_s = DEFAULT_DISTANCE_THRESHOLD_M, DEFAULT_TIME_THRESHOLD_S
+
+    t0 = time.perf_counter()
+    stays = detect_stay_candidates(
+        track,  # type: ignore[arg-type]
+        distance_threshold_m=thr,
+        time_threshold_s=min_s,
+    )
+    new_s = time.perf_counter() - t0
+    line = f"points={len(track)} stays={len(stays)} detect={new_s:.3f}s"
+
+    if not args.skip_reference:
+        t0 = time.perf_counter()
+        expected = _reference(track, thr, min_s)
+        ref_s = time.perf_counter() - t0
+        if stays != expected:
+            raise SystemExit("detect_stay_candidates output differs from reference")
+        line += f" reference={ref_s:.3f}s speedup={ref_s / new_s:.1f}x"
+    print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -42,6 +42,13 @@ def client(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> TestClient:
     db_session._engine = None  # noqa: SLF001
     db_session._sessionmaker = None  # noqa: SLF001
 
+    # Process-wide weather LRU/limiter state must not leak across tests.
+    from app.services import weather as weather_service
+
+    weather_service._memory_cache = None  # noqa: SLF001
+    weather_service._rate_limiter = None  # noqa: SLF001
+    weather_service._fetch_lock = None  # noqa: SLF001
+
     # Import models so Base.metadata is fully populated.
     import app.models  # noqa: F401
 
@@ -1,9 +1,26 @@
 from __future__ import annotations
 
+import asyncio
+import datetime as dt
 import uuid
 
+import pytest
+import sqlalchemy as sa
 from fastapi.testclient import TestClient
 
+from app.core.settings import get_settings
+from app.db.session import get_sessionmaker
+from app.models.anti_cheat_reaudit import AntiCheatReauditJob, AntiCheatReauditShard
+from app.models.anti_cheat_watermark import AntiCheatWatermark
+from app.models.track_point import TrackPoint
+from app.models.user import User
+from app.tasks.anti_cheat import (
+    _audit_sql_stmt,
+    _plan_shards,
+    audit_track_segment_task,
+    reaudit_shard_task,
+)
+
 
 def _register(client: TestClient, *, email: str, username: str, password: str) -> None:
     r = client.post(
@@ -132,3 +149,395 @@ def test_anti_cheat_normal_walking_does_not_mark_points_dirty(
     assert set(by_id) == {p1, p2}
     assert by_id[p1]["is_dirty"] is False
     assert by_id[p2]["is_dirty"] is False
+
+
+def test_anti_cheat_reaudit_only_writes_flipped_flags(client: TestClient) -> None:
+    email = f"u-{uuid.uuid4().hex}@test.com"
+    username = f"u-{uuid.uuid4().hex}"
+    password = "password123!"
+    _register(client, email=email, username=username, password=password)
+    access = _login_access_token(client, username=username, password=password)
+
+    lat1, lon1 = 31.2304, 121.4737
+    items = [
+        {
+            "client_point_id": str(uuid.uuid4()),
+            "recorded_at": f"2026-01-30T12:00:0{i}Z",
+            "latitude": lat1 + 0.0000899 * i,
+            "longitude": lon1,
+            "accuracy": 5.0,
+            "step_delta": 10 if i == 2 else None,  # impossible step rate at i=2
+        }
+        for i in range(4)
+    ]
+    r = client.post(
+        "/v1/tracks/batch", json={"items": items}, headers=_auth_header(access)
+    )
+    assert r.status_code == 200, r.text
+
+    async def _tamper() -> uuid.UUID:
+        async with get_sessionmaker()() as session:
+            user = (
+                await session.execute(sa.select(User).where(User.username == username))
+            ).scalar_one()
+            # Corrupt one stored flag so the next audit has exactly one flip.
+            await session.execute(
+                sa.update(TrackPoint)
+                .where(TrackPoint.user_id == user.id)
+                .where(TrackPoint.recorded_at == dt.datetime(2026, 1, 30, 12, 0, 1))
+                .values(is_dirty=True)
+            )
+            await session.commit()
+            return user.id
+
+    start, end = "2026-01-30T11:59:00Z", "2026-01-30T12:01:00Z"
+    user_id = asyncio.run(_tamper())
+
+    out = audit_track_segment_task(str(user_id), start, end)
+    assert out == {"updated": 1, "dirty": 1, "clean": 3}
+
+    # Nothing changed since: the re-audit writes no rows.
+    out = audit_track_segment_task(str(user_id), start, end)
+    assert out == {"updated": 0, "dirty": 1, "clean": 3}
+
+
+def test_plan_shards_covers_range_with_inclusive_windows() -> None:
+    t0 = dt.datetime(2026, 1, 1, tzinfo=dt.timezone.utc)
+    us = dt.timedelta(microseconds=1)
+
+    assert _plan_shards(t0, t0, days=30) == [(t0, t0)]
+    day2 = t0 + dt.timedelta(days=2)
+    assert _plan_shards(t0, day2 + dt.timedelta(hours=1), days=1) == [
+        (t0, t0 + dt.timedelta(days=1) - us),
+        (t0 + dt.timedelta(days=1), day2 - us),
+        (day2, day2 + dt.timedelta(hours=1)),
+    ]
+
+
+def test_admin_reaudit_job_shards_chunks_and_resumes(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("WAYFARER_ANTI_CHEAT_REAUDIT_SHARD_DAYS", "1")
+    monkeypatch.setenv("WAYFARER_ANTI_CHEAT_REAUDIT_CHUNK_ROWS", "2")
+    get_settings.cache_clear()
+
+    password = "password123!"
+    # The first registered user is the admin.
+    _register(client, email="admin@test.com", username="admin", password=password)
+    admin_access = _login_access_token(client, username="admin", password=password)
+
+    usernames = [f"u-{uuid.uuid4().hex}" for _ in range(2)]
+    t0 = dt.datetime(2026, 1, 30, 12, tzinfo=dt.timezone.utc)
+    for username in usernames:
+        _register(
+            client, email=f"{username}@test.com", username=username, password=password
+        )
+        access = _login_access_token(client, username=username, password=password)
+        # 9 points, 8 h apart => 3 days; every third one has a 10 m "step".
+        items = [
+            {
+                "client_point_id": str(uuid.uuid4()),
+                "recorded_at": (t0 + dt.timedelta(hours=8 * k))
+                .isoformat()
+                .replace("+00:00", "Z"),
+                "latitude": 31.2304 + 0.0000899 * k,
+                "longitude": 121.4737,
+                "accuracy": 5.0,
+                "step_delta": 1 if k % 3 == 1 else None,
+            }
+            for k in range(9)
+        ]
+        r = client.post(
+            "/v1/tracks/batch", json={"items": items}, headers=_auth_header(access)
+        )
+        assert r.status_code == 200, r.text
+
+    async def _flags() -> dict[int, bool]:
+        async with get_sessionmaker()() as session:
+            rows = (
+                await session.execute(sa.select(TrackPoint.id, TrackPoint.is_dirty))
+            ).all()
+            return {pid: bool(dirty) for pid, dirty in rows}
+
+    async def _flip(ids: list[int]) -> None:
+        async with get_sessionmaker()() as session:
+            await session.execute(
+                sa.update(TrackPoint)
+                .where(TrackPoint.id.in_(ids))
+                .values(is_dirty=~TrackPoint.is_dirty)
+            )
+            await session.commit()
+
+    expected = asyncio.run(_flags())
+    assert len(expected) == 18
+    assert sum(expected.values()) == 6
+    asyncio.run(_flip(list(expected)))
+
+    headers = _auth_header(admin_access)
+    r = client.post("/v1/admin/anti-cheat/reaudits", headers=headers)
+    assert r.status_code == 202, r.text
+    job_id = r.json()["job_id"]
+
+    r = client.get(f"/v1/admin/anti-cheat/reaudits/{job_id}", headers=headers)
+    assert r.status_code == 200, r.text
+    status = r.json()
+    assert status["state"] == "SUCCEEDED"
+    assert status["shards_total"] == status["shards_done"] == 6  # 2 users x 3 days
+    assert status["shards_failed"] == 0
+    assert status["points_audited"] == 18
+    assert status["points_updated"] == 18
+    assert status["points_dirty"] == 6
+    assert status["elapsed_s"] is not None
+    assert asyncio.run(_flags()) == expected
+
+    async def _rewind_shard() -> tuple[int, list[int]]:
+        # Pretend a worker died after the first chunk of a shard.
+        async with get_sessionmaker()() as session:
+            await session.execute(
+                sa.update(AntiCheatReauditJob)
+                .where(AntiCheatReauditJob.id == uuid.UUID(job_id))
+                .values(
+                    state="RUNNING",
+                    shards_done=AntiCheatReauditJob.shards_done - 1,
+                    finished_at=None,
+                )
+            )
+            shard = (
+                (
+                    await session.execute(
+                        sa.select(AntiCheatReauditShard)
+                        .where(AntiCheatReauditShard.points_audited == 3)
+                        .order_by(AntiCheatReauditShard.id)
+                    )
+                )
+                .scalars()
+                .first()
+            )
+            assert shard is not None
+            rows = (
+                await session.execute(
+                    sa.select(
+                        TrackPoint.id,
+                        TrackPoint.recorded_at,
+                        TrackPoint.latitude,
+                        TrackPoint.longitude,
+                        TrackPoint.accuracy,
+                    )
+                    .where(TrackPoint.user_id == shard.user_id)
+                    .where(TrackPoint.recorded_at >= shard.start_at)
+                    .where(TrackPoint.recorded_at <= shard.end_at)
+                    .order_by(TrackPoint.recorded_at, TrackPoint.id)
+                )
+            ).all()
+            assert len(rows) == 3
+            ts = rows[1].recorded_at.replace(tzinfo=dt.timezone.utc).isoformat()
+            shard.state = "RUNNING"
+            shard.checkpoint = {
+                "after_recorded_at": ts,
+                "after_id": rows[1].id,
+                "prev": [ts, rows[1].latitude, rows[1].longitude, rows[1].accuracy],
+            }
+            await session.commit()
+            return shard.id, [row.id for row in rows]
+
+    _, point_ids = asyncio.run(_rewind_shard())
+    asyncio.run(_flip(point_ids))
+
+    # The lost worker's message would be redelivered (acks_late); an admin
+    # can also re-enqueue every unfinished shard.
+    assert reaudit_shard_task.acks_late and reaudit_shard_task.reject_on_worker_lost
+    r = client.post(f"/v1/admin/anti-cheat/reaudits/{job_id}/retry", headers=headers)
+    assert r.status_code == 202, r.text
+    assert r.json()["shards_requeued"] == 1
+
+    r = client.get(f"/v1/admin/anti-cheat/reaudits/{job_id}", headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json()["state"] == "SUCCEEDED"
+    assert r.json()["shards_done"] == 6
+    r = client.post(f"/v1/admin/anti-cheat/reaudits/{job_id}/retry", headers=headers)
+    assert r.status_code == 409, r.text
+
+    after = asyncio.run(_flags())
+    # Only the point past the checkpoint is re-audited.
+    assert [after[pid] == expected[pid] for pid in point_ids] == [False, False, True]
+
+
+def test_anti_cheat_watermark_audits_appended_points_incrementally(
+    client: TestClient,
+) -> None:
+    email = f"u-{uuid.uuid4().hex}@test.com"
+    username = f"u-{uuid.uuid4().hex}"
+    password = "password123!"
+    _register(client, email=email, username=username, password=password)
+    access = _login_access_token(client, username=username, password=password)
+
+    lat1, lon1 = 31.2304, 121.4737
+
+    def _item(second: int, *, lat: float) -> dict[str, object]:
+        return {
+            "client_point_id": str(uuid.uuid4()),
+            "recorded_at": f"2026-01-30T12:00:{second:02d}Z",
+            "latitude": lat,
+            "longitude": lon1,
+            "accuracy": 5.0,
+        }
+
+    def _upload(items: list[dict[str, object]]) -> None:
+        r = client.post(
+            "/v1/tracks/batch", json={"items": items}, headers=_auth_header(access)
+        )
+        assert r.status_code == 200, r.text
+
+    async def _state() -> tuple[uuid.UUID, AntiCheatWatermark, dict[int, bool]]:
+        async with get_sessionmaker()() as session:
+            user = (
+                await session.execute(sa.select(User).where(User.username == username))
+            ).scalar_one()
+            mark = await session.get(AntiCheatWatermark, user.id)
+            assert mark is not None
+            rows = (
+                await session.execute(
+                    sa.select(TrackPoint.recorded_at, TrackPoint.is_dirty).where(
+                        TrackPoint.user_id == user.id
+                    )
+                )
+            ).all()
+            return user.id, mark, {ts.second: dirty for ts, dirty in rows}
+
+    _upload([_item(i, lat=lat1 + 0.00001 * i) for i in range(4)])
+    user_id, mark, flags = asyncio.run(_state())
+    assert mark.last_recorded_at.replace(tzinfo=None) == dt.datetime(
+        2026, 1, 30, 12, 0, 3
+    )
+    assert not any(flags.values())
+
+    # Appended batch: its first point teleports ~11km from the watermark point,
+    # which the audit knows without re-reading older points.
+    _upload([_item(10, lat=lat1 + 0.1), _item(11, lat=lat1 + 0.1)])
+    _, mark, flags = asyncio.run(_state())
+    assert mark.last_recorded_at.replace(tzinfo=None).second == 11
+    assert flags[10] is True and flags[11] is False
+
+    # Points stored without an audit in between are still covered: the
+    # incremental audit starts at the watermark, not at start_at.
+    async def _insert_unaudited() -> None:
+        async with get_sessionmaker()() as session:
+            for second in (15, 20):
+                session.add(
+                    TrackPoint(
+                        user_id=user_id,
+                        client_point_id=uuid.uuid4(),
+                        recorded_at=dt.datetime(
+                            2026, 1, 30, 12, 0, second, tzinfo=dt.timezone.utc
+                        ),
+                        latitude=lat1 + 0.2,
+                        longitude=lon1,
+                        accuracy=5.0,
+                    )
+                )
+            await session.commit()
+
+    asyncio.run(_insert_unaudited())
+    out = audit_track_segment_task(
+        str(user_id), "2026-01-30T12:00:20Z", "2026-01-30T12:00:20Z"
+    )
+    assert out == {"updated": 1, "dirty": 1, "clean": 1}
+    _, mark, flags = asyncio.run(_state())
+    assert flags[15] is True and flags[20] is False
+    assert mark.last_recorded_at.replace(tzinfo=None).second == 20
+
+    # A back-filled point before the watermark re-audits its window and
+    # leaves the watermark where it was.
+    _upload([_item(5, lat=lat1 + 0.00005)])
+    _, mark, flags = asyncio.run(_state())
+    assert flags[5] is False
+    assert mark.last_recorded_at.replace(tzinfo=None).second == 20
+
+    # A point stored later with the watermark's own timestamp sorts after it
+    # by id, so the next incremental audit still covers it.
+    async def _insert_tie() -> int:
+        async with get_sessionmaker()() as session:
+            point = TrackPoint(
+                user_id=user_id,
+                client_point_id=uuid.uuid4(),
+                recorded_at=dt.datetime(2026, 1, 30, 12, 0, 20, tzinfo=dt.timezone.utc),
+                latitude=lat1 + 0.3,
+                longitude=lon1,
+                accuracy=5.0,
+            )
+            session.add(point)
+            await session.commit()
+            return point.id
+
+    tie_id = asyncio.run(_insert_tie())
+    assert tie_id > mark.last_point_id
+    _upload([_item(25, lat=lat1 + 0.3)])
+
+    async def _is_dirty(point_id: int) -> bool:
+        async with get_sessionmaker()() as session:
+            point = await session.get(TrackPoint, point_id)
+            assert point is not None
+            return point.is_dirty
+
+    assert asyncio.run(_is_dirty(tie_id)) is True
+    _, mark, flags = asyncio.run(_state())
+    assert flags[25] is False
+    assert mark.last_recorded_at.replace(tzinfo=None).second == 25
+
+
+def test_sql_engine_is_one_lag_driven_update_on_postgresql() -> None:
+    from sqlalchemy.dialects import postgresql
+
+    stmt = _audit_sql_stmt(
+        user_id=uuid.uuid4(),
+        start_at=dt.datetime(2026, 1, 30, tzinfo=dt.timezone.utc),
+        end_at=dt.datetime(2026, 1, 31, tzinfo=dt.timezone.utc),
+    )
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    assert sql.count("UPDATE track_points") == 1
+    assert "lag(track_points.latitude) OVER (PARTITION BY track_points.user_id" in sql
+    # Only changed flags/reasons are written; the haversine runs once per pair.
+    assert "flags.was_reasons != flags.reasons" in sql
+    assert sql.count("asin(") == 1
+
+
+def test_sql_engine_setting_falls_back_to_python_off_postgresql(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("WAYFARER_ANTI_CHEAT_ENGINE", "sql")
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    email = f"u-{uuid.uuid4().hex}@test.com"
+    username = f"u-{uuid.uuid4().hex}"
+    password = "password123!"
+    _register(client, email=email, username=username, password=password)
+    access = _login_access_token(client, username=username, password=password)
+
+    batch = {
+        "items": [
+            {
+                "client_point_id": str(uuid.uuid4()),
+                "recorded_at": f"2026-01-30T12:00:0{i}Z",
+                "latitude": 31.2304 + 0.0000899 * i,
+                "longitude": 121.4737,
+                "accuracy": 5.0,
+                "step_delta": 10 if i else None,
+            }
+            for i in range(2)
+        ]
+    }
+    r = client.post("/v1/tracks/batch", json=batch, headers=_auth_header(access))
+    assert r.status_code == 200, r.text
+
+    r = client.get(
+        "/v1/tracks/query?start=2026-01-30T11:59:00Z&end=2026-01-30T12:00:02Z",
+        headers=_auth_header(access),
+    )
+    assert r.status_code == 200, r.text
+    assert [it["is_dirty"] for it in r.json()["items"]] == [False, True]
+
+    monkeypatch.delenv("WAYFARER_ANTI_CHEAT_ENGINE", raising=False)
+    get_settings.cache_clear()
@@ -0,0 +1,382 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import math
+import random
+import uuid
+from types import SimpleNamespace
+
+import pytest
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+
+from app.db.session import get_sessionmaker
+from app.models.track_point import TrackPoint
+from app.models.user import User
+from app.services.anti_cheat_rules import (
+    ACCURACY_FUDGE_M,
+    EARTH_RADIUS_M,
+    MAX_STEP_LENGTH_M,
+    MAX_STEP_RATE_STEPS_PER_SEC,
+    MIN_STEP_LENGTH_M,
+    RULES,
+    TELEPORT_SPEED_MPS,
+    RuleSet,
+    build_segment,
+)
+from app.tasks.anti_cheat import _audit_sql_stmt, audit_track_segment_task
+
+
+def _register(client: TestClient, *, email: str, username: str, password: str) -> None:
+    r = client.post(
+        "/v1/auth/register",
+        json={"email": email, "username": username, "password": password},
+    )
+    assert r.status_code == 201, r.text
+
+
+def _login_access_token(client: TestClient, *, username: str, password: str) -> str:
+    r = client.post(
+        "/v1/auth/login",
+        json={"username": username, "password": password},
+    )
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body.get("access_token"), body
+    return str(body["access_token"])
+
+
+def _auth_header(access_token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+def _segment(**columns: list) -> object:
+    t0 = dt.datetime(2026, 1, 30, 12, tzinfo=dt.timezone.utc)
+    n = len(columns["latitudes"])
+    return build_segment(
+        [t0 + dt.timedelta(seconds=10 * i) for i in range(n)],
+        columns["latitudes"],
+        [121.4737] * n,
+        [5.0] * n,
+        columns.get("step_deltas", [None] * n),
+        altitudes=columns.get("altitudes"),
+        activity_types=columns.get("activity_types"),
+    )
+
+
+def test_rule_set_config_overrides_thresholds_and_ignores_junk() -> None:
+    assert RuleSet.from_config(None) == RuleSet.default()
+    assert RuleSet.for_user_settings({"timezone": "UTC"}) == RuleSet.default()
+    assert RuleSet.default().names == (
+        "time_order",
+        "step_rate",
+        "step_length",
+        "teleport",
+    )
+
+    rules = RuleSet.for_user_settings(
+        {
+            "anti_cheat": {
+                "teleport": {"max_speed_mps": 80, "bogus": 1, "accuracy_fudge_m": "x"},
+                "step_length": {"enabled": False},
+                "altitude_jump": {"enabled": True},
+                "no_such_rule": {"enabled": True},
+                "step_rate": "nope",
+            }
+        }
+    )
+    assert rules.names == ("time_order", "step_rate", "teleport", "altitude_jump")
+    assert rules.params("teleport") == {"max_speed_mps": 80.0, "accuracy_fudge_m": 5.0}
+    assert rules.params("step_length") is None
+    assert not rules.sql_compatible
+
+
+def test_optional_rules_flag_altitude_jumps_and_activity_speed() -> None:
+    # 10 s apart; ~11 m per step north (~1.1 m/s) except a ~111 m dash.
+    seg = _segment(
+        latitudes=[31.2304, 31.2305, 31.2306, 31.2316, 31.2317],
+        altitudes=[10.0, 11.0, 400.0, 401.0, None],
+        activity_types=[2, 2, 2, 1, 2],
+    )
+
+    default = RuleSet.default().evaluate(seg)
+    assert default.flags == [False] * 5
+    assert default.counts == {
+        "time_order": 0,
+        "step_rate": 0,
+        "step_length": 0,
+        "teleport": 0,
+    }
+
+    rules = RuleSet.from_config(
+        {
+            "altitude_jump": {"enabled": True, "max_vertical_mps": 20},
+            "activity_speed": {"enabled": True, "still_max_mps": 3},
+        }
+    )
+    result = rules.evaluate(seg)
+    # Point 2 climbs 389 m in 10 s; point 3 claims "still" while moving ~11 m/s.
+    assert result.flags == [False, False, True, True, False]
+    assert result.counts["altitude_jump"] == 1
+    assert result.counts["activity_speed"] == 1
+
+
+def test_sql_engine_uses_rule_set_thresholds() -> None:
+    from sqlalchemy.dialects import postgresql
+
+    rules = RuleSet.from_config(
+        {"teleport": {"max_speed_mps": 80}, "step_length": {"enabled": False}}
+    )
+    stmt = _audit_sql_stmt(user_id=uuid.uuid4(), rules=rules)
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    params = set(compiled.params.values())
+
+    assert 80.0 in params
+    assert 120.0 not in params
+    assert 0.3 not in params and 2.5 not in params  # disabled step-length rule
+
+
+def test_user_rule_overrides_apply_to_audit(client: TestClient) -> None:
+    email = f"u-{uuid.uuid4().hex}@test.com"
+    username = f"u-{uuid.uuid4().hex}"
+    password = "password123!"
+    _register(client, email=email, username=username, password=password)
+    access = _login_access_token(client, username=username, password=password)
+
+    # ~10 m in 1 s with 10 steps: 10 steps/s breaks the default limit of 4.
+    batch = {
+        "items": [
+            {
+                "client_point_id": str(uuid.uuid4()),
+                "recorded_at": f"2026-01-30T12:00:0{i}Z",
+                "latitude": 31.2304 + 0.0000899 * i,
+                "longitude": 121.4737,
+                "accuracy": 5.0,
+                "step_delta": 10 if i else None,
+            }
+            for i in range(2)
+        ]
+    }
+    r = client.post("/v1/tracks/batch", json=batch, headers=_auth_header(access))
+    assert r.status_code == 200, r.text
+
+    async def _allow_fast_steps() -> uuid.UUID:
+        async with get_sessionmaker()() as session:
+            user = (
+                await session.execute(sa.select(User).where(User.username == username))
+            ).scalar_one()
+            user.settings = {"anti_cheat": {"step_rate": {"max_steps_per_s": 12}}}
+            await session.commit()
+            return user.id
+
+    user_id = asyncio.run(_allow_fast_steps())
+    out = audit_track_segment_task(
+        str(user_id), "2026-01-30T11:59:00Z", "2026-01-30T12:01:00Z"
+    )
+    assert out == {"updated": 1, "dirty": 0, "clean": 2}
+
+
+def test_dirty_reasons_are_stored_and_counted_per_rule(client: TestClient) -> None:
+    password = "password123!"
+    # The first registered user is the admin.
+    _register(client, email="admin@test.com", username="admin", password=password)
+    admin_access = _login_access_token(client, username="admin", password=password)
+    username = f"u-{uuid.uuid4().hex}"
+    _register(
+        client, email=f"{username}@test.com", username=username, password=password
+    )
+    access = _login_access_token(client, username=username, password=password)
+
+    # ~10 m north per second. Point 1: 10 steps/s of 1 m (rate); point 2: one
+    # 10 m step (length); point 3: 40 steps/s of 0.25 m (both).
+    steps = [None, 10, 1, 40]
+    batch = {
+        "items": [
+            {
+                "client_point_id": str(uuid.uuid4()),
+                "recorded_at": f"2026-01-30T12:00:0{i}Z",
+                "latitude": 31.2304 + 0.0000899 * i,
+                "longitude": 121.4737,
+                "accuracy": 5.0,
+                "step_delta": steps[i],
+            }
+            for i in range(4)
+        ]
+    }
+    r = client.post("/v1/tracks/batch", json=batch, headers=_auth_header(access))
+    assert r.status_code == 200, r.text
+
+    async def _stored() -> tuple[uuid.UUID, list[tuple[bool, int]], tuple[str, str]]:
+        async with get_sessionmaker()() as session:
+            user = (
+                await session.execute(sa.select(User).where(User.username == username))
+            ).scalar_one()
+            rows = (
+                await session.execute(
+                    sa.select(TrackPoint.is_dirty, TrackPoint.dirty_reasons)
+                    .where(TrackPoint.user_id == user.id)
+                    .order_by(TrackPoint.recorded_at)
+                )
+            ).all()
+            plan = (
+                await session.execute(
+                    sa.text(
+                        "EXPLAIN QUERY PLAN SELECT count(*) FROM track_points "
+                        "WHERE dirty_reasons <> 0 AND user_id = :u "
+                        "AND recorded_at >= :s AND recorded_at <= :e"
+                    ),
+                    {"u": str(user.id), "s": "2026-01-30", "e": "2026-01-31"},
+                )
+            ).all()
+            all_users_plan = (
+                await session.execute(
+                    sa.text(
+                        "EXPLAIN QUERY PLAN SELECT count(*) FROM track_points "
+                        "WHERE dirty_reasons <> 0 "
+                        "AND recorded_at >= :s AND recorded_at <= :e"
+                    ),
+                    {"s": "2026-01-30", "e": "2026-01-31"},
+                )
+            ).all()
+            return (
+                user.id,
+                [tuple(row) for row in rows],
+                (
+                    "\n".join(str(p[-1]) for p in plan),
+                    "\n".join(str(p[-1]) for p in all_users_plan),
+                ),
+            )
+
+    user_id, stored, (user_plan, all_users_plan) = asyncio.run(_stored())
+    rate, length = RULES["step_rate"].bit, RULES["step_length"].bit
+    assert stored == [(False, 0), (True, rate), (True, length), (True, rate | length)]
+    assert "ix_track_points_user_dirty_recorded_at" in user_plan
+    # Without a user filter the recorded_at-first partial index serves it.
+    assert "ix_track_points_dirty_recorded_at" in all_users_plan
+
+    r = client.get(
+        "/v1/admin/anti-cheat/flags",
+        params={
+            "start": "2026-01-30T00:00:00Z",
+            "end": "2026-01-31T00:00:00Z",
+            "user_id": str(user_id),
+        },
+        headers=_auth_header(admin_access),
+    )
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["dirty_points"] == 3
+    counts = {it["rule"]: it["points"] for it in body["rules"]}
+    assert counts == {
+        "time_order": 0,
+        "step_rate": 2,
+        "step_length": 2,
+        "teleport": 0,
+        "altitude_jump": 0,
+        "activity_speed": 0,
+    }
+
+    r = client.get(
+        "/v1/admin/anti-cheat/flags",
+        params={"start": "2026-01-31T00:00:00Z", "end": "2026-02-01T00:00:00Z"},
+        headers=_auth_header(admin_access),
+    )
+    assert r.status_code == 200, r.text
+    assert r.json()["dirty_points"] == 0
+
+    r = client.get(
+        "/v1/admin/anti-cheat/flags",
+        params={"start": "2026-01-30T00:00:00Z", "end": "2026-01-31T00:00:00Z"},
+        headers=_auth_header(access),
+    )
+    assert r.status_code == 403
+
+
+def _haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(dphi / 2.0) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2.0) ** 2
+    )
+    return 2.0 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def _reference_is_dirty(prev: SimpleNamespace | None, cur: SimpleNamespace) -> bool:
+    # The original per-point hard rules, which the default rule set reproduces.
+    if prev is None:
+        return False
+
+    dt_s = (cur.recorded_at - prev.recorded_at).total_seconds()
+    step_delta = int(cur.step_delta or 0)
+    dist_m = _haversine_m(prev.latitude, prev.longitude, cur.latitude, cur.longitude)
+    acc = float(prev.accuracy or 0.0) + float(cur.accuracy or 0.0)
+    effective_dist_m = max(0.0, dist_m - (acc + ACCURACY_FUDGE_M))
+
+    if dt_s <= 0:
+        return step_delta > 0 or effective_dist_m > 0.0
+    if step_delta > 0 and (step_delta / dt_s) > MAX_STEP_RATE_STEPS_PER_SEC:
+        return True
+    if step_delta > 0:
+        step_len = dist_m / step_delta
+        if step_len < MIN_STEP_LENGTH_M or step_len > MAX_STEP_LENGTH_M:
+            return True
+    return (effective_dist_m / dt_s) > TELEPORT_SPEED_MPS
+
+
+def _random_track(rng: random.Random, n: int) -> list[SimpleNamespace]:
+    # Mix of walking, driving, GPS jumps, duplicate and out-of-order timestamps.
+    t = dt.datetime(2026, 1, 30, tzinfo=dt.timezone.utc)
+    lat, lon = 31.2304, 121.4737
+    out = []
+    for _ in range(n):
+        t += dt.timedelta(microseconds=rng.choice([0, 1, 250_000, 1_000_000, 10**7]))
+        if rng.random() < 0.05:
+            t -= dt.timedelta(seconds=rng.uniform(0, 5))
+        jump = 0.05 if rng.random() < 0.03 else 1e-4
+        lat += rng.uniform(-jump, jump)
+        lon += rng.uniform(-jump, jump)
+        out.append(
+            SimpleNamespace(
+                recorded_at=t,
+                latitude=lat,
+                longitude=lon,
+                accuracy=rng.choice([None, 0.0, 3.5, 25.0]),
+                step_delta=rng.choice([None, 0, 1, 2, 5, 40]),
+            )
+        )
+    return out
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("with_prev", [False, True])
+def test_default_rules_match_scalar_reference(seed: int, with_prev: bool) -> None:
+    rng = random.Random(seed)
+    track = _random_track(rng, 2000)
+    prev = track[0] if with_prev else None
+    points = track[1:] if with_prev else track
+
+    expected = []
+    cur_prev = prev
+    for p in points:
+        expected.append(_reference_is_dirty(cur_prev, p))
+        cur_prev = p
+
+    seg = build_segment(
+        [p.recorded_at for p in points],
+        [p.latitude for p in points],
+        [p.longitude for p in points],
+        [p.accuracy for p in points],
+        [p.step_delta for p in points],
+        prev=(
+            (prev.recorded_at, prev.latitude, prev.longitude, prev.accuracy)
+            if prev is not None
+            else None
+        ),
+    )
+    flags = RuleSet.default().evaluate(seg).flags
+    assert flags == expected
+    assert any(flags) and not all(flags)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import uuid
 
 import httpx
@@ -185,3 +186,208 @@ def test_export_compat_get_threshold_fallback_returns_202(
     # Restore defaults for other tests in this process.
     monkeypatch.delenv("WAYFARER_SYNC_THRESHOLD_POINTS", raising=False)
     get_settings.cache_clear()
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_export_compat_get_columnar_formats_roundtrip(
+    client: TestClient, fmt: str
+) -> None:
+    pa = pytest.importorskip("pyarrow")
+
+    email = f"u-{uuid.uuid4().hex}@test.com"
+    username = f"u-{uuid.uuid4().hex}"
+    password = "password123!"
+    _register(client, email=email, username=username, password=password)
+    access = _login_access_token(client, username=username, password=password)
+    pid = _upload_one_point(client, access_token=access)
+
+    r = client.get(
+        f"/v1/export?start=2026-01-30T11:59:00Z&end=2026-01-30T12:01:00Z&format={fmt}&include_weather=false&timezone=Asia/Shanghai",
+        headers=_auth_header(access),
+    )
+    assert r.status_code == 200, r.text
+    assert f'filename="wayfarer-export.{fmt}"' in r.headers["Content-Disposition"]
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(pa.BufferReader(r.content))
+    else:
+        table = pa.ipc.open_file(pa.BufferReader(r.content)).read_all()
+
+    assert table.num_rows == 1
+    assert table.schema.field("recorded_at").type.tz == "Asia/Shanghai"
+    row = table.to_pylist()[0]
+    assert row["client_point_id"] == pid
+    assert row["latitude"] == 31.2304
+    assert row["longitude"] == 121.4737
+    assert row["is_dirty"] is False
+    assert row["weather_snapshot_json"] is None
+
+
+def test_export_job_streams_keyset_chunks_in_order(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # Tiny pages force several keyset round trips, including a same-timestamp tie.
+    monkeypatch.setenv("WAYFARER_EXPORT_CHUNK_ROWS", "2")
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    email = f"u-{uuid.uuid4().hex}@test.com"
+    username = f"u-{uuid.uuid4().hex}"
+    password = "password123!"
+    _register(client, email=email, username=username, password=password)
+    access = _login_access_token(client, username=username, password=password)
+
+    stamps = ["12:00:00", "12:00:01", "12:00:01", "12:00:02", "12:00:03"]
+    items = [
+        {
+            "client_point_id": str(uuid.uuid4()),
+            "recorded_at": f"2026-01-30T{s}Z",
+            "latitude": 31.2304,
+            "longitude": 121.4737,
+            "accuracy": 8.0,
+        }
+        for s in stamps
+    ]
+    r = client.post(
+        "/v1/tracks/batch", json={"items": items}, headers=_auth_header(access)
+    )
+    assert r.status_code == 200, r.text
+
+    r = client.post(
+        "/v1/export",
+        headers=_auth_header(access),
+        json={
+            "start": "2026-01-30T11:59:00Z",
+            "end": "2026-01-30T12:01:00Z",
+            "format": "CSV",
+            "include_weather": False,
+            "timezone": "UTC",
+        },
+    )
+    assert r.status_code == 202, r.text
+    job_id = r.json()["job_id"]
+
+    d = client.get(f"/v1/export/{job_id}/download", headers=_auth_header(access))
+    assert d.status_code == 200, d.text
+    rows = [ln.split(",") for ln in d.content.decode("utf-8").splitlines()[1:]]
+    assert sorted(row[0] for row in rows) == sorted(
+        it["client_point_id"] for it in items
+    )
+    assert [row[1] for row in rows] == [f"2026-01-30T{s}Z" for s in stamps]
+
+    monkeypatch.delenv("WAYFARER_EXPORT_CHUNK_ROWS", raising=False)
+    get_settings.cache_clear()
+
+
+def test_export_weather_links_points_to_cache_rows_in_bulk(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("WAYFARER_EXPORT_CHUNK_ROWS", "2")
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    email = f"u-{uuid.uuid4().hex}@test.com"
+    username = f"u-{uuid.uuid4().hex}"
+    password = "password123!"
+    _register(client, email=email, username=username, password=password)
+    access = _login_access_token(client, username=username, password=password)
+
+    items = [
+        {
+            "client_point_id": str(uuid.uuid4()),
+            "recorded_at": f"2026-01-30T12:00:0{i}Z",
+            "latitude": 31.2304,
+            "longitude": 121.4737,
+            "accuracy": 8.0,
+        }
+        for i in range(5)
+    ]
+    r = client.post(
+        "/v1/tracks/batch", json={"items": items}, headers=_auth_header(access)
+    )
+    assert r.status_code == 200, r.text
+
+    async def fake_get(self, url: str, params=None, timeout=None):  # noqa: ANN001
+        payload = {"hourly": {"time": ["2026-01-30T12:00"], "temperature_2m": [9.5]}}
+        return httpx.Response(200, json=payload, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+
+    import sqlalchemy as sa
+
+    from app.db.session import get_engine
+
+    updates: list[bool] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):  # noqa: ANN001, ARG001
+        if statement.startswith("UPDATE track_points"):
+            updates.append(executemany)
+
+    def _export() -> str:
+        r = client.post(
+            "/v1/export",
+            headers=_auth_header(access),
+            json={
+                "start": "2026-01-30T11:59:00Z",
+                "end": "2026-01-30T12:01:00Z",
+                "format": "CSV",
+                "include_weather": True,
+                "timezone": "UTC",
+            },
+        )
+        assert r.status_code == 202, r.text
+        job_id = r.json()["job_id"]
+        s = client.get(f"/v1/export/{job_id}", headers=_auth_header(access))
+        assert s.json()["state"] == "SUCCEEDED", s.json()
+        d = client.get(f"/v1/export/{job_id}/download", headers=_auth_header(access))
+        assert d.status_code == 200, d.text
+        return d.content.decode("utf-8")
+
+    engine = get_engine().sync_engine
+    sa.event.listen(engine, "before_cursor_execute", _record)
+    try:
+        first = _export()
+    finally:
+        sa.event.remove(engine, "before_cursor_execute", _record)
+    # One executemany UPDATE per keyset chunk (2 + 2 + 1 rows).
+    assert updates == [True, True, False]
+
+    assert '""temperature_2m"":9.5' in first
+
+    # Points reference one shared weather_cache row instead of copying JSON.
+    async def _weather_columns() -> list[tuple[int | None, object]]:
+        from app.db.session import get_sessionmaker
+        from app.models.track_point import TrackPoint
+
+        async with get_sessionmaker()() as session:
+            rows = await session.execute(
+                sa.select(TrackPoint.weather_cache_id, TrackPoint.weather_snapshot)
+            )
+            return [tuple(r) for r in rows.all()]
+
+    columns = asyncio.run(_weather_columns())
+    assert len(columns) == 5
+    assert len({cache_id for cache_id, _ in columns}) == 1
+    assert all(cache_id is not None and snap is None for cache_id, snap in columns)
+
+    # A repeat export resolves the references and needs no enrichment writes.
+    async def fail_get(self, url: str, params=None, timeout=None):  # noqa: ANN001
+        raise AssertionError("points were already enriched")
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", fail_get)
+    updates.clear()
+    sa.event.listen(engine, "before_cursor_execute", _record)
+    try:
+        assert _export() == first
+    finally:
+        sa.event.remove(engine, "before_cursor_execute", _record)
+    assert updates == []
+
+    monkeypatch.delenv("WAYFARER_EXPORT_CHUNK_ROWS", raising=False)
+    get_settings.cache_clear()
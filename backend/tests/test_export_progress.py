@@ -0,0 +1,397 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import uuid
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.db.session import get_sessionmaker
+from app.models.export_job import ExportJob
+from app.models.user import User
+
+
+def _register(client: TestClient, *, email: str, username: str, password: str) -> None:
+    r = client.post(
+        "/v1/auth/register",
+        json={"email": email, "username": username, "password": password},
+    )
+    assert r.status_code == 201, r.text
+
+
+def _login_access_token(client: TestClient, *, username: str, password: str) -> str:
+    r = client.post(
+        "/v1/auth/login",
+        json={"username": username, "password": password},
+    )
+    assert r.status_code == 200, r.text
+    return str(r.json()["access_token"])
+
+
+def _auth_header(access_token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+def _setup_user_with_points(client: TestClient, *, n: int) -> tuple[str, uuid.UUID]:
+    username = f"u-{uuid.uuid4().hex}"
+    password = "password123!"
+    _register(
+        client, email=f"{username}@test.com", username=username, password=password
+    )
+    access = _login_access_token(client, username=username, password=password)
+
+    items = [
+        {
+            "client_point_id": str(uuid.uuid4()),
+            "recorded_at": f"2026-01-30T12:00:{i:02d}Z",
+            "latitude": 31.2304 + i * 1e-5,
+            "longitude": 121.4737,
+            "altitude": float(i),
+            "accuracy": 8.0,
+        }
+        for i in range(n)
+    ]
+    r = client.post(
+        "/v1/tracks/batch", json={"items": items}, headers=_auth_header(access)
+    )
+    assert r.status_code == 200, r.text
+
+    async def _user_id() -> uuid.UUID:
+        async with get_sessionmaker()() as session:
+            user = (
+                await session.execute(select(User).where(User.username == username))
+            ).scalar_one()
+            return user.id
+
+    return access, asyncio.run(_user_id())
+
+
+def _create_job(*, user_id: uuid.UUID, fmt: str) -> uuid.UUID:
+    async def _run() -> uuid.UUID:
+        async with get_sessionmaker()() as session:
+            job = ExportJob(
+                user_id=user_id,
+                state="CREATED",
+                format=fmt,
+                include_weather=False,
+                start_at=dt.datetime(2026, 1, 30, 11, 59, tzinfo=dt.timezone.utc),
+                end_at=dt.datetime(2026, 1, 30, 12, 1, tzinfo=dt.timezone.utc),
+                timezone="UTC",
+            )
+            session.add(job)
+            await session.commit()
+            return job.id
+
+    return asyncio.run(_run())
+
+
+def _load_job(job_id: uuid.UUID) -> ExportJob:
+    async def _run() -> ExportJob:
+        async with get_sessionmaker()() as session:
+            return (
+                await session.execute(select(ExportJob).where(ExportJob.id == job_id))
+            ).scalar_one()
+
+    return asyncio.run(_run())
+
+
+def test_export_job_status_reports_progress(client: TestClient) -> None:
+    access, _ = _setup_user_with_points(client, n=3)
+
+    r = client.post(
+        "/v1/export",
+        headers=_auth_header(access),
+        json={
+            "start": "2026-01-30T11:59:00Z",
+            "end": "2026-01-30T12:01:00Z",
+            "format": "CSV",
+            "include_weather": False,
+            "timezone": "UTC",
+        },
+    )
+    assert r.status_code == 202, r.text
+
+    s = client.get(f"/v1/export/{r.json()['job_id']}", headers=_auth_header(access))
+    assert s.status_code == 200, s.text
+    body = s.json()
+    assert body["state"] == "SUCCEEDED"
+    assert body["rows_written"] == 3
+    assert body["total_rows"] == 3
+
+
+@pytest.mark.parametrize("fmt", ["CSV", "GeoJSON", "GPX", "KML"])
+def test_export_job_resumes_from_checkpoint_after_crash(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+    fmt: str,
+) -> None:
+    monkeypatch.setenv("WAYFARER_EXPORT_CHUNK_ROWS", "2")
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    from app.tasks import export as export_tasks
+
+    access, user_id = _setup_user_with_points(client, n=5)
+    job_id = _create_job(user_id=user_id, fmt=fmt)
+
+    writer_cls = export_tasks._WRITERS[fmt]  # noqa: SLF001
+    original_write_rows = writer_cls.write_rows
+    calls: list[int] = []
+
+    def crashing_write_rows(self, points):  # noqa: ANN001
+        calls.append(len(points))
+        original_write_rows(self, points)
+        if len(calls) == 2:
+            # Bytes hit the .part file but the checkpoint was never committed.
+            raise RuntimeError("worker lost")
+
+    monkeypatch.setattr(writer_cls, "write_rows", crashing_write_rows)
+    with pytest.raises(RuntimeError, match="worker lost"):
+        export_tasks.run_export_job_task(str(job_id))
+
+    job = _load_job(job_id)
+    assert job.state == "RUNNING"
+    assert job.rows_written == 2
+    assert job.total_rows == 5
+    assert job.checkpoint is not None
+    assert job.artifact_path is None
+
+    calls.clear()
+
+    def counting_write_rows(self, points):  # noqa: ANN001
+        calls.append(len(points))
+        original_write_rows(self, points)
+
+    monkeypatch.setattr(writer_cls, "write_rows", counting_write_rows)
+    result = export_tasks.run_export_job_task(str(job_id))
+    assert result["state"] == "SUCCEEDED"
+    # Only the rows after the committed checkpoint are exported again.
+    assert calls == [2, 1]
+    monkeypatch.setattr(writer_cls, "write_rows", original_write_rows)
+
+    job = _load_job(job_id)
+    assert job.rows_written == 5
+    assert job.checkpoint is None
+
+    # The resumed artifact is identical to a fresh single-pass export.
+    d = client.get(f"/v1/export/{job_id}/download", headers=_auth_header(access))
+    assert d.status_code == 200, d.text
+    fresh = client.get(
+        f"/v1/export?start=2026-01-30T11:59:00Z&end=2026-01-30T12:01:00Z&format={fmt}&timezone=UTC",
+        headers=_auth_header(access),
+    )
+    assert fresh.status_code == 200, fresh.text
+    assert d.content == fresh.content
+
+    monkeypatch.delenv("WAYFARER_EXPORT_CHUNK_ROWS", raising=False)
+    get_settings.cache_clear()
+
+
+def test_export_job_redelivered_after_worker_lost_resumes_from_checkpoint(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("WAYFARER_EXPORT_CHUNK_ROWS", "2")
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    from billiard.einfo import ExceptionInfo
+    from billiard.exceptions import WorkerLostError
+    from celery.worker.request import Request
+    from kombu import Connection
+
+    from app.tasks import export as export_tasks
+    from app.tasks.celery_app import celery_app
+
+    _, user_id = _setup_user_with_points(client, n=5)
+    job_id = _create_job(user_id=user_id, fmt="CSV")
+    task = export_tasks.run_export_job_task
+
+    writer_cls = export_tasks._WRITERS["CSV"]  # noqa: SLF001
+    original_write_rows = writer_cls.write_rows
+    calls: list[int] = []
+
+    def killed_write_rows(self, points):  # noqa: ANN001
+        calls.append(len(points))
+        original_write_rows(self, points)
+        if len(calls) == 2:
+            # The pool child dies here; nothing in the task gets to run.
+            raise SystemExit(1)
+
+    def _deliver(queue):  # noqa: ANN001, ANN202
+        message = queue.get(timeout=1)
+        return Request(
+            message,
+            app=celery_app,
+            task=task,
+            on_ack=message.ack_log_error,
+            on_reject=message.reject_log_error,
+        )
+
+    with Connection("memory://") as conn:
+        queue = conn.SimpleQueue(f"export-{uuid.uuid4().hex}")
+        task_message = celery_app.amqp.as_task_v2(
+            str(uuid.uuid4()), task.name, args=(str(job_id),)
+        )
+        queue.put(
+            task_message.body,
+            headers=task_message.headers,
+            serializer="json",
+            **task_message.properties,
+        )
+
+        request = _deliver(queue)
+        monkeypatch.setattr(writer_cls, "write_rows", killed_write_rows)
+        with pytest.raises(SystemExit):
+            request.execute()
+        # What the pool reports once it notices the dead child.
+        try:
+            raise WorkerLostError("Worker exited prematurely")
+        except WorkerLostError:
+            request.on_failure(ExceptionInfo())
+
+        job = _load_job(job_id)
+        assert job.state == "RUNNING"
+        assert job.rows_written == 2
+        assert job.checkpoint is not None
+
+        calls.clear()
+
+        def counting_write_rows(self, points):  # noqa: ANN001
+            calls.append(len(points))
+            original_write_rows(self, points)
+
+        monkeypatch.setattr(writer_cls, "write_rows", counting_write_rows)
+        redelivered = _deliver(queue)
+        result = redelivered.execute()
+        assert queue.qsize() == 0
+        queue.close()
+
+    assert result["state"] == "SUCCEEDED"
+    # The redelivered message picks up after the committed checkpoint.
+    assert calls == [2, 1]
+
+    job = _load_job(job_id)
+    assert job.rows_written == 5
+    assert job.checkpoint is None
+
+    monkeypatch.delenv("WAYFARER_EXPORT_CHUNK_ROWS", raising=False)
+    get_settings.cache_clear()
+
+
+def test_export_job_stops_streaming_when_canceled(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("WAYFARER_EXPORT_CHUNK_ROWS", "2")
+    monkeypatch.setenv("WAYFARER_EXPORT_CANCEL_CHECK_INTERVAL_S", "0")
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    from app.tasks import export as export_tasks
+
+    access, user_id = _setup_user_with_points(client, n=5)
+    job_id = _create_job(user_id=user_id, fmt="CSV")
+
+    original_write_rows = export_tasks._CsvWriter.write_rows  # noqa: SLF001
+    calls: list[int] = []
+
+    def canceling_write_rows(self, points):  # noqa: ANN001
+        calls.append(len(points))
+        original_write_rows(self, points)
+        if len(calls) == 1:
+            # Cancel through the API while the worker is mid-stream.
+            r = client.post(f"/v1/export/{job_id}/cancel", headers=_auth_header(access))
+            assert r.status_code == 200, r.text
+
+    monkeypatch.setattr(export_tasks._CsvWriter, "write_rows", canceling_write_rows)  # noqa: SLF001
+    result = export_tasks.run_export_job_task(str(job_id))
+
+    assert result["status"] == "canceled"
+    # The next chunk boundary noticed the cancel; the rest was never exported.
+    assert calls == [2]
+
+    job = _load_job(job_id)
+    assert job.state == "CANCELED"
+    assert job.artifact_path is None
+
+    export_dir = get_settings().export_dir
+    leftovers = list((Path(export_dir) / str(user_id)).glob("*"))
+    assert leftovers == []
+
+    monkeypatch.delenv("WAYFARER_EXPORT_CHUNK_ROWS", raising=False)
+    monkeypatch.delenv("WAYFARER_EXPORT_CANCEL_CHECK_INTERVAL_S", raising=False)
+    get_settings.cache_clear()
+
+
+def test_export_job_cancel_stops_weather_fetches_mid_chunk(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("WAYFARER_EXPORT_CANCEL_CHECK_INTERVAL_S", "0")
+    monkeypatch.setenv("WAYFARER_WEATHER_FETCH_CONCURRENCY", "1")
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    import httpx
+
+    from app.tasks import export as export_tasks
+
+    access, user_id = _setup_user_with_points(client, n=1)
+    # Two more cells in the same chunk: one provider request per cell.
+    items = [
+        {
+            "client_point_id": str(uuid.uuid4()),
+            "recorded_at": f"2026-01-30T12:00:{10 + i:02d}Z",
+            "latitude": lat,
+            "longitude": lon,
+            "accuracy": 8.0,
+        }
+        for i, (lat, lon) in enumerate([(39.9042, 116.4074), (22.5431, 114.0579)])
+    ]
+    r = client.post(
+        "/v1/tracks/batch", json={"items": items}, headers=_auth_header(access)
+    )
+    assert r.status_code == 200, r.text
+
+    job_id = _create_job(user_id=user_id, fmt="CSV")
+
+    async def _include_weather() -> None:
+        async with get_sessionmaker()() as session:
+            job = (
+                await session.execute(select(ExportJob).where(ExportJob.id == job_id))
+            ).scalar_one()
+            job.include_weather = True
+            await session.commit()
+
+    asyncio.run(_include_weather())
+
+    requested: list[object] = []
+
+    async def fake_get(self, url: str, params=None, timeout=None):  # noqa: ANN001
+        requested.append(params["latitude"])
+        if len(requested) == 1:
+            r = client.post(f"/v1/export/{job_id}/cancel", headers=_auth_header(access))
+            assert r.status_code == 200, r.text
+        return httpx.Response(503, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+    result = export_tasks.run_export_job_task(str(job_id))
+
+    assert result["status"] == "canceled"
+    # The cancel was seen before the backoff wait; no other cell was requested.
+    assert len(requested) == 1
+
+    job = _load_job(job_id)
+    assert job.state == "CANCELED"
+
+    monkeypatch.delenv("WAYFARER_EXPORT_CANCEL_CHECK_INTERVAL_S", raising=False)
+    monkeypatch.delenv("WAYFARER_WEATHER_FETCH_CONCURRENCY", raising=False)
+    get_settings.cache_clear()
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import datetime as dt
+import io
+import uuid
+
+import pytest
+
+from app.models.track_point import TrackPoint
+from app.tasks.export import format_bytes, open_writer
+
+
+def _points() -> list[TrackPoint]:
+    t0 = dt.datetime(2026, 1, 30, 12, tzinfo=dt.timezone.utc)
+    return [
+        TrackPoint(
+            client_point_id=uuid.UUID(int=1),
+            recorded_at=t0,
+            latitude=31.2304,
+            longitude=121.4737,
+            altitude=12.5,
+            is_dirty=False,
+        ),
+        TrackPoint(
+            client_point_id=uuid.UUID(int=2),
+            recorded_at=t0 + dt.timedelta(seconds=5),
+            latitude=31.2305,
+            longitude=121.4738,
+            altitude=None,
+            is_dirty=False,
+        ),
+    ]
+
+
+_DECL = b"<?xml version='1.0' encoding='utf-8'?>\n"
+
+
+def test_gpx_writer_matches_elementtree_layout() -> None:
+    # Golden bytes previously produced by xml.etree.ElementTree.tostring.
+    assert format_bytes("GPX", _points(), dt.timezone.utc) == (
+        _DECL
+        + b'<gpx version="1.1" creator="wayfarer" xmlns="http://www.topografix.com/GPX/1/1">'
+        + b"<trk><trkseg>"
+        + b'<trkpt lat="31.2304" lon="121.4737"><ele>12.5</ele><time>2026-01-30T12:00:00Z</time></trkpt>'
+        + b'<trkpt lat="31.2305" lon="121.4738"><time>2026-01-30T12:00:05Z</time></trkpt>'
+        + b"</trkseg></trk></gpx>"
+    )
+    assert format_bytes("GPX", [], dt.timezone.utc) == (
+        _DECL
+        + b'<gpx version="1.1" creator="wayfarer" xmlns="http://www.topografix.com/GPX/1/1">'
+        + b"<trk><trkseg /></trk></gpx>"
+    )
+
+
+def test_kml_writer_matches_elementtree_layout() -> None:
+    head = (
+        _DECL
+        + b'<kml xmlns="http://www.opengis.net/kml/2.2"><Document><Placemark>'
+        + b"<name>Wayfarer Export</name>"
+    )
+    assert format_bytes("KML", _points(), dt.timezone.utc) == (
+        head
+        + b"<description>points=2; timezone=UTC</description>"
+        + b"<LineString><tessellate>1</tessellate>"
+        + b"<coordinates>121.4737,31.2304,12.5 121.4738,31.2305,0.0</coordinates>"
+        + b"</LineString><ExtendedData>"
+        + b'<Data name="00000000-0000-0000-0000-000000000001"><value>2026-01-30T12:00:00Z</value></Data>'
+        + b'<Data name="00000000-0000-0000-0000-000000000002"><value>2026-01-30T12:00:05Z</value></Data>'
+        + b"</ExtendedData></Placemark></Document></kml>"
+    )
+    assert format_bytes("KML", [], dt.timezone.utc) == (
+        head
+        + b"<description>points=0; timezone=UTC</description>"
+        + b"<LineString><tessellate>1</tessellate><coordinates /></LineString>"
+        + b"<ExtendedData /></Placemark></Document></kml>"
+    )
+
+
+@pytest.mark.parametrize("fmt", ["CSV", "GeoJSON", "GPX", "KML"])
+def test_chunked_writes_match_single_write(fmt: str) -> None:
+    points = _points() * 3
+    buf = io.BytesIO()
+    writer = open_writer(fmt, buf, dt.timezone.utc, total_rows=len(points))
+    writer.write_header()
+    for p in points:
+        writer.write_rows([p])
+    writer.write_rows([])
+    writer.write_footer()
+    assert buf.getvalue() == format_bytes(fmt, points, dt.timezone.utc)
+
+
+def test_writer_missing_a_method_fails_on_creation() -> None:
+    from app.tasks.export import _ColumnarWriter, _ExportWriter
+
+    class _NoRows(_ExportWriter):
+        pass
+
+    class _NoBatches(_ColumnarWriter):
+        pass
+
+    with pytest.raises(TypeError, match="write_rows"):
+        _NoRows(io.BytesIO(), dt.timezone.utc, total_rows=0)
+    with pytest.raises(TypeError, match="_write_batch"):
+        _NoBatches(io.BytesIO(), dt.timezone.utc, total_rows=0)
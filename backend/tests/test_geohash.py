@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from app.utils.geohash import (
+    adjacent,
+    bbox_cover,
+    cover_ranges,
+    decode_bbox,
+    decode_center,
+    encode,
+    encode_many,
+    neighbors,
+    precision_for_bbox,
+    prefix_range,
+)
+
+
+@pytest.mark.parametrize("precision", range(1, 13))
+def test_encode_many_matches_scalar_encode(precision: int) -> None:
+    rng = random.Random(precision)
+    lats = [rng.uniform(-90, 90) for _ in range(500)]
+    lons = [rng.uniform(-180, 180) for _ in range(500)]
+    # Poles, antimeridian and exact cell boundaries hit the >= comparisons.
+    lats += [-90.0, 90.0, 0.0, 45.0, -22.5, 31.2304]
+    lons += [-180.0, 180.0, 0.0, -90.0, 22.5, 121.4737]
+
+    assert encode_many(lats, lons, precision=precision) == [
+        encode(lat, lon, precision=precision) for lat, lon in zip(lats, lons)
+    ]
+
+
+def test_encode_many_matches_scalar_encode_on_edge_inputs() -> None:
+    nan, inf = float("nan"), float("inf")
+    lats = [nan, 0.0, nan, inf, -inf, 100.0, -100.0]
+    lons = [0.0, nan, nan, -inf, inf, 200.0, -200.0]
+    expected = [encode(lat, lon, precision=5) for lat, lon in zip(lats, lons)]
+    assert expected[2] == "00000"
+    assert encode_many(lats, lons, 5) == expected
+
+    # Beyond the integer path's 12 characters, still the same hashes.
+    lats, lons = [31.2304, -33.8688, nan], [121.4737, 151.2093, 0.0]
+    assert encode_many(lats, lons, precision=15) == [
+        encode(lat, lon, precision=15) for lat, lon in zip(lats, lons)
+    ]
+
+
+def test_encode_many_rejects_bad_input() -> None:
+    with pytest.raises(ValueError):
+        encode_many([0.0], [0.0], precision=0)
+    with pytest.raises(ValueError):
+        encode_many([0.0, 1.0], [0.0])
+    with pytest.raises(ValueError):
+        encode_many([0.0, 1.0], [0.0], precision=13)
+
+
+def test_adjacent_cells_share_an_edge() -> None:
+    gh = encode(31.2304, 121.4737, precision=6)
+    lat_min, lat_max, lon_min, lon_max = decode_bbox(gh)
+    lat_c, lon_c = decode_center(gh)
+
+    assert decode_bbox(adjacent(gh, "n") or "")[0] == lat_max
+    assert decode_bbox(adjacent(gh, "s") or "")[1] == lat_min
+    assert decode_bbox(adjacent(gh, "e") or "")[2] == lon_max
+    assert decode_bbox(adjacent(gh, "w") or "")[3] == lon_min
+    assert adjacent(gh, "n") == encode(lat_c + (lat_max - lat_min), lon_c, precision=6)
+
+
+def test_adjacent_wraps_longitude_and_stops_at_poles() -> None:
+    assert adjacent(encode(10.0, 179.99, precision=4), "e") == encode(
+        10.0, -179.99, precision=4
+    )
+    assert adjacent(encode(89.99, 10.0, precision=4), "n") is None
+    assert adjacent(encode(-89.99, 10.0, precision=4), "s") is None
+
+
+def test_prefix_range_bounds_exactly_the_prefix() -> None:
+    assert prefix_range("wtw3") == ("wtw3", "wtw4")
+    assert prefix_range("wtz") == ("wtz", "wu")
+    assert prefix_range("zz") == ("zz", "{")
+
+    lo, hi = prefix_range("wt")
+    rng = random.Random(7)
+    for _ in range(2000):
+        gh = encode(rng.uniform(-90, 90), rng.uniform(-180, 180), precision=5)
+        assert (lo <= gh < hi) == gh.startswith("wt")
+
+
+def test_neighbors_surround_the_cell() -> None:
+    gh = encode(31.2304, 121.4737, precision=6)
+    around = neighbors(gh)
+
+    assert len(around) == 8
+    assert around[0] == adjacent(gh, "n")
+    assert around[2] == adjacent(gh, "e")
+    assert around[1] == adjacent(adjacent(gh, "n") or "", "e")
+    # 3x3 block with gh in the middle: the union is the cover of its bbox.
+    lat_min, lat_max, lon_min, lon_max = decode_bbox(gh)
+    d_lat, d_lon = lat_max - lat_min, lon_max - lon_min
+    assert sorted([gh, *around]) == bbox_cover(
+        lat_min - d_lat / 2, lat_max + d_lat / 2,
+        lon_min - d_lon / 2, lon_max + d_lon / 2,
+        precision=6,
+    )  # fmt: skip
+
+    # No cells beyond the pole.
+    assert len(neighbors(encode(89.99, 10.0, precision=4))) == 5
+
+
+@pytest.mark.parametrize(
+    "bbox",
+    [
+        (31.1, 31.3, 121.3, 121.6),
+        (-10.0, 10.0, -5.0, 5.0),
+        (50.0, 52.0, 179.5, -179.5),  # crosses the antimeridian
+    ],
+)
+def test_bbox_cover_contains_every_point_in_the_box(
+    bbox: tuple[float, float, float, float],
+) -> None:
+    lat_min, lat_max, lon_min, lon_max = bbox
+    cells = bbox_cover(*bbox, max_cells=32)
+    assert 0 < len(cells) <= 32
+    assert len({len(c) for c in cells}) == 1
+    precision = len(cells[0])
+    assert precision == precision_for_bbox(*bbox, max_cells=32)
+
+    ranges = cover_ranges(cells)
+    assert len(ranges) <= len(cells)
+
+    rng = random.Random(11)
+    width = (lon_max - lon_min) % 360.0
+    for _ in range(2000):
+        lat = rng.uniform(lat_min, lat_max)
+        lon = (lon_min + rng.uniform(0.0, width) + 180.0) % 360.0 - 180.0
+        gh = encode(lat, lon, precision=precision)
+        assert gh in cells
+        # Finer hashes of the same point fall in one of the merged ranges.
+        fine = encode(lat, lon, precision=9)
+        assert any(lo <= fine < hi for lo, hi in ranges)
+
+
+def test_precision_for_bbox_gets_coarser_for_bigger_boxes() -> None:
+    small = precision_for_bbox(31.23, 31.24, 121.47, 121.48)
+    city = precision_for_bbox(31.0, 31.5, 121.2, 121.8)
+    world = precision_for_bbox(-90.0, 90.0, -180.0, 180.0)
+    assert small > city > world
+    assert world == 1
+    assert len(bbox_cover(-90.0, 90.0, -180.0, 180.0)) == 32
+
+
+def test_cover_ranges_merges_consecutive_cells() -> None:
+    assert cover_ranges(["wtw1", "wtw0", "wtw2", "wtw5"]) == [
+        ("wtw0", "wtw3"),
+        ("wtw5", "wtw6"),
+    ]
+    assert cover_ranges(
+        prefix + c for prefix in ["wt"] for c in "0123456789bcdefghjkmnpqrstuvwxyz"
+    ) == [("wt0", "wu")]
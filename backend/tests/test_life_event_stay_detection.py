@@ -1,9 +1,29 @@
 from __future__ import annotations
 
+import asyncio
+import datetime as dt
+import math
+import random
 import uuid
+from types import SimpleNamespace
 
+import pytest
+import sqlalchemy as sa
 from fastapi.testclient import TestClient
 
+from app.db.session import get_sessionmaker
+from app.models.life_event import LifeEvent
+from app.models.stay_detector_state import StayDetectorState
+from app.models.track_point import TrackPoint
+from app.models.user import User
+from app.services.life_event import (
+    StayCandidate,
+    _haversine_m,
+    detect_life_segments,
+    detect_stay_candidates,
+    recompute_auto_life_events_for_window,
+)
+
 
 def _register(client: TestClient, *, email: str, username: str, password: str) -> None:
     r = client.post(
@@ -110,3 +130,411 @@ def test_life_event_stay_does_not_detect_4m59s_within_200m(client: TestClient) -
     items = lr.json()["items"]
     stays = [it for it in items if it.get("event_type") == "STAY"]
     assert stays == [], items
+
+
+def _reference_detect(
+    points: list, *, distance_threshold_m: float, time_threshold_s: float
+) -> list[StayCandidate]:
+    # The original quadratic detector, kept verbatim as the specification.
+    if not points:
+        return []
+    points_sorted = sorted(points, key=lambda p: p.recorded_at)
+    stays: list[StayCandidate] = []
+    i = 0
+    n = len(points_sorted)
+    while i < n:
+        anchor = points_sorted[i]
+        j = i + 1
+        while j < n:
+            p = points_sorted[j]
+            d = _haversine_m(anchor.latitude, anchor.longitude, p.latitude, p.longitude)
+            if d > distance_threshold_m:
+                break
+            j += 1
+        last = points_sorted[j - 1]
+        duration_s = (last.recorded_at - anchor.recorded_at).total_seconds()
+        if duration_s >= time_threshold_s and j - i >= 2:
+            lat_sum = lon_sum = gcj_lat_sum = gcj_lon_sum = 0.0
+            gcj_count = 0
+            for k in range(i, j):
+                pk = points_sorted[k]
+                lat_sum += float(pk.latitude)
+                lon_sum += float(pk.longitude)
+                if pk.gcj02_latitude is not None and pk.gcj02_longitude is not None:
+                    gcj_lat_sum += float(pk.gcj02_latitude)
+                    gcj_lon_sum += float(pk.gcj02_longitude)
+                    gcj_count += 1
+            stays.append(
+                StayCandidate(
+                    start_at=anchor.recorded_at,
+                    end_at=last.recorded_at,
+                    latitude=lat_sum / float(j - i),
+                    longitude=lon_sum / float(j - i),
+                    gcj02_latitude=(gcj_lat_sum / gcj_count) if gcj_count else None,
+                    gcj02_longitude=(gcj_lon_sum / gcj_count) if gcj_count else None,
+                    point_count=(j - i),
+                )
+            )
+            i = j
+            continue
+        i += 1
+    return stays
+
+
+def _random_track(rng: random.Random, n: int, *, threshold_m: float) -> list:
+    # Stays with jitter, slow walks, drives, time gaps, duplicate timestamps and
+    # points placed right at the threshold from an earlier point.
+    t = dt.datetime(2026, 1, 30, tzinfo=dt.timezone.utc)
+    lat = rng.choice([31.2304, -33.86, 0.0004, 64.13])
+    lon = rng.choice([121.4737, 151.2, -0.0003, 179.9995])
+    deg_per_m = 1.0 / 111_194.9
+    out: list[SimpleNamespace] = []
+    mode = "stay"
+    for _ in range(n):
+        if rng.random() < 0.02:
+            mode = rng.choice(["stay", "walk", "drive"])
+        t += dt.timedelta(seconds=rng.choice([0, 1, 1, 1, 5, 30, 600]))
+        if mode == "stay":
+            lat += rng.gauss(0.0, 5 * deg_per_m)
+            lon += rng.gauss(0.0, 5 * deg_per_m)
+        elif mode == "walk":
+            lat += rng.uniform(0.0, 1.5 * deg_per_m)
+            lon += rng.uniform(-1.5, 1.5) * deg_per_m
+        else:
+            lat += rng.uniform(0.0, 30 * deg_per_m)
+        if out and rng.random() < 0.03:
+            # Exactly at (or a hair off) the threshold north of a recent point.
+            ref = rng.choice(out[-20:])
+            lat = ref.latitude + threshold_m * deg_per_m * rng.choice([1.0, 1 + 1e-12])
+            lon = ref.longitude
+        lon = (lon + 180.0) % 360.0 - 180.0
+        gcj = rng.random() < 0.7
+        out.append(
+            SimpleNamespace(
+                recorded_at=t,
+                latitude=lat,
+                longitude=lon,
+                gcj02_latitude=lat + 0.002 if gcj else None,
+                gcj02_longitude=lon + 0.005 if gcj else None,
+            )
+        )
+    return out
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_stay_detection_matches_reference(seed: int) -> None:
+    rng = random.Random(seed)
+    threshold_m = rng.choice([50.0, 200.0, 1000.0])
+    time_threshold_s = rng.choice([60.0, 300.0])
+    track = _random_track(rng, 3000, threshold_m=threshold_m)
+    if seed % 4 == 0:
+        # Unordered input is still sorted (stably) first.
+        rng.shuffle(track)
+
+    expected = _reference_detect(
+        track, distance_threshold_m=threshold_m, time_threshold_s=time_threshold_s
+    )
+    got = detect_stay_candidates(
+        track,  # type: ignore[arg-type]
+        distance_threshold_m=threshold_m,
+        time_threshold_s=time_threshold_s,
+    )
+    assert got == expected
+    assert expected
+
+
+def test_stay_spanning_upload_batches_is_carried_over(client: TestClient) -> None:
+    email = f"u-{uuid.uuid4().hex}@test.com"
+    username = f"u-{uuid.uuid4().hex}"
+    password = "password123!"
+    _register(client, email=email, username=username, password=password)
+    access = _login_access_token(client, username=username, password=password)
+
+    def _upload(*points: tuple[str, float]) -> None:
+        items = [
+            {
+                "client_point_id": str(uuid.uuid4()),
+                "recorded_at": f"2026-01-30T{hm}:00Z",
+                "latitude": lat,
+                "longitude": 121.4737,
+                "accuracy": 8.0,
+            }
+            for hm, lat in points
+        ]
+        r = client.post(
+            "/v1/tracks/batch", json={"items": items}, headers=_auth_header(access)
+        )
+        assert r.status_code == 200, r.text
+
+    def _stays() -> list[tuple[str, str]]:
+        lr = client.get(
+            "/v1/life-events?start=2026-01-30T11:00:00Z&end=2026-01-30T14:00:00Z",
+            headers=_auth_header(access),
+        )
+        assert lr.status_code == 200, lr.text
+        return sorted(
+            (it["start_at"], it["end_at"])
+            for it in lr.json()["items"]
+            if it["event_type"] == "STAY"
+        )
+
+    # Each batch alone spans less than 5 minutes.
+    _upload(("12:00", 31.2304), ("12:02", 31.2304))
+    assert _stays() == []
+    _upload(("12:04", 31.2305), ("12:06", 31.2304))
+    assert _stays() == [("2026-01-30T12:00:00Z", "2026-01-30T12:06:00Z")]
+
+    # The open stay grows, then a point ~11 km away closes it; its earlier,
+    # shorter row is replaced rather than kept alongside.
+    _upload(("12:08", 31.2304), ("12:10", 31.3304))
+    assert _stays() == [("2026-01-30T12:00:00Z", "2026-01-30T12:08:00Z")]
+
+    async def _state() -> StayDetectorState | None:
+        async with get_sessionmaker()() as session:
+            user = (
+                await session.execute(sa.select(User).where(User.username == username))
+            ).scalar_one()
+            return await session.get(StayDetectorState, user.id)
+
+    state = asyncio.run(_state())
+    assert state is not None
+    assert state.anchor_recorded_at.replace(tzinfo=None) == dt.datetime(
+        2026, 1, 30, 12, 10
+    )
+    assert state.point_count == 1 and state.open_event_id is None
+
+    # Hiding points invalidates the carried-over window.
+    r = client.post(
+        "/v1/tracks/edits",
+        json={
+            "type": "DELETE_RANGE",
+            "start": "2026-01-30T12:09:00Z",
+            "end": "2026-01-30T12:11:00Z",
+        },
+        headers=_auth_header(access),
+    )
+    assert r.status_code == 200, r.text
+    assert asyncio.run(_state()) is None
+
+
+def test_backfill_rescan_ignores_manual_stays(client: TestClient) -> None:
+    username = f"u-{uuid.uuid4().hex}"
+    password = "password123!"
+    _register(
+        client, email=f"{username}@test.com", username=username, password=password
+    )
+    access = _login_access_token(client, username=username, password=password)
+
+    def _upload(*points: tuple[str, float]) -> None:
+        items = [
+            {
+                "client_point_id": str(uuid.uuid4()),
+                "recorded_at": f"2026-01-30T{hms}Z",
+                "latitude": lat,
+                "longitude": 121.4737,
+                "accuracy": 8.0,
+            }
+            for hms, lat in points
+        ]
+        r = client.post(
+            "/v1/tracks/batch", json={"items": items}, headers=_auth_header(access)
+        )
+        assert r.status_code == 200, r.text
+
+    def _stays() -> list[tuple[str, str]]:
+        lr = client.get(
+            "/v1/life-events?start=2026-01-30T11:00:00Z&end=2026-01-30T14:00:00Z",
+            headers=_auth_header(access),
+        )
+        assert lr.status_code == 200, lr.text
+        return sorted(
+            (it["start_at"], it["end_at"])
+            for it in lr.json()["items"]
+            if it["event_type"] == "STAY"
+        )
+
+    at_home = [(f"12:{m:02d}:00", 31.2304) for m in range(0, 10, 2)]
+    _upload(*at_home, ("12:10:00", 31.3304))
+    assert _stays() == [("2026-01-30T12:00:00Z", "2026-01-30T12:08:00Z")]
+
+    # A hand-entered stay inside the detected one is not a detector anchor.
+    r = client.post(
+        "/v1/life-events",
+        json={
+            "event_type": "STAY",
+            "start_at": "2026-01-30T12:01:00Z",
+            "end_at": "2026-01-30T12:02:00Z",
+        },
+        headers=_auth_header(access),
+    )
+    assert r.status_code == 201, r.text
+
+    # The back-fill rescans from the detected stay at 12:00; restarting at
+    # the manual one would emit a second, overlapping 12:01:30-12:08 stay.
+    _upload(("12:01:30", 31.2304))
+    assert _stays() == [
+        ("2026-01-30T12:00:00Z", "2026-01-30T12:08:00Z"),
+        ("2026-01-30T12:01:00Z", "2026-01-30T12:02:00Z"),
+    ]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_incremental_recompute_matches_whole_track(
+    client: TestClient, seed: int
+) -> None:
+    rng = random.Random(seed)
+    threshold_m = rng.choice([50.0, 200.0])
+    time_threshold_s = rng.choice([60.0, 300.0])
+    track = _random_track(rng, 1500, threshold_m=threshold_m)
+    for k, p in enumerate(track):
+        # Distinct timestamps: batches are split at recorded_at boundaries.
+        p.recorded_at += dt.timedelta(microseconds=k)
+
+    username = f"u-{uuid.uuid4().hex}"
+    _register(
+        client, email=f"{username}@test.com", username=username, password="password1!"
+    )
+
+    async def _replay() -> list[tuple[object, ...]]:
+        async with get_sessionmaker()() as session:
+            user_id = (
+                await session.execute(
+                    sa.select(User.id).where(User.username == username)
+                )
+            ).scalar_one()
+            i = 0
+            while i < len(track):
+                batch = track[i : i + rng.randint(1, 300)]
+                i += len(batch)
+                for p in batch:
+                    session.add(
+                        TrackPoint(
+                            user_id=user_id,
+                            client_point_id=uuid.uuid4(),
+                            recorded_at=p.recorded_at,
+                            latitude=p.latitude,
+                            longitude=p.longitude,
+                            gcj02_latitude=p.gcj02_latitude,
+                            gcj02_longitude=p.gcj02_longitude,
+                        )
+                    )
+                await session.commit()
+                await recompute_auto_life_events_for_window(
+                    session=session,
+                    user_id=user_id,
+                    start_at=batch[0].recorded_at,
+                    end_at=batch[-1].recorded_at,
+                    distance_threshold_m=threshold_m,
+                    time_threshold_s=time_threshold_s,
+                )
+            rows = (
+                await session.execute(
+                    sa.select(
+                        LifeEvent.event_type,
+                        LifeEvent.start_at,
+                        LifeEvent.end_at,
+                        LifeEvent.latitude,
+                        LifeEvent.longitude,
+                        LifeEvent.gcj02_latitude,
+                        LifeEvent.gcj02_longitude,
+                        LifeEvent.payload_json,
+                    ).where(LifeEvent.user_id == user_id)
+                )
+            ).all()
+            out = []
+            for kind, start, end, lat, lon, gcj_lat, gcj_lon, payload in rows:
+                start = start.replace(tzinfo=dt.timezone.utc)
+                end = end.replace(tzinfo=dt.timezone.utc)
+                if kind == "STAY":
+                    detail = (lat, lon, gcj_lat, gcj_lon)
+                else:
+                    detail = (payload["distance_m"], payload["polyline"])
+                out.append((start, kind, end, detail, payload["point_count"]))
+            return sorted(out)
+
+    stays, trips = detect_life_segments(
+        track,  # type: ignore[arg-type]
+        distance_threshold_m=threshold_m,
+        time_threshold_s=time_threshold_s,
+    )
+    expected = sorted(
+        [
+            (
+                s.start_at,
+                "STAY",
+                s.end_at,
+                (s.latitude, s.longitude, s.gcj02_latitude, s.gcj02_longitude),
+                s.point_count,
+            )
+            for s in stays
+        ]
+        + [
+            (
+                t.start_at,
+                "TRIP",
+                t.end_at,
+                (
+                    round(t.distance_m, 1),
+                    [[round(lat, 6), round(lon, 6)] for lat, lon in t.polyline],
+                ),
+                t.point_count,
+            )
+            for t in trips
+        ]
+    )
+    assert asyncio.run(_replay()) == expected
+    assert stays and trips
+
+
+def test_trips_between_stays_have_distance_speed_and_simplified_path() -> None:
+    t0 = dt.datetime(2026, 1, 30, 8, tzinfo=dt.timezone.utc)
+    deg_per_m = 1.0 / 111_194.9
+    lat0, lon0 = 31.2304, 121.4737
+    lon_deg_per_m = deg_per_m / math.cos(math.radians(lat0))
+
+    def _pt(second: int, north_m: float, east_m: float) -> SimpleNamespace:
+        return SimpleNamespace(
+            recorded_at=t0 + dt.timedelta(seconds=second),
+            latitude=lat0 + north_m * deg_per_m,
+            longitude=lon0 + east_m * lon_deg_per_m,
+            gcj02_latitude=None,
+            gcj02_longitude=None,
+        )
+
+    # A short walk before the first stay is not a trip.
+    track = [_pt(-60, -500.0, 0.0)]
+    # Home for 10 minutes, then 1 km north and 1 km east at 10 m/s with GPS
+    # wobble of a few metres, then the office for 10 minutes.
+    track += [_pt(60 * i, 0.0, 0.0) for i in range(11)]
+    s = 600
+    for k in range(1, 101):
+        track.append(_pt(s + 10 * k, 10.0 * k, 3.0 * (k % 2)))
+    for k in range(1, 101):
+        track.append(_pt(s + 1000 + 10 * k, 1000.0 + 3.0 * (k % 2), 10.0 * k))
+    end = track[-1].recorded_at
+    track += [
+        SimpleNamespace(
+            **{**vars(track[-1]), "recorded_at": end + dt.timedelta(minutes=m)}
+        )
+        for m in range(1, 11)
+    ]
+
+    stays, trips = detect_life_segments(track)  # type: ignore[arg-type]
+    # Each stay also holds the drive points within 200 m of its anchor.
+    assert [(st.start_at - t0, st.end_at - t0) for st in stays] == [
+        (dt.timedelta(0), dt.timedelta(seconds=790)),
+        (dt.timedelta(seconds=2400), end + dt.timedelta(minutes=10) - t0),
+    ]
+    assert len(trips) == 1
+    trip = trips[0]
+    # From the home stay's last point to the office stay's anchor.
+    assert (trip.start_at, trip.end_at) == (stays[0].end_at, stays[1].start_at)
+    assert trip.point_count == 162
+    # 810 m north then 800 m east, lengthened a little by the wobble.
+    assert 1_610 < trip.distance_m < 1_750
+    assert trip.duration_s == 1610.0
+    assert trip.avg_speed_mps == pytest.approx(trip.distance_m / 1610.0)
+    # The wobble is simplified away: start, the corner, the end.
+    assert len(trip.polyline) == 3
+    corner_lat, corner_lon = trip.polyline[1]
+    assert _haversine_m(corner_lat, corner_lon, lat0 + 1000 * deg_per_m, lon0) < 5.0
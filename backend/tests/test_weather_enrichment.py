@@ -5,6 +5,7 @@ import datetime as dt
 
 import httpx
 import pytest
+import sqlalchemy as sa
 
 from app.db.session import get_sessionmaker
 from app.models.weather_cache import WeatherCache
@@ -107,3 +108,384 @@ def test_weather_cache_hit_avoids_provider_call(
             assert snap == payload
 
     asyncio.run(_run())
+
+
+def test_weather_batch_dedups_keys_and_bounds_concurrency(
+    client,  # noqa: ARG001
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    hour = dt.datetime(2026, 1, 30, 12, tzinfo=dt.timezone.utc)
+    cells = [(31.2304, 121.4737), (39.9042, 116.4074), (22.5431, 114.0579)]
+    in_flight = 0
+    max_in_flight = 0
+    requested: list[tuple[float, float]] = []
+
+    async def fake_get(self, url: str, params=None, timeout=None):  # noqa: ANN001
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        requested.append((params["latitude"], params["longitude"]))
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        payload = _open_meteo_ok_payload(hour=hour)
+        return httpx.Response(200, json=payload, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+
+    from app.services.weather import get_weather_snapshots
+
+    cached = {"provider": "cached"}
+    points = [
+        (lat + i * 1e-5, lon, hour + dt.timedelta(minutes=i))
+        for lat, lon in cells
+        for i in range(4)
+    ] + [(cells[0][0], cells[0][1], hour + dt.timedelta(hours=1))]
+
+    async def _run() -> None:
+        sessionmaker = get_sessionmaker()
+        async with sessionmaker() as session:
+            session.add(
+                WeatherCache(
+                    geohash_5=encode(*cells[0], precision=5),
+                    hour_time=hour + dt.timedelta(hours=1),
+                    payload=cached,
+                )
+            )
+            await session.commit()
+
+        async with sessionmaker() as session:
+            snaps, degraded = await get_weather_snapshots(
+                session=session, points=points, concurrency=2
+            )
+            await session.commit()
+            assert degraded is False
+            assert len(snaps) == len(points)
+            assert snaps[-1] == cached
+            # Points sharing a (geohash, hour) key share one provider payload.
+            for c in range(len(cells)):
+                group = snaps[c * 4 : c * 4 + 4]
+                assert all(s == group[0] for s in group)
+                assert group[0] is not None and group[0] != cached
+
+        async with sessionmaker() as session:
+            rows = (
+                await session.execute(sa.select(sa.func.count(WeatherCache.id)))
+            ).scalar_one()
+            assert rows == 4
+
+    asyncio.run(_run())
+
+    # One request per distinct missing key, never more than `concurrency` at once.
+    assert len(requested) == len(cells)
+    assert max_in_flight == 2
+
+
+def test_weather_batch_fetches_whole_days_per_geohash(
+    client,  # noqa: ARG001
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    requested: list[tuple[str, str]] = []
+
+    async def fake_get(self, url: str, params=None, timeout=None):  # noqa: ANN001
+        requested.append((params["start_date"], params["end_date"]))
+        day = dt.date.fromisoformat(params["start_date"])
+        end = dt.date.fromisoformat(params["end_date"])
+        hours = [
+            dt.datetime(day.year, day.month, day.day) + dt.timedelta(hours=h)
+            for h in range(24 * ((end - day).days + 1))
+        ]
+        payload = {
+            "hourly": {
+                "time": [h.isoformat(timespec="minutes") for h in hours],
+                "temperature_2m": [float(i) for i in range(len(hours))],
+            }
+        }
+        return httpx.Response(200, json=payload, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+
+    from app.services.weather import get_weather_snapshots
+
+    t0 = dt.datetime(2026, 1, 30, 12, 34, tzinfo=dt.timezone.utc)
+    offsets = [0, 3, 14]
+    points = [(31.2304, 121.4737, t0 + dt.timedelta(hours=h)) for h in offsets]
+
+    async def _run() -> None:
+        sessionmaker = get_sessionmaker()
+        async with sessionmaker() as session:
+            snaps, degraded = await get_weather_snapshots(
+                session=session, points=points
+            )
+            await session.commit()
+            assert degraded is False
+            # 2026-01-30T12:00Z is index 12 of the two-day range.
+            assert [s["temperature_2m"] for s in snaps] == [12.0, 15.0, 26.0]
+            assert snaps[2]["hour_time"] == "2026-01-31T02:00:00Z"
+
+        async with sessionmaker() as session:
+            rows = (
+                await session.execute(sa.select(sa.func.count(WeatherCache.id)))
+            ).scalar_one()
+            assert rows == 48
+
+        # Every hour of both days is now cached: no further provider calls.
+        async with sessionmaker() as session:
+            snap, degraded = await get_weather_snapshot(
+                session=session,
+                latitude=31.2304,
+                longitude=121.4737,
+                recorded_at=dt.datetime(2026, 1, 31, 23, 59, tzinfo=dt.timezone.utc),
+            )
+            assert degraded is False
+            assert snap is not None and snap["temperature_2m"] == 47.0
+
+    asyncio.run(_run())
+
+    assert requested == [("2026-01-30", "2026-01-31")]
+
+
+def test_weather_requests_reuse_one_pooled_client_per_loop(
+    client,  # noqa: ARG001
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from app.services.weather import open_meteo_http_client
+
+    clients: list[httpx.AsyncClient] = []
+
+    async def fake_get(self, url: str, params=None, timeout=None):  # noqa: ANN001
+        clients.append(self)
+        hour = dt.datetime.fromisoformat(f"{params['start_date']}T12:00")
+        payload = _open_meteo_ok_payload(hour=hour)
+        return httpx.Response(200, json=payload, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+
+    async def _run() -> httpx.AsyncClient:
+        async with open_meteo_http_client() as http_client:
+            async with get_sessionmaker()() as session:
+                for day in (1, 3, 5):
+                    snap, degraded = await get_weather_snapshot(
+                        session=session,
+                        latitude=31.2304,
+                        longitude=121.4737,
+                        recorded_at=dt.datetime(
+                            2026, 1, day, 12, tzinfo=dt.timezone.utc
+                        ),
+                    )
+                    assert degraded is False
+                    assert snap is not None
+        return http_client
+
+    pooled = asyncio.run(_run())
+
+    # No client passed in: every request went through the loop's pooled client,
+    # which the owner closed on exit.
+    assert len(clients) == 3
+    assert all(c is pooled for c in clients)
+    assert pooled.is_closed
+
+
+def test_weather_memory_cache_ttl_and_lru_eviction() -> None:
+    from app.services.weather import WeatherKey, WeatherMemoryCache
+
+    now = [0.0]
+    cache = WeatherMemoryCache(
+        max_entries=2, ttl_s=10.0, negative_ttl_s=1.0, clock=lambda: now[0]
+    )
+    hour = dt.datetime(2026, 1, 30, 12, tzinfo=dt.timezone.utc)
+    a, b, c = (WeatherKey(g, hour) for g in ("wtw3s", "wx4g0", "ws10k"))
+
+    cache.put(a, {"v": "a"})
+    cache.put(b, None)
+    assert cache.get(a) == (True, {"v": "a"})
+    assert cache.get(b) == (True, None)
+
+    # Negative entries expire first.
+    now[0] = 2.0
+    assert cache.get(b) == (False, None)
+
+    # `a` was used most recently, so `b` is evicted when `c` arrives.
+    cache.put(b, {"v": "b"})
+    cache.get(a)
+    cache.put(c, {"v": "c"})
+    assert cache.get(b) == (False, None)
+    assert cache.get(c) == (True, {"v": "c"})
+
+    now[0] = 20.0
+    assert cache.get(a) == (False, None)
+    assert cache.stats() == {
+        "size": 1,
+        "max_entries": 2,
+        "hits": 3,
+        "negative_hits": 1,
+        "misses": 3,
+        "evictions": 1,
+    }
+
+
+def test_weather_provider_failure_is_negatively_cached(
+    client,  # noqa: ARG001
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    calls: list[int] = []
+
+    async def fake_sleep(delay: float) -> None:  # noqa: ARG001
+        return None
+
+    async def fake_get(self, url: str, params=None, timeout=None):  # noqa: ANN001
+        calls.append(1)
+        return httpx.Response(503, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+
+    from app.services.weather import get_memory_cache
+
+    recorded_at = dt.datetime(2026, 1, 30, 12, 34, tzinfo=dt.timezone.utc)
+
+    async def _run() -> None:
+        sessionmaker = get_sessionmaker()
+        for _ in range(3):
+            async with sessionmaker() as session:
+                snap, degraded = await get_weather_snapshot(
+                    session=session,
+                    latitude=31.2304,
+                    longitude=121.4737,
+                    recorded_at=recorded_at,
+                    sleep=fake_sleep,
+                )
+                assert snap is None
+                assert degraded is True
+
+    asyncio.run(_run())
+
+    # Retries are spent once; later lookups hit the negative cache.
+    assert len(calls) == 5
+    stats = get_memory_cache().stats()
+    assert stats["negative_hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_weather_memory_cache_skips_db_for_recent_keys(
+    client,  # noqa: ARG001
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    hour = dt.datetime(2026, 1, 30, 12, tzinfo=dt.timezone.utc)
+    calls: list[int] = []
+
+    async def fake_get(self, url: str, params=None, timeout=None):  # noqa: ANN001
+        calls.append(1)
+        payload = _open_meteo_ok_payload(hour=hour)
+        return httpx.Response(200, json=payload, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+
+    async def _run() -> None:
+        sessionmaker = get_sessionmaker()
+        async with sessionmaker() as session:
+            first, _ = await get_weather_snapshot(
+                session=session, latitude=31.2304, longitude=121.4737, recorded_at=hour
+            )
+            await session.commit()
+
+        # Even with the DB row gone, the LRU still answers without the provider.
+        async with sessionmaker() as session:
+            await session.execute(sa.delete(WeatherCache))
+            await session.commit()
+
+        async with sessionmaker() as session:
+            statements: list[str] = []
+
+            def _record(conn, cursor, statement, *args):  # noqa: ANN001, ARG001
+                statements.append(statement)
+
+            engine = session.bind.sync_engine
+            sa.event.listen(engine, "before_cursor_execute", _record)
+            try:
+                again, degraded = await get_weather_snapshot(
+                    session=session,
+                    latitude=31.2304,
+                    longitude=121.4737,
+                    recorded_at=hour + dt.timedelta(minutes=30),
+                )
+            finally:
+                sa.event.remove(engine, "before_cursor_execute", _record)
+            assert degraded is False
+            assert again == first
+            assert statements == []
+
+    asyncio.run(_run())
+    assert len(calls) == 1
+
+
+def test_weather_cache_entries_reuse_lru_ids(
+    client,  # noqa: ARG001
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from app.services.weather import get_weather_cache_entries
+
+    hour = dt.datetime(2026, 1, 30, 12, tzinfo=dt.timezone.utc)
+
+    async def fake_get(self, url: str, params=None, timeout=None):  # noqa: ANN001
+        payload = _open_meteo_ok_payload(hour=hour)
+        return httpx.Response(200, json=payload, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+
+    points = [(31.2304, 121.4737, hour), (31.2304, 121.4737, hour)]
+
+    async def _run() -> None:
+        sessionmaker = get_sessionmaker()
+        async with sessionmaker() as session:
+            first, degraded = await get_weather_cache_entries(
+                session=session, points=points
+            )
+            await session.commit()
+        assert degraded is False
+        async with sessionmaker() as session:
+            row_id = (await session.execute(sa.select(WeatherCache.id))).scalar_one()
+        assert first[0] is not None and first[0][0] == row_id
+        assert first[1] == first[0]
+
+        # Ids are cached with the payloads: no weather_cache query on a hit.
+        async with sessionmaker() as session:
+            statements: list[str] = []
+
+            def _record(conn, cursor, statement, *args):  # noqa: ANN001, ARG001
+                statements.append(statement)
+
+            engine = session.bind.sync_engine
+            sa.event.listen(engine, "before_cursor_execute", _record)
+            try:
+                again, _ = await get_weather_cache_entries(
+                    session=session, points=points[:1]
+                )
+            finally:
+                sa.event.remove(engine, "before_cursor_execute", _record)
+            assert again == first[:1]
+            assert statements == []
+
+    asyncio.run(_run())
+
+
+def test_admin_can_read_weather_cache_stats(client) -> None:  # noqa: ANN001
+    r = client.post(
+        "/v1/auth/register",
+        json={
+            "email": "admin@test.com",
+            "username": "admin",
+            "password": "password123!",
+        },
+    )
+    assert r.status_code == 201, r.text
+    r = client.post(
+        "/v1/auth/login", json={"username": "admin", "password": "password123!"}
+    )
+    assert r.status_code == 200, r.text
+    access = r.json()["access_token"]
+
+    s = client.get(
+        "/v1/admin/weather-cache", headers={"Authorization": f"Bearer {access}"}
+    )
+    assert s.status_code == 200, s.text
+    assert s.json()["hits"] == 0
+    assert s.json()["max_entries"] == 50_000
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+
+import httpx
+import pytest
+
+from app.db.session import get_sessionmaker
+from app.services.rate_limit import InMemoryTokenBucket
+from app.services.weather import get_weather_snapshot
+
+
+def test_token_bucket_spaces_requests_at_the_configured_rate() -> None:
+    now = [0.0]
+    bucket = InMemoryTokenBucket(rate_per_s=10.0, capacity=3, clock=lambda: now[0])
+
+    async def _run() -> list[float]:
+        return [await bucket.reserve() for _ in range(6)]
+
+    # Burst of 3, then one slot every 100ms for the queued callers.
+    waits = asyncio.run(_run())
+    assert waits == pytest.approx([0.0, 0.0, 0.0, 0.1, 0.2, 0.3])
+
+    # After idling the bucket refills, but never beyond its capacity.
+    now[0] = 10.0
+    waits = asyncio.run(_run())
+    assert waits == pytest.approx([0.0, 0.0, 0.0, 0.1, 0.2, 0.3])
+
+
+def test_token_bucket_defer_holds_back_reservations() -> None:
+    now = [0.0]
+    bucket = InMemoryTokenBucket(rate_per_s=10.0, capacity=5, clock=lambda: now[0])
+
+    async def _run() -> None:
+        await bucket.defer(2.0)
+        assert await bucket.reserve() == pytest.approx(2.0)
+        now[0] = 1.5
+        assert await bucket.reserve() == pytest.approx(0.5)
+        now[0] = 2.0
+        assert await bucket.reserve() == 0.0
+
+    asyncio.run(_run())
+
+
+def test_weather_client_honours_retry_after(
+    client,  # noqa: ARG001
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    calls: list[int] = []
+    sleep_delays: list[float] = []
+    hour = dt.datetime(2026, 1, 30, 12, tzinfo=dt.timezone.utc)
+
+    async def fake_sleep(delay: float) -> None:
+        sleep_delays.append(delay)
+
+    async def fake_get(self, url: str, params=None, timeout=None):  # noqa: ANN001
+        calls.append(1)
+        req = httpx.Request("GET", url)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "7"}, request=req)
+        payload = {
+            "hourly": {
+                "time": [hour.replace(tzinfo=None).isoformat(timespec="minutes")],
+                "temperature_2m": [10.0],
+            }
+        }
+        return httpx.Response(200, json=payload, request=req)
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+
+    async def _run() -> None:
+        async with get_sessionmaker()() as session:
+            snap, degraded = await get_weather_snapshot(
+                session=session,
+                latitude=31.2304,
+                longitude=121.4737,
+                recorded_at=hour,
+                sleep=fake_sleep,
+            )
+            assert degraded is False
+            assert snap is not None
+
+    asyncio.run(_run())
+
+    # Retry-After replaces the exponential backoff and is enforced by the
+    # shared bucket before the retry.
+    assert len(calls) == 2
+    assert len(sleep_delays) == 1
+    assert sleep_delays[0] == pytest.approx(7.0, abs=0.5)
+
+
+def test_weather_client_waits_for_tokens_when_bucket_is_empty(
+    client,  # noqa: ARG001
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("WAYFARER_OPEN_METEO_RATE_LIMIT_PER_MIN", "60")
+    monkeypatch.setenv("WAYFARER_OPEN_METEO_RATE_LIMIT_BURST", "1")
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    sleep_delays: list[float] = []
+
+    async def fake_sleep(delay: float) -> None:
+        sleep_delays.append(delay)
+
+    async def fake_get(self, url: str, params=None, timeout=None):  # noqa: ANN001
+        day = params["start_date"]
+        payload = {"hourly": {"time": [f"{day}T12:00"], "temperature_2m": [1.0]}}
+        return httpx.Response(200, json=payload, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+
+    async def _run() -> None:
+        async with get_sessionmaker()() as session:
+            for day in (1, 3, 5):
+                snap, degraded = await get_weather_snapshot(
+                    session=session,
+                    latitude=31.2304,
+                    longitude=121.4737,
+                    recorded_at=dt.datetime(2026, 1, day, 12, tzinfo=dt.timezone.utc),
+                    sleep=fake_sleep,
+                )
+                assert degraded is False
+                assert snap is not None
+
+    asyncio.run(_run())
+
+    # 1 request/s with no burst: the 2nd and 3rd requests queue behind the 1st.
+    assert sleep_delays == pytest.approx([1.0, 2.0], abs=0.2)
+
+    monkeypatch.delenv("WAYFARER_OPEN_METEO_RATE_LIMIT_PER_MIN", raising=False)
+    monkeypatch.delenv("WAYFARER_OPEN_METEO_RATE_LIMIT_BURST", raising=False)
+    get_settings.cache_clear()
+
+
+def test_loop_local_redis_clients_close_with_the_open_meteo_clients(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    import sys
+    import types
+
+    from app.services import weather as weather_service
+    from app.services.rate_limit import RedisTokenBucket
+    from app.services.single_flight import RedisFetchLock
+
+    opened: list[object] = []
+
+    class _FakeRedis:
+        closed = False
+
+        @classmethod
+        def from_url(cls, url: str) -> _FakeRedis:  # noqa: ARG003
+            client = cls()
+            opened.append(client)
+            return client
+
+        async def eval(self, *args: object) -> int:  # noqa: ARG002
+            return 0
+
+        async def set(self, *args: object, **kwargs: object) -> bool:  # noqa: ARG002
+            return True
+
+        async def aclose(self) -> None:
+            self.closed = True
+
+    fake_module = types.ModuleType("redis.asyncio")
+    fake_module.Redis = _FakeRedis  # type: ignore[attr-defined]
+    monkeypatch.setitem(sys.modules, "redis", types.ModuleType("redis"))
+    monkeypatch.setitem(sys.modules, "redis.asyncio", fake_module)
+
+    limiter = RedisTokenBucket(
+        redis_url="redis://unused",
+        key="k",
+        rate_per_s=10.0,
+        capacity=1,
+        fallback=InMemoryTokenBucket(rate_per_s=10.0, capacity=1),
+    )
+    lock = RedisFetchLock(redis_url="redis://unused", prefix="p:", ttl_s=1.0)
+    monkeypatch.setattr(weather_service, "_rate_limiter", limiter)
+    monkeypatch.setattr(weather_service, "_fetch_lock", lock)
+
+    async def _job() -> None:
+        # One Celery job: its own loop, torn down when the job returns.
+        async with weather_service.open_meteo_http_client():
+            await limiter.reserve()
+            await lock.acquire("cell")
+
+    asyncio.run(_job())
+    asyncio.run(_job())
+
+    # Each loop opened its own clients, and each job closed them.
+    assert len(opened) == 4
+    assert all(c.closed for c in opened)  # type: ignore[attr-defined]
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+
+import httpx
+import pytest
+
+from app.db.session import get_sessionmaker
+from app.models.weather_cache import WeatherCache
+from app.services.weather import get_weather_snapshot, get_weather_snapshots
+from app.utils.geohash import encode
+
+
+_HOUR = dt.datetime(2026, 1, 30, 12, tzinfo=dt.timezone.utc)
+
+
+def _ok_response(url: str) -> httpx.Response:
+    payload = {
+        "hourly": {
+            "time": [_HOUR.replace(tzinfo=None).isoformat(timespec="minutes")],
+            "temperature_2m": [10.0],
+        }
+    }
+    return httpx.Response(200, json=payload, request=httpx.Request("GET", url))
+
+
+async def _lookup() -> tuple[dict[str, object] | None, bool]:
+    async with get_sessionmaker()() as session:
+        out = await get_weather_snapshot(
+            session=session,
+            latitude=31.2304,
+            longitude=121.4737,
+            recorded_at=_HOUR + dt.timedelta(minutes=5),
+        )
+        await session.commit()
+        return out
+
+
+def test_concurrent_misses_share_one_provider_request(
+    client,  # noqa: ARG001
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    calls: list[int] = []
+
+    async def fake_get(self, url: str, params=None, timeout=None):  # noqa: ANN001
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return _ok_response(url)
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+
+    async def _run() -> list[tuple[dict[str, object] | None, bool]]:
+        return await asyncio.gather(*(_lookup() for _ in range(5)))
+
+    results = asyncio.run(_run())
+
+    assert len(calls) == 1
+    assert all(degraded is False for _, degraded in results)
+    assert all(snap == results[0][0] for snap, _ in results)
+    assert results[0][0] is not None
+
+
+class _HeldElsewhereLock:
+    """Pretends another worker holds every lock and writes `payload` meanwhile."""
+
+    def __init__(self, payload: dict[str, object] | None) -> None:
+        self.payload = payload
+        self.waited: list[str] = []
+
+    async def acquire(self, name: str) -> bool:  # noqa: ARG002
+        return False
+
+    async def release(self, name: str) -> None:  # noqa: ARG002
+        raise AssertionError("lock was never acquired")
+
+    async def wait_released(self, name: str, *, sleep=None) -> None:  # noqa: ANN001, ARG002
+        self.waited.append(name)
+        if self.payload is None:
+            return
+        async with get_sessionmaker()() as session:
+            session.add(
+                WeatherCache(
+                    geohash_5=encode(31.2304, 121.4737, precision=5),
+                    hour_time=_HOUR,
+                    payload=self.payload,
+                )
+            )
+            await session.commit()
+
+
+@pytest.mark.parametrize("other_worker_succeeds", [True, False])
+def test_fetch_lock_waits_for_other_worker(
+    client,  # noqa: ARG001
+    monkeypatch: pytest.MonkeyPatch,
+    other_worker_succeeds: bool,
+) -> None:
+    calls: list[int] = []
+
+    async def fake_get(self, url: str, params=None, timeout=None):  # noqa: ANN001
+        calls.append(1)
+        return _ok_response(url)
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+
+    from app.services import weather as weather_service
+
+    other = {"provider": "other-worker"}
+    lock = _HeldElsewhereLock(other if other_worker_succeeds else None)
+    monkeypatch.setattr(weather_service, "_fetch_lock", lock)
+
+    snap, degraded = asyncio.run(_lookup())
+
+    geohash_5 = encode(31.2304, 121.4737, precision=5)
+    assert lock.waited == [f"{geohash_5}:2026-01-30"]
+    assert degraded is False
+    if other_worker_succeeds:
+        # The other worker's row is read back; no duplicate provider call.
+        assert snap == other
+        assert calls == []
+    else:
+        # The other worker gave up; fall back to fetching ourselves.
+        assert snap is not None and snap["provider"] == "open-meteo"
+        assert len(calls) == 1
+
+
+def test_canceled_leader_does_not_fail_joined_days(
+    client,  # noqa: ARG001
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from app.services.weather import WeatherKey, get_memory_cache
+
+    calls: list[str] = []
+
+    async def fake_get(self, url: str, params=None, timeout=None):  # noqa: ANN001
+        calls.append(f"{params['latitude']},{params['longitude']}")
+        await asyncio.sleep(0.05)
+        return _ok_response(url)
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+
+    class _Canceled(Exception):
+        pass
+
+    async def check_canceled() -> None:
+        # The leader's export is canceled once its first request is sent.
+        if calls:
+            raise _Canceled
+
+    cells = sorted(
+        [(31.2304, 121.4737), (31.2304, 122.4737)],
+        key=lambda c: encode(c[0], c[1], precision=5),
+    )
+    recorded_at = _HOUR + dt.timedelta(minutes=5)
+
+    async def _leader() -> None:
+        async with get_sessionmaker()() as session:
+            await get_weather_snapshots(
+                session=session,
+                points=[(lat, lon, recorded_at) for lat, lon in cells],
+                concurrency=1,
+                check_canceled=check_canceled,
+            )
+
+    async def _waiter() -> tuple[list[dict[str, object] | None], bool]:
+        # Joins the leader's flight for the cell it has not requested yet.
+        await asyncio.sleep(0.01)
+        async with get_sessionmaker()() as session:
+            out = await get_weather_snapshots(
+                session=session, points=[(*cells[1], recorded_at)]
+            )
+            await session.commit()
+            return out
+
+    async def _run():  # noqa: ANN202
+        return await asyncio.gather(_leader(), _waiter(), return_exceptions=True)
+
+    leader_out, waiter_out = asyncio.run(_run())
+
+    assert isinstance(leader_out, _Canceled)
+    snapshots, degraded = waiter_out
+    assert degraded is False
+    assert snapshots[0] is not None
+    assert len(calls) == 2
+    key = WeatherKey(encode(*cells[1], precision=5), _HOUR)
+    assert get_memory_cache().get(key) == (True, snapshots[0])
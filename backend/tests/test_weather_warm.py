@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import uuid
+
+import httpx
+import pytest
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+
+from app.db.session import get_sessionmaker
+from app.models.track_point import TrackPoint
+from app.models.weather_cache import WeatherCache
+
+
+def _register(client: TestClient, *, email: str, username: str, password: str) -> None:
+    r = client.post(
+        "/v1/auth/register",
+        json={"email": email, "username": username, "password": password},
+    )
+    assert r.status_code == 201, r.text
+
+
+def _login_access_token(client: TestClient, *, username: str, password: str) -> str:
+    r = client.post(
+        "/v1/auth/login",
+        json={"username": username, "password": password},
+    )
+    assert r.status_code == 200, r.text
+    return str(r.json()["access_token"])
+
+
+def _auth_header(access_token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+def test_warm_weather_cache_fetches_missing_days_once(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    username = f"u-{uuid.uuid4().hex}"
+    password = "password123!"
+    _register(
+        client, email=f"{username}@test.com", username=username, password=password
+    )
+    access = _login_access_token(client, username=username, password=password)
+
+    # Two cells on 2026-01-30, one of them again on 2026-01-31.
+    rows = [
+        ("2026-01-30T08:10:00Z", 31.2304, 121.4737),
+        ("2026-01-30T08:40:00Z", 31.2305, 121.4737),
+        ("2026-01-30T21:00:00Z", 31.2304, 121.4737),
+        ("2026-01-31T03:00:00Z", 31.2304, 121.4737),
+        ("2026-01-30T09:00:00Z", 39.9042, 116.4074),
+    ]
+    items = [
+        {
+            "client_point_id": str(uuid.uuid4()),
+            "recorded_at": recorded_at,
+            "latitude": lat,
+            "longitude": lon,
+            "accuracy": 8.0,
+        }
+        for recorded_at, lat, lon in rows
+    ]
+    r = client.post(
+        "/v1/tracks/batch", json={"items": items}, headers=_auth_header(access)
+    )
+    assert r.status_code == 200, r.text
+
+    # Uploaded two days ago: outside the ingestion window, so never warmed.
+    stale_id = str(uuid.uuid4())
+    r = client.post(
+        "/v1/tracks/batch",
+        json={
+            "items": [
+                {
+                    "client_point_id": stale_id,
+                    "recorded_at": "2026-01-30T10:00:00Z",
+                    "latitude": 22.5431,
+                    "longitude": 114.0579,
+                    "accuracy": 8.0,
+                }
+            ]
+        },
+        headers=_auth_header(access),
+    )
+    assert r.status_code == 200, r.text
+    now = dt.datetime.now(dt.timezone.utc)
+
+    async def _backdate() -> None:
+        async with get_sessionmaker()() as session:
+            await session.execute(
+                sa.update(TrackPoint)
+                .where(TrackPoint.client_point_id == stale_id)
+                .values(created_at=now - dt.timedelta(days=2))
+            )
+            await session.commit()
+
+    asyncio.run(_backdate())
+
+    requested: list[tuple[float, str, str]] = []
+
+    async def fake_get(self, url: str, params=None, timeout=None):  # noqa: ANN001
+        requested.append((params["latitude"], params["start_date"], params["end_date"]))
+        start = dt.date.fromisoformat(params["start_date"])
+        end = dt.date.fromisoformat(params["end_date"])
+        hours = [
+            dt.datetime(start.year, start.month, start.day) + dt.timedelta(hours=h)
+            for h in range(24 * ((end - start).days + 1))
+        ]
+        payload = {
+            "hourly": {
+                "time": [h.isoformat(timespec="minutes") for h in hours],
+                "temperature_2m": [1.0] * len(hours),
+            }
+        }
+        return httpx.Response(200, json=payload, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+
+    from app.tasks import weather as weather_tasks
+
+    # Bounds are ingestion times: the old recorded_at values still qualify.
+    window = (
+        (now - dt.timedelta(hours=1)).isoformat(),
+        (now + dt.timedelta(hours=1)).isoformat(),
+    )
+    result = weather_tasks.warm_weather_cache_task(*window)
+    assert result == {"keys": 4, "unavailable": 0}
+    # One request per geohash and run of consecutive days.
+    assert sorted(d for _, *d in requested) == [
+        ["2026-01-30", "2026-01-30"],
+        ["2026-01-30", "2026-01-31"],
+    ]
+
+    async def _count() -> int:
+        async with get_sessionmaker()() as session:
+            return (
+                await session.execute(sa.select(sa.func.count(WeatherCache.id)))
+            ).scalar_one()
+
+    assert asyncio.run(_count()) == 24 * 3
+
+    # A second pass finds everything cached and stays off the provider.
+    requested.clear()
+    result = weather_tasks.warm_weather_cache_task(*window)
+    assert result == {"keys": 4, "unavailable": 0}
+    assert requested == []
+
+
+def test_scheduled_warm_resumes_from_its_cursor(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("WAYFARER_WEATHER_ARCHIVE_LAG_HOURS", "0")
+    monkeypatch.setenv("WAYFARER_WEATHER_WARM_LOOKBACK_HOURS", "1")
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    username = f"u-{uuid.uuid4().hex}"
+    password = "password123!"
+    _register(
+        client, email=f"{username}@test.com", username=username, password=password
+    )
+    access = _login_access_token(client, username=username, password=password)
+
+    def _upload(lat: float, lon: float) -> None:
+        item = {
+            "client_point_id": str(uuid.uuid4()),
+            "recorded_at": "2026-01-30T08:10:00Z",
+            "latitude": lat,
+            "longitude": lon,
+            "accuracy": 8.0,
+        }
+        r = client.post(
+            "/v1/tracks/batch", json={"items": [item]}, headers=_auth_header(access)
+        )
+        assert r.status_code == 200, r.text
+
+    requested: list[float] = []
+
+    async def fake_get(self, url: str, params=None, timeout=None):  # noqa: ANN001
+        requested.append(params["latitude"])
+        # The provider has no data at all for the Beijing cell.
+        has_data = abs(params["latitude"] - 39.9) > 1
+        payload = {
+            "hourly": {
+                "time": ["2026-01-30T08:00"] if has_data else [],
+                "temperature_2m": [1.0] if has_data else [],
+            }
+        }
+        return httpx.Response(200, json=payload, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+
+    from app.services import weather as weather_service
+    from app.tasks import weather as weather_tasks
+
+    _upload(31.2304, 121.4737)
+    _upload(39.9042, 116.4074)
+    assert weather_tasks.warm_weather_cache_task() == {"keys": 2, "unavailable": 1}
+    assert len(requested) == 2
+
+    # Later runs scan only what was uploaded since, even once the LRU (and its
+    # negative entries) has expired: the unavailable key is not asked again.
+    weather_service._memory_cache = None  # noqa: SLF001
+    requested.clear()
+    _upload(22.5431, 114.0579)
+    assert weather_tasks.warm_weather_cache_task() == {"keys": 1, "unavailable": 0}
+    assert len(requested) == 1 and abs(requested[0] - 22.5) < 1
+
+    requested.clear()
+    assert weather_tasks.warm_weather_cache_task() == {"keys": 0, "unavailable": 0}
+    assert requested == []
+
+
+def test_warm_weather_cache_task_routes_to_its_own_queue() -> None:
+    from app.tasks.celery_app import WEATHER_WARM_QUEUE, celery_app
+
+    route = celery_app.amqp.router.route(
+        {}, "app.tasks.weather.warm_weather_cache_task"
+    )
+    assert route["queue"].name == WEATHER_WARM_QUEUE
+    export_route = celery_app.amqp.router.route(
+        {}, "app.tasks.export.run_export_job_task"
+    )
+    assert export_route["queue"].name != WEATHER_WARM_QUEUE